@@ -36,6 +36,31 @@ TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
 
+# outgoing SMS pipeline (tennants/services/dispatch.py)
+SMS_DISPATCH = {
+    "WORKERS": int(os.getenv("SMS_DISPATCH_WORKERS", 8)),
+    "RATE_PER_SECOND": float(os.getenv("SMS_DISPATCH_RATE", 10)),  # 0 disables the limit
+    "MAX_RETRIES": 2,
+    "BACKOFF": 0.5,
+}
+
+# Signal-driven SMS go through the notification outbox; DELIVERY is "thread"
+# (in-process worker), "celery", "sync" or "manual" (run flush_outbox yourself)
+SMS_OUTBOX = {
+    "DELIVERY": os.getenv("SMS_OUTBOX_DELIVERY", "thread"),
+    "BATCH_SIZE": 100,
+    "MAX_ATTEMPTS": 5,
+}
+
+# Delta sync endpoint (tennants/services/sync.py): rows per resource per call,
+# seconds re-sent after catching up, and how long deletions are remembered
+SYNC = {
+    "PAGE_SIZE": 1000,
+    "MAX_PAGE_SIZE": 5000,
+    "OVERLAP": 5,
+    "TOMBSTONE_DAYS": 90,
+}
+
 CSRF_TRUSTED_ORIGINS = [
     "http://localhost:8080",
     "http://127.0.0.1:3000",
@@ -165,12 +190,21 @@ REST_FRAMEWORK = {
     
     'PAGE_SIZE': 10,
 
-       'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
-        'rest_framework.renderers.BrowsableAPIRenderer',  # <- this is what gives you the UI
-    ]
+    # orjson for JSON in and out (tennants/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'tennants.renderers.ORJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'tennants.renderers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# the browsable API (HTML forms for every endpoint) only in development
+if DEBUG:
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].append('rest_framework.renderers.BrowsableAPIRenderer')
+
 
 # CACHES = {
 #     "default": {
@@ -182,13 +216,36 @@ REST_FRAMEWORK = {
 #     }
 # }
 
-CACHES = {
-    "default": {
-        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+# CACHE_BACKEND=redis selects the shared Redis cache at REDIS_URL, so every worker
+# sees the same entries and invalidations (tennants/cache.py). Anything else,
+# including leaving it unset as the tests do, keeps a per-process memory cache:
+# a REDIS_URL alone never points a test run at (and cache.clear() on) shared Redis.
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "locmem")  # redis | locmem
+if CACHE_BACKEND == "redis" and REDIS_HOST:
+    CACHES = {
+        "default": {
+            "BACKEND": "django_redis.cache.RedisCache",
+            "LOCATION": REDIS_HOST,
+            "KEY_PREFIX": "house",
+            "OPTIONS": {
+                "CLIENT_CLASS": "django_redis.client.DefaultClient",
+                # a Redis outage degrades to cache misses instead of 500s
+                "IGNORE_EXCEPTIONS": True,
+            },
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
     }
-}
 
-CACHE_TTL = 60 * 15  # 15 minutes
+# writes invalidate cached responses through tennants.cache.DEPENDENCIES, so the TTL
+# only bounds memory use and can be long
+CACHE_TTL = int(os.getenv("CACHE_TTL", 60 * 60))
+# past CACHE_TTL a page is still served for this long while one worker rebuilds it
+CACHE_STALE_TTL = int(os.getenv("CACHE_STALE_TTL", 60 * 5))
 
 
 MIDDLEWARE = [
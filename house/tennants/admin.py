@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Tenant, House, Payment,FlatBuilding,RentCharge
+from .models import Tenant, House, Payment,FlatBuilding,RentCharge,OutboxMessage
 from django.contrib.auth.models import Group
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
@@ -12,9 +12,13 @@ admin.site.site_header = 'House Administration'
 class TenantAdmin(admin.ModelAdmin):
 
     list_display = ('user','full_name', 'email', 'phone', 'house', 'rent', 'security_deposit', 'balance','building_name')
+    list_select_related = ('user', 'house__flat_building')
     ordering = ('full_name',)
     readonly_fields = ('rent', 'security_deposit', 'balance','user')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_balances()
+
     def deposit_amount(self, obj):
         return obj.security_deposit
     deposit_amount.short_description = 'Security Deposit'
@@ -64,6 +68,9 @@ class FlatBuildingAdmin(admin.ModelAdmin):
     search_fields = ('biulding_name', 'address')
     readonly_fields = ('how_many_occupied', 'vacant_houses')
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_occupancy()
+
     def how_many_occupied(self, obj):
         return obj.how_many_occupied
     how_many_occupied.short_description = 'Occupied Houses'
@@ -82,10 +89,21 @@ class FlatBuildingAdmin(admin.ModelAdmin):
 
 @admin.register(RentCharge)
 class RentChargeAdmin(admin.ModelAdmin):
-    list_display = ('tenant', 'year', 'is_paid', 'month', 'amount_due')
+    list_display = ('tenant', 'year', 'is_paid', 'month', 'amount_due', 'amount_paid')
+    list_select_related = ('tenant',)
     list_filter = ('month', 'year')
     ordering = ('-year',)
     search_fields = ('tenant__full_name',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_payment_totals()
+
     def save_model(self, request, obj, form, change):
-        super().save_model(request, obj, form, change)
\ No newline at end of file
+        super().save_model(request, obj, form, change)
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('kind', 'to_number', 'status', 'attempts', 'created_at', 'sent_at')
+    list_filter = ('status', 'kind')
+    search_fields = ('to_number', 'idempotency_key')
+    readonly_fields = ('idempotency_key', 'provider_sid', 'last_error', 'claim_token', 'created_at', 'sent_at')
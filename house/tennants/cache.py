@@ -0,0 +1,211 @@
+"""
+Shared response cache with per-user, per-resource generation counters.
+
+Every cached API response lives under a key that embeds the current
+generation of the resources it was built from, e.g.
+
+    resp:7:tenants1718000000123456:<md5 of the path>
+
+Invalidating "tenants" for user 7 is a single INCR of gen:7:tenants; the old
+entries simply stop being addressed and age out with their TTL. No key
+scans, so it works the same on Redis (settings.CACHES with REDIS_URL) and
+on the LocMemCache used in tests and local runs.
+
+Pages are built through get_or_build(), which keeps one entry per page across
+generations. Expired or invalidated entries are rebuilt by a single worker
+holding a short lock while the others keep serving the previous copy.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+import hashlib
+import random
+import time
+import uuid
+
+CACHE_TTL = getattr(settings, 'CACHE_TTL', 60 * 15)
+# how long past its soft expiry a page may still be served while it is rebuilt
+STALE_TTL = getattr(settings, 'CACHE_STALE_TTL', 60 * 5)
+LOCK_TIMEOUT = getattr(settings, 'CACHE_LOCK_TIMEOUT', 10)
+# how long a request with nothing to serve waits for another worker's rebuild
+LOCK_WAIT = getattr(settings, 'CACHE_LOCK_WAIT', 2)
+JITTER = 0.1
+
+STATS = ('hit', 'miss', 'stale')
+
+
+def _generation_key(user_id, resource):
+    return f"gen:{user_id}:{resource}"
+
+
+def _new_generation():
+    # counters start from the clock, so a counter lost to eviction or a
+    # restart comes back higher than before and never re-exposes old entries
+    return time.time_ns() // 1000
+
+
+def generations(user_id, resources):
+    """Current generation of each resource for a user, in one cache round trip"""
+    keys = {resource: _generation_key(user_id, resource) for resource in resources}
+    found = cache.get_many(list(keys.values()))
+    result = {}
+    for resource, key in keys.items():
+        generation = found.get(key)
+        if generation is None:
+            # add() so concurrent first readers agree on one value
+            cache.add(key, _new_generation(), None)
+            generation = cache.get(key)
+        result[resource] = generation
+    return result
+
+
+def bump(user_id, *resources):
+    """Invalidate everything cached for these resources of a user"""
+    for resource in resources:
+        key = _generation_key(user_id, resource)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_generation(), None)
+
+
+def _as_list(resources):
+    return [resources] if isinstance(resources, str) else list(resources)
+
+
+def _digest(path):
+    return hashlib.md5(path.encode('utf-8')).hexdigest()
+
+
+def resource_version(user_id, resources):
+    """The generations of `resources` (a name or a list) as one string, e.g. tenants17180.dashboard17181"""
+    resources = _as_list(resources)
+    current = generations(user_id, resources)
+    return '.'.join(f"{resource}{current[resource]}" for resource in resources)
+
+
+def response_key(user_id, resources, path):
+    """
+    Cache key for a response built from `resources` (a name or a list).
+    Compute it before building the response and store under that same key,
+    so a write landing in between can't leave stale data under the new generation.
+    """
+    return f"resp:{user_id}:{resource_version(user_id, resources)}:{_digest(path)}"
+
+
+# ------------------------------
+# Single-flight pages
+# ------------------------------
+def _jittered(seconds):
+    # spread expiries so pages cached together don't all expire together
+    return seconds * random.uniform(1 - JITTER, 1 + JITTER)
+
+
+def count(stat):
+    key = f"stats:{stat}"
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def cache_stats():
+    """Hit, miss and stale counters shared by every worker using the cache"""
+    found = cache.get_many([f"stats:{stat}" for stat in STATS])
+    stats = {stat: found.get(f"stats:{stat}", 0) for stat in STATS}
+    served = sum(stats.values())
+    stats['hit_ratio'] = round((stats['hit'] + stats['stale']) / served, 4) if served else 0.0
+    return stats
+
+
+def _wait_for_rebuild(key, lock, version):
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None and entry['version'] == version:
+            return entry
+        if cache.get(lock) is None:
+            # the builder gave up, or the cache is unreachable
+            return None
+    return None
+
+
+def get_or_build(user_id, resources, path, build, version=None):
+    """
+    Return (data, stale) for a page built by `build()` from `resources`.
+
+    A page is fresh while its generation is current and its jittered soft TTL
+    hasn't passed. Otherwise one caller takes the rebuild lock and the rest get
+    the previous copy back with stale=True, or wait up to LOCK_WAIT for the
+    rebuild when there is no copy yet. Pass `version` if the caller already
+    looked it up.
+    """
+    resources = _as_list(resources)
+    version = version or resource_version(user_id, resources)
+    key = f"page:{user_id}:{'.'.join(resources)}:{_digest(path)}"
+    entry = cache.get(key)
+    if entry is not None and entry['version'] == version and entry['fresh_until'] > time.time():
+        count('hit')
+        return entry['data'], False
+
+    lock = f"lock:{key}"
+    token = uuid.uuid4().hex
+    if not cache.add(lock, token, LOCK_TIMEOUT):
+        if entry is not None:
+            count('stale')
+            return entry['data'], True
+        entry = _wait_for_rebuild(key, lock, version)
+        if entry is not None:
+            count('hit')
+            return entry['data'], False
+
+    try:
+        data = build()
+        ttl = _jittered(CACHE_TTL)
+        # kept past the soft TTL so there is something to serve during the next rebuild
+        cache.set(key, {'version': version, 'fresh_until': time.time() + ttl, 'data': data}, ttl + STALE_TTL)
+    finally:
+        if cache.get(lock) == token:
+            cache.delete(lock)
+    count('miss')
+    return data, False
+
+
+
+# ------------------------------
+# Dependency map
+# ------------------------------
+# model -> cached resources built from its rows. Resource names are the
+# prefixes the API views cache under (plus "dashboard" for the snapshot).
+# A write to the model invalidates all of them for the owning user.
+DEPENDENCIES = {
+    'FlatBuilding': ('flats', 'dashboard'),
+    'House': ('houses', 'dashboard'),
+    'Tenant': ('tenants', 'dashboard'),
+    # tenants show a balance, charges show what was paid against them
+    'RentCharge': ('rent_charges', 'tenants', 'dashboard'),
+    'Payment': ('payments', 'rent_charges', 'tenants', 'dashboard'),
+}
+
+
+def invalidate(model, *user_ids):
+    """
+    Bump every resource that depends on `model` (class or name) for the given
+    users. Inside a transaction the bump is repeated after commit, so a reader
+    that cached the pre-commit rows in between is invalidated as well.
+    """
+    name = model if isinstance(model, str) else model.__name__
+    resources = DEPENDENCIES.get(name, ())
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if not resources or not user_ids:
+        return
+
+    def bump_all():
+        for user_id in user_ids:
+            bump(user_id, *resources)
+
+    bump_all()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump_all)
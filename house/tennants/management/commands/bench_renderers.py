@@ -0,0 +1,82 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from tennants.renderers import ORJSONParser, ORJSONRenderer
+from tennants.services import bulk
+from tennants.views.api import HouseListView, TenantListView
+import io
+import timeit
+import uuid
+
+PAGES = {
+    'tenants': TenantListView,
+    'houses': HouseListView,
+}
+
+
+class Command(BaseCommand):
+    help = "Time DRF's JSON renderer and parser against the orjson ones on full list pages (throwaway data, rolled back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=500, help='Rows per page')
+        parser.add_argument('--repeat', type=int, default=50, help='Timed runs per renderer, the best one is reported')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            user = self.portfolio(rows)
+            pages = {name: self.page(view, user, rows) for name, view in PAGES.items()}
+            transaction.set_rollback(True)
+
+        for name, data in pages.items():
+            body = JSONRenderer().render(data)
+            if ORJSONParser().parse(io.BytesIO(body)) != JSONParser().parse(io.BytesIO(body)):
+                self.stderr.write(f"{name}: parsers disagree")
+            render = {
+                label: self.best(lambda renderer=renderer: renderer.render(data), options['repeat'])
+                for label, renderer in (('json', JSONRenderer()), ('orjson', ORJSONRenderer()))
+            }
+            parse = {
+                label: self.best(lambda parser=parser: parser.parse(io.BytesIO(body)), options['repeat'])
+                for label, parser in (('json', JSONParser()), ('orjson', ORJSONParser()))
+            }
+            self.stdout.write(f"{name}: {len(data['results'])} rows, {len(body) / 1024:.0f} KB")
+            for stage, timings in (('render', render), ('parse', parse)):
+                self.stdout.write(
+                    f"  {stage:<7} json {timings['json'] * 1000:7.2f} ms   orjson {timings['orjson'] * 1000:7.2f} ms   "
+                    + self.style.SUCCESS(f"{timings['json'] / timings['orjson']:.1f}x")
+                )
+
+    def portfolio(self, rows):
+        """A landlord with one building of `rows` occupied houses"""
+        token = uuid.uuid4().hex[:8]
+        user = User.objects.create_user(username=f'bench-{token}')
+        building, = bulk.create_buildings(user, [{'building_name': 'Bench', 'address': 'Bench Road', 'number_of_houses': rows}])
+        houses = bulk.create_houses(user, [
+            {'flat_building_id': building.pk, 'house_number': str(i), 'house_size': '2 bedroom', 'house_rent_amount': Decimal('15000')}
+            for i in range(rows)
+        ])
+        phone = int(token, 16) % 10**8
+        bulk.create_tenants(user, [
+            {
+                'house_id': house.pk,
+                'full_name': f'Tenant {i}',
+                'email': f'tenant{i}@{token}.example.com',
+                'phone': f'+2547{(phone + i) % 10**8:08d}',
+                'id_number': f'{token[:4]}{i}',
+            }
+            for i, house in enumerate(houses)
+        ], welcome=False)
+        return user
+
+    def page(self, view, user, rows):
+        request = APIRequestFactory().get('/', {'page_size': rows})
+        force_authenticate(request, user=user)
+        return view.as_view()(request).data
+
+    def best(self, run, repeat):
+        return min(timeit.repeat(run, number=1, repeat=repeat))
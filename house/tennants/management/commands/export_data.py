@@ -0,0 +1,46 @@
+from datetime import date
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tennants.services.export import EXPORTS, FORMATS, stream_export
+
+
+def parse_date(value):
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise CommandError(f"Expected YYYY-MM-DD, got {value!r}")
+
+
+class Command(BaseCommand):
+    help = "Export a landlord's tenants, payments or rent charges as CSV or NDJSON, streamed row by row."
+
+    def add_arguments(self, parser):
+        parser.add_argument('resource', choices=sorted(EXPORTS))
+        parser.add_argument('--user', required=True, help='Username of the landlord')
+        parser.add_argument('--format', dest='output', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--from', dest='start', help='First date to include as YYYY-MM-DD')
+        parser.add_argument('--to', dest='end', help='Last date to include as YYYY-MM-DD')
+        parser.add_argument('--building', type=int, help='Only rows of this building id')
+        parser.add_argument('--file', help='Write to this file instead of stdout')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f"User not found: {options['user']}")
+        filters = {
+            'start': parse_date(options['start']) if options['start'] else None,
+            'end': parse_date(options['end']) if options['end'] else None,
+            'building': options['building'],
+        }
+        lines = stream_export(user, options['resource'], options['output'], **filters)
+
+        if not options['file']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        count = -1 if options['output'] == 'csv' else 0  # the header line
+        with open(options['file'], 'w', newline='', encoding='utf-8') as handle:
+            for line in lines:
+                handle.write(line)
+                count += 1
+        self.stderr.write(self.style.SUCCESS(f"Exported {count} {options['resource']} to {options['file']}"))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from tennants.models import OutboxMessage
+from tennants.services.outbox import deliver_pending
+
+
+class Command(BaseCommand):
+    help = 'Send every SMS waiting in the notification outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--retry-failed', action='store_true',
+                            help='Give messages that used up their attempts another try')
+
+    def handle(self, *args, **options):
+        if options['retry_failed']:
+            retried = OutboxMessage.objects.filter(status=OutboxMessage.FAILED).update(
+                status=OutboxMessage.PENDING, attempts=0
+            )
+            self.stdout.write(f"Re-queued {retried} failed message(s)")
+
+        counts = deliver_pending(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Sent {counts['sent']} message(s), {counts['failed']} failed"))
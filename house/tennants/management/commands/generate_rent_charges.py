@@ -0,0 +1,41 @@
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from tennants.services.billing import generate_rent_charges
+
+
+class Command(BaseCommand):
+    help = 'Create rent charges for every active tenant for a month, skipping tenants already billed'
+
+    def add_arguments(self, parser):
+        today = timezone.now().date()
+        parser.add_argument('--year', type=int, default=today.year)
+        parser.add_argument('--month', type=int, default=today.month)
+        parser.add_argument('--user', help='Only bill tenants belonging to this username')
+        parser.add_argument('--no-reminders', action='store_true', help="Don't queue rent reminders for the new charges")
+
+    def handle(self, *args, **options):
+        if options['user']:
+            try:
+                landlords = [User.objects.get(username=options['user'])]
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+        else:
+            landlords = User.objects.filter(tenant__is_active=True).distinct().order_by('pk')
+
+        totals = {'created': 0, 'skipped': 0}
+        for landlord in landlords:
+            try:
+                counts = generate_rent_charges(
+                    landlord, options['year'], options['month'], send_reminders=not options['no_reminders']
+                )
+            except ValidationError as e:
+                raise CommandError(e.messages[0])
+            self.stdout.write(f"{landlord.username}: {counts['created']} created, {counts['skipped']} skipped")
+            totals['created'] += counts['created']
+            totals['skipped'] += counts['skipped']
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Billed {options['month']}/{options['year']}: {totals['created']} created, {totals['skipped']} skipped"
+        ))
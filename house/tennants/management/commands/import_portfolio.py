@@ -0,0 +1,46 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tennants.services.portfolio import import_portfolio
+import time
+
+
+class Command(BaseCommand):
+    help = "Import buildings, houses and tenants from a portfolio CSV in one pass. Nothing is written if a line is invalid."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file, one house per line (see tennants/services/portfolio.py)')
+        parser.add_argument('--user', required=True, help='Username of the landlord')
+        parser.add_argument('--dry-run', action='store_true', help='Only validate and report')
+        parser.add_argument('--skip-invalid', action='store_true', help='Import the valid lines and report the rest')
+        parser.add_argument('--welcome', action='store_true', help='Queue welcome messages for the imported tenants')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(f"User not found: {options['user']}")
+
+        started = time.monotonic()
+        try:
+            report = import_portfolio(
+                user, options['path'],
+                dry_run=options['dry_run'],
+                skip_invalid=options['skip_invalid'],
+                welcome=options['welcome'],
+                batch_size=options['batch_size'],
+            )
+        except OSError as exc:
+            raise CommandError(exc)
+
+        for line, errors in sorted(report['errors'].items()):
+            for field, messages in errors.items():
+                for message in messages:
+                    self.stderr.write(f"line {line}: {field}: {message}")
+        if report['errors'] and not options['skip_invalid']:
+            raise CommandError(f"{len(report['errors'])} invalid line(s), nothing imported")
+
+        verb = 'Would import' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report['buildings']} building(s), {report['houses']} house(s) and {report['tenants']} tenant(s) "
+            f"in {time.monotonic() - started:.2f}s, {len(report['errors'])} line(s) skipped"
+        ))
@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tennants.models import Tenant
+from tennants.services.ledger import rebuild_ledger, verify_ledger
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the denormalized tenant/rent charge balances and verify them against the payment history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only rebuild tenants belonging to this username')
+        parser.add_argument('--verify-only', action='store_true', help='Report drift without writing anything')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.all()
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+            tenants = tenants.filter(user=user)
+
+        drift = verify_ledger(tenants)
+        self.stdout.write(
+            f"Drift found: {len(drift['tenants'])} tenant(s), {len(drift['charges'])} rent charge(s)"
+        )
+        if options['verify_only']:
+            if drift['tenants'] or drift['charges']:
+                raise CommandError('Ledger is out of sync, run without --verify-only to repair it')
+            self.stdout.write(self.style.SUCCESS('Ledger is in sync'))
+            return
+
+        charges, ledgers = rebuild_ledger(tenants)
+        self.stdout.write(f"Rebuilt {ledgers} tenant ledger(s) and {charges} rent charge total(s)")
+
+        drift = verify_ledger(tenants)
+        if drift['tenants'] or drift['charges']:
+            raise CommandError(
+                f"Ledger still out of sync after rebuild: {len(drift['tenants'])} tenant(s), "
+                f"{len(drift['charges'])} rent charge(s)"
+            )
+        self.stdout.write(self.style.SUCCESS('Ledger rebuilt and verified'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand, CommandError
+from tennants.services.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the tenant search index (SQLite FTS5) from the tenants table'
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+        if count is None:
+            raise CommandError('This database has no tenant search index, searches use the ORM')
+        self.stdout.write(self.style.SUCCESS(f"Indexed {count} tenant(s)"))
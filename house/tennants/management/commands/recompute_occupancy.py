@@ -0,0 +1,28 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from tennants.services.occupancy import recompute_occupancy
+
+
+class Command(BaseCommand):
+    help = 'Recompute house occupancy and building house counts from the tenants and houses, repairing any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help='Only recompute houses belonging to this username')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without writing anything')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']} does not exist")
+
+        counts = recompute_occupancy(user, dry_run=options['dry_run'])
+        self.stdout.write(f"Drift found: {counts['houses']} house(s), {counts['buildings']} building house count(s)")
+        if options['dry_run']:
+            if counts['houses'] or counts['buildings']:
+                raise CommandError('Occupancy is out of sync, run without --dry-run to repair it')
+            self.stdout.write(self.style.SUCCESS('Occupancy is in sync'))
+            return
+        self.stdout.write(self.style.SUCCESS('Occupancy recomputed'))
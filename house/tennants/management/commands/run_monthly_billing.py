@@ -0,0 +1,60 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from tennants.services.billing import month_range, run_billing
+
+
+def parse_month(value):
+    try:
+        year, month = (int(part) for part in value.split('-'))
+    except ValueError:
+        raise CommandError(f"Expected YYYY-MM, got {value!r}")
+    if not 1 <= month <= 12:
+        raise CommandError(f"{value} is not a valid month")
+    return year, month
+
+
+class Command(BaseCommand):
+    help = 'Bill every active tenant for a month or a range of months, sharded per landlord. Safe to re-run.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='start', help='First month to bill as YYYY-MM (default: this month)')
+        parser.add_argument('--to', dest='end', help='Last month to bill as YYYY-MM (default: --from)')
+        parser.add_argument('--user', action='append', help='Only bill this username, can be repeated')
+        parser.add_argument('--processes', type=int, default=1, help='Worker processes, one landlord per task')
+        parser.add_argument('--no-reminders', action='store_true', help="Don't queue reminders for this month's charges")
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        start = parse_month(options['start']) if options['start'] else (today.year, today.month)
+        end = parse_month(options['end']) if options['end'] else start
+        months = month_range(start, end)
+        if not months:
+            raise CommandError('--to is before --from')
+
+        user_ids = None
+        if options['user']:
+            users = dict(User.objects.filter(username__in=options['user']).values_list('username', 'pk'))
+            missing = set(options['user']) - set(users)
+            if missing:
+                raise CommandError(f"User(s) not found: {', '.join(sorted(missing))}")
+            user_ids = list(users.values())
+
+        def progress(done, total, result):
+            self.stdout.write(
+                f"[{done}/{total}] user {result['user_id']}: {result['created']} created, "
+                f"{result['skipped']} skipped in {result['elapsed']:.2f}s"
+            )
+
+        self.stdout.write(f"Billing {len(months)} month(s) from {start[0]}-{start[1]:02d} to {end[0]}-{end[1]:02d}")
+        summary = run_billing(
+            months,
+            user_ids=user_ids,
+            processes=options['processes'],
+            send_reminders=not options['no_reminders'],
+            progress=progress,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {summary['created']} created, {summary['skipped']} skipped for {summary['landlords']} landlord(s) "
+            f"in {summary['elapsed']:.2f}s ({summary['rate']:.0f} charges/s)"
+        ))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from tennants.services.dispatch import FakeSMSServer, HTTPTransport, SMSDispatcher, SMSMessage
+
+
+class Command(BaseCommand):
+    help = 'Load-test the SMS dispatch pipeline against a local fake SMS server and report throughput'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--messages', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=16)
+        parser.add_argument('--rate', type=float, default=0, help='Per-second limit, 0 for unlimited')
+        parser.add_argument('--latency', type=float, default=0.05, help='Simulated provider latency in seconds')
+        parser.add_argument('--failure-rate', type=float, default=0.0, help='Fraction of requests the server rejects')
+        parser.add_argument('--retries', type=int, default=2)
+        parser.add_argument('--url', help='Use an already running SMS endpoint instead of the built-in server')
+
+    def handle(self, *args, **options):
+        messages = [
+            SMSMessage(f"+2547{i:08d}", f"Load test message {i}")
+            for i in range(options['messages'])
+        ]
+
+        def run(url):
+            dispatcher = SMSDispatcher(
+                HTTPTransport(url),
+                workers=options['workers'],
+                rate_per_second=options['rate'],
+                max_retries=options['retries'],
+                backoff=0.05,
+            )
+            return dispatcher.dispatch(messages)
+
+        if options['url']:
+            report = run(options['url'])
+        else:
+            with FakeSMSServer(latency=options['latency'], failure_rate=options['failure_rate']) as server:
+                report = run(server.url)
+
+        attempts = sum(r.attempts for r in report.results)
+        self.stdout.write(
+            f"{len(report.results)} messages in {report.elapsed:.2f}s with {options['workers']} worker(s): "
+            f"{report.sent} sent, {report.failed} failed, {attempts} attempt(s)"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Throughput: {report.throughput:.1f} msg/s"))
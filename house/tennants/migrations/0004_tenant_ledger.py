@@ -0,0 +1,55 @@
+# Generated by Django 5.1.7 on 2026-10-17 17:56
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def populate_ledger(apps, schema_editor):
+    Tenant = apps.get_model('tennants', 'Tenant')
+    TenantLedger = apps.get_model('tennants', 'TenantLedger')
+    RentCharge = apps.get_model('tennants', 'RentCharge')
+    Payment = apps.get_model('tennants', 'Payment')
+    money = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def total(queryset, group_by, field):
+        rows = queryset.order_by().values(group_by).annotate(total=Sum(field)).values('total')
+        return Coalesce(Subquery(rows, output_field=money), Value(Decimal('0')), output_field=money)
+
+    RentCharge.objects.update(
+        amount_paid=total(Payment.objects.filter(rent_charge=OuterRef('pk')), 'rent_charge', 'amount')
+    )
+    rows = Tenant.objects.annotate(
+        due=total(RentCharge.objects.filter(tenant=OuterRef('pk')), 'tenant', 'amount_due'),
+        paid=total(Payment.objects.filter(tenant=OuterRef('pk')), 'tenant', 'amount'),
+    ).values_list('pk', 'due', 'paid')
+    TenantLedger.objects.bulk_create(
+        [TenantLedger(tenant_id=pk, total_due=due, total_paid=paid) for pk, due, paid in rows],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tennants', '0003_rentcharge_reminder_sent_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TenantLedger',
+            fields=[
+                ('tenant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger', serialize=False, to='tennants.tenant')),
+                ('total_due', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='rentcharge',
+            name='amount_paid',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(populate_ledger, migrations.RunPython.noop),
+    ]
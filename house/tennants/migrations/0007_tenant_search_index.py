@@ -0,0 +1,56 @@
+from django.db import OperationalError, migrations
+import phonenumbers
+import re
+
+TABLE = 'tennants_tenant_search'
+
+
+def phone_keys(phone):
+    # same as services.search.phone_keys, frozen for the migration
+    try:
+        number = phonenumbers.parse(str(phone or ''), None)
+    except phonenumbers.NumberParseException:
+        return re.sub(r'\D', '', str(phone or ''))
+    national = phonenumbers.national_significant_number(number)
+    return f"{number.country_code}{national} 0{national}"
+
+
+def create_index(apps, schema_editor):
+    """SQLite only: other databases search with the ORM (see services/search.py)"""
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    Tenant = apps.get_model('tennants', 'Tenant')
+    with connection.cursor() as cursor:
+        try:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+                "full_name, email, phone, id_number, user_id UNINDEXED, tokenize='trigram')"
+            )
+        except OperationalError:
+            # SQLite built without FTS5 or older than 3.34 (no trigram tokenizer)
+            return
+        rows = Tenant.objects.using(schema_editor.connection.alias).values_list(
+            'pk', 'full_name', 'email', 'phone', 'id_number', 'user_id'
+        )
+        cursor.executemany(
+            f"INSERT INTO {TABLE} (rowid, full_name, email, phone, id_number, user_id) VALUES (%s, %s, %s, %s, %s, %s)",
+            [(pk, name, email, phone_keys(phone), id_number or '', user_id) for pk, name, email, phone, id_number, user_id in rows],
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tennants', '0006_sync_change_tracking'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
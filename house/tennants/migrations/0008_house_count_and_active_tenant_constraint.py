@@ -0,0 +1,52 @@
+# Generated by Django 5.1.7 on 2026-10-17 19:06
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def count_houses(apps, schema_editor):
+    FlatBuilding = apps.get_model('tennants', 'FlatBuilding')
+    House = apps.get_model('tennants', 'House')
+    counts = House.objects.filter(flat_building=OuterRef('pk')).order_by().values('flat_building').annotate(n=Count('pk')).values('n')
+    FlatBuilding.objects.update(house_count=Coalesce(Subquery(counts), Value(0)))
+
+
+def deactivate_duplicate_tenants(apps, schema_editor):
+    """Houses with more than one active tenant would fail the constraint: keep the latest one active"""
+    Tenant = apps.get_model('tennants', 'Tenant')
+    crowded = (
+        Tenant.objects.filter(is_active=True, house__isnull=False).order_by()
+        .values('house').annotate(n=Count('pk')).filter(n__gt=1).values_list('house', flat=True)
+    )
+    for house_id in list(crowded):
+        tenants = Tenant.objects.filter(house_id=house_id, is_active=True).order_by('-created_at', '-pk')
+        keep, *others = tenants.values_list('pk', flat=True)
+        Tenant.objects.filter(pk__in=others).update(is_active=False)
+        logger.warning(f"House {house_id} had {len(others) + 1} active tenants; kept {keep}, deactivated {others}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tennants', '0007_tenant_search_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='flatbuilding',
+            name='house_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_houses, migrations.RunPython.noop),
+        migrations.RunPython(deactivate_duplicate_tenants, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='tenant',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('house',), name='one_active_tenant_per_house'),
+        ),
+    ]
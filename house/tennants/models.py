@@ -1,35 +1,183 @@
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
 from django.contrib.auth.models import User
 from datetime import datetime
 from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
-from django.core.exceptions import ValidationError
-from django.db.models import Sum
+from django.core.exceptions import NON_FIELD_ERRORS, ValidationError
+from django.db.models import Count, Sum, F, Q, OuterRef, Subquery, Value, ExpressionWrapper
+from django.db.models.functions import Coalesce
+from decimal import Decimal
 import logging
 
 logger = logging.getLogger(__name__)
 
+MONEY = models.DecimalField(max_digits=12, decimal_places=2)
+
+
+def total_subquery(queryset, group_by, field):
+    """Correlated SUM(field) over queryset grouped by group_by, 0 when there are no rows"""
+    totals = queryset.order_by().values(group_by).annotate(total=Sum(field)).values('total')
+    return Coalesce(Subquery(totals, output_field=MONEY), Value(Decimal('0')), output_field=MONEY)
+
+
+def annotatable(func):
+    """
+    Property that returns a same-named queryset annotation when one was loaded
+    (see Tenant.objects.with_balances()) and computes the value otherwise.
+    """
+    attr = f'_{func.__name__}'
+
+    def getter(self):
+        if attr in self.__dict__:
+            return self.__dict__[attr]
+        return func(self)
+
+    def setter(self, value):
+        self.__dict__[attr] = value
+
+    return property(getter, setter, doc=func.__doc__)
+
+
+class TrackedFieldsMixin:
+    """
+    Remembers tracked_fields (attnames) as they were loaded from or last saved
+    to the database, so signal handlers can tell what a save changes without
+    reading the row again. Values stay unknown for unsaved instances and
+    fields that weren't loaded (only()/defer()).
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_tracked()
+        return instance
+
+    def _remember_tracked(self, fields=None):
+        """Take the tracked values as now in the database: every loaded one, or only `fields` (names or attnames)"""
+        if fields is None:
+            self._tracked_values = {name: self.__dict__[name] for name in self.tracked_fields if name in self.__dict__}
+            return
+        fields = set(fields)
+        written = {field.attname for field in self._meta.concrete_fields if {field.name, field.attname} & fields}
+        if not hasattr(self, '_tracked_values'):
+            self._tracked_values = {}
+        self._tracked_values.update({name: self.__dict__[name] for name in self.tracked_fields if name in written})
+
+    def saved_values(self):
+        """{attname: value in the database} for the tracked fields, None when not all of them are known"""
+        values = getattr(self, '_tracked_values', None)
+        if self._state.adding or values is None or len(values) != len(self.tracked_fields):
+            return None
+        return dict(values)
+
+    def changed_fields(self):
+        """Tracked fields this save changes; all of them when the saved values aren't known"""
+        saved = self.saved_values()
+        if saved is None:
+            return set(self.tracked_fields)
+        return {name for name, value in saved.items() if self.__dict__.get(name) != value}
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._remember_tracked(fields)
+
+    def save(self, *args, **kwargs):
+        # post_save handlers have seen the saved values by the time this returns
+        super().save(*args, **kwargs)
+        self._remember_tracked(kwargs.get('update_fields'))
+
+
+def checked_save(instance, write, *args, **kwargs):
+    """
+    Save without full_clean()'s queries: field values are checked in Python
+    (clean_fields() and the model's clean_values()) and foreign keys, unique
+    fields and constraints are left to the database. When anything fails,
+    full_clean() runs after all so the caller gets the ValidationError it
+    always got; a failure full_clean() can't explain is re-raised as it is.
+    """
+    relations = [field.name for field in instance._meta.concrete_fields if field.is_relation]
+    try:
+        instance.clean_fields(exclude=relations)
+        instance.clean_values()
+        with transaction.atomic():
+            write(*args, **kwargs)
+    except (ValidationError, IntegrityError):
+        instance.full_clean()
+        raise
+
+
+def count_subquery(queryset, group_by, field):
+    """Correlated COUNT(DISTINCT field) over queryset grouped by group_by, 0 when there are no rows"""
+    counts = queryset.order_by().values(group_by).annotate(total=Count(field, distinct=True)).values('total')
+    return Coalesce(Subquery(counts, output_field=models.IntegerField()), Value(0))
+
+
 # ------------------------------
 # FlatBuilding Model
 # ------------------------------
+class FlatBuildingQuerySet(models.QuerySet):
+    def with_occupancy(self):
+        """
+        Annotate occupied_count, vacant_count, active_tenant_count and rent_roll
+        (rent of the occupied houses) in the same query as the buildings.
+        """
+        active_tenants = Tenant.objects.filter(house__flat_building=OuterRef('pk'), is_active=True)
+        occupied = Q(houses__occupation=True)
+        return self.annotate(
+            occupied_count=Count('houses', filter=occupied),
+            rent_roll=Coalesce(Sum('houses__house_rent_amount', filter=occupied), Value(Decimal('0')), output_field=MONEY),
+            active_tenant_count=count_subquery(active_tenants, 'house__flat_building', 'house'),
+        ).annotate(
+            vacant_count=F('number_of_houses') - F('occupied_count'),
+        )
+
+
 class FlatBuilding(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, blank=True, null=True)
     building_name = models.CharField(max_length=50)
     address = models.CharField(max_length=50)
     number_of_houses = models.IntegerField(default=0, db_index=True)
+    # houses in the building, kept by House.save(), the house post_delete signal and bulk inserts
+    house_count = models.IntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = FlatBuildingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'updated_at'], name='flat_user_updated_idx')]
 
     @property
     def how_many_occupied(self):
-        return self.get_occupied_count()
+        return self.occupied_count
 
     @property
     def vacant_houses(self):
-        return self.get_vacant_count()
+        return self.vacant_count
 
     
     def tenant_count(self):
+        return self.active_tenant_count
+
+    @annotatable
+    def occupied_count(self):
+        return self.houses.filter(occupation=True).count()
+
+    @annotatable
+    def vacant_count(self):
+        return self.number_of_houses - self.occupied_count
+
+    @annotatable
+    def active_tenant_count(self):
         return self.houses.filter(tenants__is_active=True).distinct().count()
 
+    @annotatable
+    def rent_roll(self):
+        """Monthly rent of the occupied houses"""
+        return self.houses.filter(occupation=True).aggregate(
+            total=Coalesce(Sum('house_rent_amount'), Value(Decimal('0')), output_field=MONEY)
+        )['total']
+
     def clean(self):
         if self.number_of_houses < 0:
             raise ValidationError("Number of houses must be non-negative")
@@ -42,11 +190,10 @@ class FlatBuilding(models.Model):
         super().delete(*args, **kwargs)
 
     def get_occupied_count(self):
-        occupied = self.houses.filter(occupation=True).count()
-        return occupied
+        return self.occupied_count
 
     def get_vacant_count(self):
-        return self.number_of_houses - self.get_occupied_count()
+        return self.vacant_count
 
     def __str__(self):
         return self.building_name
@@ -55,7 +202,7 @@ class FlatBuilding(models.Model):
 # ------------------------------
 # House Model
 # ------------------------------
-class House(models.Model):
+class House(TrackedFieldsMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, blank=True, null=True, db_index=True)
     flat_building = models.ForeignKey(FlatBuilding, related_name='houses', on_delete=models.CASCADE, db_index=True)
     house_number = models.CharField(max_length=5, db_index=True)
@@ -63,23 +210,31 @@ class House(models.Model):
     house_rent_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_index=True)
     deposit_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0, db_index=True)
     occupation = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # building stats and the buildings' house_count follow these
+    tracked_fields = ('flat_building_id', 'occupation', 'house_rent_amount')
 
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=['flat_building', 'house_number'], name='unique_house_per_building')
         ]
+        indexes = [models.Index(fields=['user', 'updated_at'], name='house_user_updated_idx')]
     
     def auto_change_occupation(self):   
         is_occupied = self.tenants.filter(is_active=True).exists()
         if self.occupation != is_occupied:
             self.occupation = is_occupied
-            self.save()
+            self.save(update_fields=['occupation', 'updated_at'])
 
-    def clean(self):
+    def clean_values(self):
         if not self.flat_building_id:
             raise ValidationError("House must be associated with a flat building")
         if self.house_rent_amount < 0 or self.deposit_amount < 0:
             raise ValidationError("Rent and deposit must be non-negative")
+
+    def clean(self):
+        self.clean_values()
         if self.flat_building.houses.exclude(pk=self.pk).filter(house_number=self.house_number).exists():
             raise ValidationError(f"House number {self.house_number} already exists in {self.flat_building.building_name}")
         # ensure number of houses in building is not exceeded
@@ -87,12 +242,30 @@ class House(models.Model):
             current_house_count = self.flat_building.houses.count()
             if current_house_count >= self.flat_building.number_of_houses:
                 raise ValidationError(f"Cannot add more houses to {self.flat_building.building_name}. Limit reached.")
-        
 
-    def save(self, *args, **kwargs):
-        self.full_clean()
+    def _save_counted(self, *args, **kwargs):
+        buildings = FlatBuilding.objects.all()
+        if self._state.adding:
+            # takes a place in the building, if there is one, in the same statement that checks for it;
+            # the UPDATE holds the building row until the house is inserted
+            has_room = buildings.filter(pk=self.flat_building_id, house_count__lt=F('number_of_houses'))
+            if not has_room.update(house_count=F('house_count') + 1):
+                raise ValidationError({NON_FIELD_ERRORS: [
+                    f"Cannot add more houses to {self.flat_building.building_name}. Limit reached."
+                ]})
+        elif 'flat_building_id' in self.changed_fields():
+            previous = (self.saved_values() or {}).get('flat_building_id')
+            if previous is None:
+                previous = House.objects.filter(pk=self.pk).values_list('flat_building_id', flat=True).first()
+            if previous and previous != self.flat_building_id:
+                buildings.filter(pk=previous).update(house_count=F('house_count') - 1)
+                buildings.filter(pk=self.flat_building_id).update(house_count=F('house_count') + 1)
         super().save(*args, **kwargs)
 
+    def save(self, *args, **kwargs):
+        # unique_house_per_building and the building's house_count do the checking, see checked_save
+        checked_save(self, self._save_counted, *args, **kwargs)
+
     def __str__(self):
         return f"{self.flat_building.building_name} - House {self.house_number}"
 
@@ -100,7 +273,20 @@ class House(models.Model):
 # ------------------------------
 # Tenant Model
 # ------------------------------
-class Tenant(models.Model):
+class TenantQuerySet(models.QuerySet):
+    def with_balances(self):
+        """Annotate total_due, total_paid and balance so list pages don't aggregate per row"""
+        charges = RentCharge.objects.filter(tenant=OuterRef('pk'))
+        payments = Payment.objects.filter(tenant=OuterRef('pk'))
+        return self.annotate(
+            total_due=total_subquery(charges, 'tenant', 'amount_due'),
+            total_paid=total_subquery(payments, 'tenant', 'amount'),
+        ).annotate(
+            balance=ExpressionWrapper(F('total_due') - F('total_paid'), output_field=MONEY),
+        )
+
+
+class Tenant(TrackedFieldsMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, blank=True, null=True, db_index=True)
     full_name = models.CharField(max_length=50, db_index=True)
     email = models.EmailField(unique=True, db_index=True)
@@ -114,7 +300,19 @@ class Tenant(models.Model):
     last_notification_sent = models.DateTimeField(blank=True, null=True)
     reminder_days_before = models.IntegerField(default=3, db_index=True)
     last_reminder_sent = models.DateTimeField(blank=True, null=True)
-    
+    # also moved when the balance changes (TenantLedger.bump), so delta sync resends it
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # occupancy follows house_id/is_active, the search index the rest
+    tracked_fields = ('house_id', 'is_active', 'full_name', 'email', 'phone', 'id_number')
+
+    objects = TenantQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['house'], condition=Q(is_active=True), name='one_active_tenant_per_house')
+        ]
+        indexes = [models.Index(fields=['user', 'updated_at'], name='tenant_user_updated_idx')]
 
     @property
     def building_name(self):
@@ -132,33 +330,90 @@ class Tenant(models.Model):
     def security_deposit(self):
         return self.house.deposit_amount if self.house else 0
 
-    @property
+    @annotatable
     def balance(self):
-        total_due = self.rent_charges.aggregate(total=Sum('amount_due'))['total'] or 0
-        total_paid = self.payments.aggregate(total=Sum('amount'))['total'] or 0
-        return total_due - total_paid
-
-    def clean(self):
-        if self.house and self.house.tenants.exclude(pk=self.pk).filter(is_active=True).exists():
-            raise ValidationError(f"House {self.house} is already occupied by another tenant.")
+        try:
+            return self.ledger.balance
+        except TenantLedger.DoesNotExist:
+            # no ledger row yet (e.g. unsaved tenant) - fall back to the live totals
+            total_due = self.rent_charges.aggregate(total=Sum('amount_due'))['total'] or 0
+            total_paid = self.payments.aggregate(total=Sum('amount'))['total'] or 0
+            return total_due - total_paid
+
+    def clean_values(self):
         if not self.full_name:
             raise ValidationError("Tenant full name is required")
         if not self.phone:
             raise ValidationError("Phone number is required")
+
+    def clean(self):
+        # only active tenants occupy a house, as one_active_tenant_per_house has it
+        if self.is_active and self.house and self.house.tenants.exclude(pk=self.pk).filter(is_active=True).exists():
+            raise ValidationError(f"House {self.house} is already occupied by another tenant.")
+        self.clean_values()
         if self.id_number and Tenant.objects.exclude(pk=self.pk).filter(id_number=self.id_number).exists():
             raise ValidationError(f"ID number {self.id_number} is already in use")
 
+    def validate_constraints(self, exclude=None):
+        # clean() already reports an occupied house, by name
+        super().validate_constraints(exclude={*(exclude or ()), 'house'})
+
     def save(self, *args, **kwargs):
-        self.full_clean()
-        super().save(*args, **kwargs)
+        # one_active_tenant_per_house and the unique fields do the checking, see checked_save;
+        # the tenant row and its ledger row (created by a post_save signal) are written together
+        checked_save(self, super().save, *args, **kwargs)
 
     def __str__(self):
         return self.full_name
 
+
+# ------------------------------
+# TenantLedger Model (denormalized balance)
+# ------------------------------
+class TenantLedger(models.Model):
+    """
+    Running totals for a tenant, kept in step with RentCharge and Payment
+    writes by the ledger signals so balances can be read without aggregating.
+    Rebuild with `python manage.py rebuild_ledger`.
+    """
+    tenant = models.OneToOneField(Tenant, on_delete=models.CASCADE, related_name='ledger', primary_key=True)
+    total_due = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    total_paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    @property
+    def balance(self):
+        return self.total_due - self.total_paid
+
+    @classmethod
+    def bump(cls, tenant_id, due=0, paid=0):
+        """Apply a delta to a tenant's totals with a single UPDATE"""
+        if not tenant_id or (not due and not paid):
+            return
+        cls.objects.filter(tenant_id=tenant_id).update(
+            total_due=F('total_due') + due,
+            total_paid=F('total_paid') + paid,
+        )
+        Tenant.objects.filter(pk=tenant_id).update(updated_at=timezone.now())
+
+    def __str__(self):
+        return f"Ledger for {self.tenant_id}: {self.balance}"
+
 # ------------------------------
 # RentCharge Model (Obligation)
 # ------------------------------
-class RentCharge(models.Model):
+class RentChargeQuerySet(models.QuerySet):
+    def with_payment_totals(self):
+        """Annotate total_paid, balance and is_paid from the payments table in the same query"""
+        payments = Payment.objects.filter(rent_charge=OuterRef('pk'))
+        return self.annotate(
+            total_paid=total_subquery(payments, 'rent_charge', 'amount'),
+        ).annotate(
+            balance=ExpressionWrapper(F('amount_due') - F('total_paid'), output_field=MONEY),
+            is_paid=ExpressionWrapper(Q(amount_due__lte=F('total_paid')), output_field=models.BooleanField()),
+        )
+
+
+class RentCharge(TrackedFieldsMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, blank=True, null=True, db_index=True)
     MONTH_CHOICES = [
         (1, 'January'), (2, 'February'), (3, 'March'), (4, 'April'),
@@ -169,27 +424,37 @@ class RentCharge(models.Model):
     year = models.IntegerField()
     month = models.IntegerField(choices=MONTH_CHOICES)
     amount_due = models.DecimalField(max_digits=10, decimal_places=2)
+    # denormalized sum of payments against this charge, maintained by the ledger signals
+    amount_paid = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
     reminder_sent = models.BooleanField(default=False)
-   
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # what the ledger signals need to move the totals on an edit
+    tracked_fields = ('tenant_id', 'amount_due')
+
+    objects = RentChargeQuerySet.as_manager()
 
     class Meta:
         unique_together = ("tenant", "year", "month")
+        indexes = [models.Index(fields=['user', 'updated_at'], name='charge_user_updated_idx')]
 
     def save(self, *args, **kwargs):
         # auto-set amount_due from tenant's house
         if self.amount_due is None and self.tenant and self.tenant.house:
             self.amount_due = self.tenant.house.house_rent_amount
-        super().save(*args, **kwargs)
+        # the ledger update runs in post_save, inside the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
-    @property
+    @annotatable
     def total_paid(self):
-        return self.payments.aggregate(total=Sum("amount"))["total"] or 0
+        return self.amount_paid
 
-    @property
+    @annotatable
     def balance(self):
         return self.amount_due - self.total_paid
 
-    @property
+    @annotatable
     def is_paid(self):
         return self.balance <= 0
 
@@ -200,7 +465,7 @@ class RentCharge(models.Model):
 # ------------------------------
 # Payment Model (Ledger)
 # ------------------------------
-class Payment(models.Model):
+class Payment(TrackedFieldsMixin, models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, blank=True, null=True, db_index=True)
     PAYMENT_METHODS = [
         ('cash', 'Cash'),
@@ -215,6 +480,12 @@ class Payment(models.Model):
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHODS)
     payment_reference = models.TextField(blank=True, null=True)
     paid_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    tracked_fields = ('tenant_id', 'rent_charge_id', 'amount')
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'updated_at'], name='payment_user_updated_idx')]
 
     def clean(self):
         super().clean()
@@ -228,7 +499,78 @@ class Payment(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()
-        super().save(*args, **kwargs)
+        # the ledger update runs in post_save, inside the same transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.amount} paid by {self.tenant.full_name} via {self.payment_method} on {self.paid_at.date()}"
+
+# ------------------------------
+# OutboxMessage Model (notification outbox)
+# ------------------------------
+class OutboxMessage(models.Model):
+    """
+    An SMS waiting to go out. Rows are written in the same transaction as the
+    change that triggered them and delivered after commit (see services/outbox.py),
+    so a rolled back payment never texts the tenant. idempotency_key makes
+    enqueueing the same notification twice a no-op.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+    KIND_CHOICES = [
+        ('rent_reminder', 'Rent reminder'),
+        ('payment_confirmation', 'Payment confirmation'),
+        ('welcome', 'Welcome message'),
+        ('overdue_notice', 'Overdue notice'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, blank=True, null=True, db_index=True)
+    kind = models.CharField(max_length=30, choices=KIND_CHOICES)
+    idempotency_key = models.CharField(max_length=100, unique=True)
+    tenant = models.ForeignKey(Tenant, on_delete=models.SET_NULL, blank=True, null=True, related_name='outbox_messages')
+    rent_charge = models.ForeignKey(RentCharge, on_delete=models.SET_NULL, blank=True, null=True, related_name='outbox_messages')
+    to_number = models.CharField(max_length=32)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING, db_index=True)
+    claim_token = models.UUIDField(blank=True, null=True, db_index=True)
+    # pending: earliest time to try again; sending: when the claim expires
+    next_attempt_at = models.DateTimeField(default=timezone.now, db_index=True)
+    attempts = models.IntegerField(default=0)
+    provider_sid = models.CharField(max_length=64, blank=True, null=True)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} to {self.to_number} ({self.status})"
+
+
+# ------------------------------
+# Tombstone Model (deletions for delta sync)
+# ------------------------------
+class Tombstone(models.Model):
+    """
+    A deleted building, house, tenant, rent charge or payment, written by a
+    post_delete signal so delta sync (services/sync.py) can tell clients to
+    drop it. Pruned after SYNC['TOMBSTONE_DAYS'].
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, blank=True, null=True)
+    # the sync resource name, e.g. 'tenants'
+    resource = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [models.Index(fields=['user', 'deleted_at'], name='tombstone_user_deleted_idx')]
 
     def __str__(self):
-        return f"{self.amount} paid by {self.tenant.full_name} via {self.payment_method} on {self.paid_at.date()}"
\ No newline at end of file
+        return f"{self.resource} {self.object_id} deleted {self.deleted_at}"
@@ -0,0 +1,165 @@
+"""
+Keyset (cursor) pagination for the large API lists.
+
+Pages are selected with WHERE (key, id) > (last key, last id) instead of an
+OFFSET, so page 1000 costs the same as page 1, and rows inserted while a
+client is paging don't shift it onto duplicates. The ordering key is the
+first field the queryset is ordered by (e.g. from OrderingFilter), with the
+primary key as tie-breaker.
+
+Counting is opt-in with ?count=:
+    none      no count (default), the list costs one query
+    exact     COUNT(*) over the filtered list
+    estimate  COUNT(*) over at most ESTIMATE_LIMIT rows; when the list is
+              longer the count is that limit and count_estimated is true
+"""
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+import base64
+import binascii
+import functools
+import json
+
+COUNT_MODES = ('none', 'exact', 'estimate')
+
+
+class KeysetPagination(BasePagination):
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    estimate_limit = 10000
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.key, descending = self.get_ordering(queryset)
+        cursor = self.decode_cursor(request, queryset.model)
+        self.count, self.count_estimated = self.get_count(queryset, request)
+
+        backwards = cursor is not None and cursor['previous']
+        # walking back to the previous page reads the ordering in reverse
+        reverse = descending != backwards
+        prefix = '-' if reverse else ''
+        ordering = [f'{prefix}pk'] if self.key == 'pk' else [f'{prefix}{self.key}', f'{prefix}pk']
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = queryset.filter(self.after(cursor, reverse))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if backwards:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.rows = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        response = {'next': self.get_next_link(), 'previous': self.get_previous_link()}
+        if self.count is not None:
+            response['count'] = self.count
+            response['count_estimated'] = self.count_estimated
+        response['results'] = data
+        return Response(response)
+
+    def get_page_size(self, request):
+        value = request.query_params.get(self.page_size_query_param)
+        if value is None:
+            return self.page_size
+        try:
+            size = int(value)
+        except ValueError:
+            raise ValidationError({self.page_size_query_param: 'A whole number is required.'})
+        if size < 1:
+            raise ValidationError({self.page_size_query_param: 'Must be at least 1.'})
+        return min(size, self.max_page_size)
+
+    def get_ordering(self, queryset):
+        """
+        (field, descending) for the keyset. Only a non-null concrete field of
+        the model can be compared row by row; anything else pages on the pk.
+        """
+        ordering = [str(field) for field in queryset.query.order_by]
+        if not ordering:
+            return 'pk', False
+        field, descending = ordering[0].lstrip('-'), ordering[0].startswith('-')
+        if field in ('pk', 'id'):
+            return 'pk', descending
+        try:
+            model_field = queryset.model._meta.get_field(field)
+        except FieldDoesNotExist:
+            return 'pk', False
+        if not model_field.concrete or model_field.null or model_field.is_relation:
+            return 'pk', False
+        return field, descending
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param, 'none')
+        if mode not in COUNT_MODES:
+            raise ValidationError({self.count_query_param: f"Choose one of: {', '.join(COUNT_MODES)}."})
+        if mode == 'exact':
+            return queryset.count(), False
+        if mode == 'estimate':
+            count = queryset.order_by()[:self.estimate_limit].count()
+            return count, count >= self.estimate_limit
+        return None, False
+
+    def after(self, cursor, reverse):
+        """Rows strictly past the cursor in the direction being read"""
+        op = 'lt' if reverse else 'gt'
+        if self.key == 'pk':
+            return Q(**{f'pk__{op}': cursor['pk']})
+        return Q(**{f'{self.key}__{op}': cursor['value']}) | Q(**{self.key: cursor['value'], f'pk__{op}': cursor['pk']})
+
+    # ------------------------------
+    # Cursors
+    # ------------------------------
+    def encode_cursor(self, row, previous):
+        # model instances, or dicts when the view pages a values() queryset
+        read = row.get if isinstance(row, dict) else functools.partial(getattr, row)
+        value = None if self.key == 'pk' else read(self.key)
+        payload = json.dumps([self.key, value, read('pk'), previous], cls=DjangoJSONEncoder)
+        encoded = base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            key, value, pk, previous = json.loads(base64.urlsafe_b64decode(encoded.encode('ascii')))
+            # a cursor from a differently ordered list would skip or repeat rows
+            if key != self.key:
+                raise ValueError(key)
+            # tampered values must not reach the query
+            pk = model._meta.pk.to_python(pk)
+            if self.key != 'pk':
+                value = model._meta.get_field(self.key).to_python(value)
+            if pk is None or (self.key != 'pk' and value is None):
+                raise ValueError(encoded)
+        except (ValueError, TypeError, binascii.Error, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return {'value': value, 'pk': pk, 'previous': bool(previous)}
+
+    def get_next_link(self):
+        if not self.has_next or not self.rows:
+            return None
+        return self.encode_cursor(self.rows[-1], previous=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.rows:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.rows[0], previous=True)
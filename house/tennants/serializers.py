@@ -2,23 +2,342 @@ from rest_framework import serializers
 from .models import Tenant, House, Payment, FlatBuilding, RentCharge
 from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import CharField, ExpressionWrapper, F, Prefetch
+from django.utils import timezone
+from phonenumber_field.modelfields import PhoneNumberField
+from rest_framework import ISO_8601
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework.validators import UniqueValidator
+import datetime
+import decimal
+import functools
 
 User = get_user_model()
 
 
+# ------------------------------
+# Sparse fieldsets and expansion
+# ------------------------------
+def split_param(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
 
 
+def requested_fields(request):
+    """(fields, expand) from ?fields=a,b&expand=house,house.flat_building; reads only"""
+    if request is None or request.method != 'GET':
+        return None, []
+    return split_param(request.query_params.get('fields')) or None, split_param(request.query_params.get('expand'))
 
-class TenantSerializer(serializers.ModelSerializer):
+
+def group_expansions(expand):
+    """['house', 'house.flat_building', 'tenant'] -> {'house': ['flat_building'], 'tenant': []}"""
+    grouped = {}
+    for path in expand:
+        name, _, rest = path.partition('.')
+        grouped.setdefault(name, [])
+        if rest:
+            grouped[name].append(rest)
+    return grouped
+
+
+class DynamicFieldsMixin:
+    """
+    ?fields= trims the output to the named fields and ?expand= replaces related
+    ids with nested objects, using the serializers listed in expandable_fields.
+    Dotted paths expand further down (house.flat_building). plan_queryset()
+    turns the same parameters into only(), select_related() and
+    prefetch_related() so an expanded page costs a fixed number of queries.
+    """
+    # field -> (serializer class name, cache resource the nested data comes from)
+    expandable_fields = {}
+    # queryset method the serializer needs when it is nested, e.g. 'with_balances'
+    expand_queryset = None
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is None and expand is None:
+            # top level serializer: take them from the request, nested ones get them passed
+            fields, expand = requested_fields(self.context.get('request'))
+
+        model = self.Meta.model
+        for name, nested in self.expansions(expand or []).items():
+            serializer_class, _ = self.expandable_fields[name]
+            many = model._meta.get_field(name).one_to_many
+            self.fields[name] = globals()[serializer_class](many=many, read_only=True, expand=nested, context=self.context)
+
+        if fields:
+            keep = set(fields) | set(group_expansions(expand or []))
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+    @classmethod
+    def expansions(cls, expand):
+        grouped = group_expansions(expand)
+        unknown = set(grouped) - set(cls.expandable_fields)
+        if unknown:
+            raise serializers.ValidationError({
+                'expand': f"Cannot expand {', '.join(sorted(unknown))}. Choose from: {', '.join(cls.expandable_fields) or 'nothing'}."
+            })
+        return grouped
+
+    @classmethod
+    def expansion_resources(cls, expand):
+        """Cache resources the expanded objects are built from, so their writes invalidate the page"""
+        resources = []
+        for name, nested in cls.expansions(expand).items():
+            serializer_class, resource = cls.expandable_fields[name]
+            resources.append(resource)
+            resources.extend(globals()[serializer_class].expansion_resources(nested))
+        return resources
+
+    @classmethod
+    def plan_queryset(cls, queryset, request):
+        """Apply the request's fields and expansions to the queryset"""
+        fields, expand = requested_fields(request)
+        select, prefetch = cls.plan_related(expand)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if fields:
+            # foreign keys being followed and the ordering (read for pagination cursors) stay loaded
+            lookups = select + [getattr(lookup, 'prefetch_through', lookup) for lookup in prefetch]
+            names = set(fields) | {lookup.split('__')[0] for lookup in lookups}
+            names |= {str(name).lstrip('-') for name in queryset.query.order_by}
+            columns = {'pk'}
+            for name in names:
+                try:
+                    field = queryset.model._meta.get_field(name)
+                except FieldDoesNotExist:
+                    continue  # a property or annotation
+                if field.concrete and not field.many_to_many:
+                    columns.add(name)
+            queryset = queryset.only(*columns)
+        return queryset
+
+    @classmethod
+    def plan_related(cls, expand, prefix='', prefetching=False):
+        """
+        Lookups for the expansions: forward relations are joined with
+        select_related until a relation needs its own queryset (reverse
+        relations, or serializers with expand_queryset); from there on
+        everything below is prefetched.
+        """
+        select, prefetch = [], []
+        model = cls.Meta.model
+        for name, nested in cls.expansions(expand).items():
+            serializer_class = globals()[cls.expandable_fields[name][0]]
+            lookup = f"{prefix}{name}"
+            field = model._meta.get_field(name)
+            if prefetching:
+                prefetch.append(lookup)
+                nested_prefetching = True
+            elif serializer_class.expand_queryset:
+                related_queryset = getattr(field.related_model.objects, serializer_class.expand_queryset)()
+                prefetch.append(Prefetch(lookup, queryset=related_queryset))
+                nested_prefetching = True
+            elif field.one_to_many or field.many_to_many:
+                prefetch.append(lookup)
+                nested_prefetching = True
+            else:
+                select.append(lookup)
+                nested_prefetching = False
+            nested_select, nested_prefetch = serializer_class.plan_related(nested, f"{lookup}__", nested_prefetching)
+            select += nested_select
+            prefetch += nested_prefetch
+        return select, prefetch
+
+
+# ------------------------------
+# Bulk rows
+# ------------------------------
+class BulkRowMixin:
+    """
+    Field-level validation of one row of a bulk payload without touching the
+    database: foreign keys are taken as plain ids and uniqueness is left to
+    the set-based checks in services/bulk.py.
+    """
+    def get_validators(self):
+        return []
+
+    def build_standard_field(self, field_name, model_field):
+        field_class, field_kwargs = super().build_standard_field(field_name, model_field)
+        field_kwargs['validators'] = [
+            validator for validator in field_kwargs.get('validators', []) if not isinstance(validator, UniqueValidator)
+        ]
+        return field_class, field_kwargs
+
+    def build_relational_field(self, field_name, relation_info):
+        model_field = relation_info.model_field
+        field_kwargs = {'source': model_field.attname}
+        if model_field.null or model_field.blank:
+            field_kwargs.update(required=False, allow_null=True)
+        return serializers.IntegerField, field_kwargs
+
+
+@functools.cache
+def bulk_row_serializer(serializer_class):
+    return type(f"Bulk{serializer_class.__name__}", (BulkRowMixin, serializer_class), {})
+
+
+# ------------------------------
+# Read path from values() rows
+# ------------------------------
+class ValuesRepresentation:
+    """
+    The read side of a serializer compiled against values() rows: the columns
+    to select and one converter per output field, so a list page is built
+    from plain dicts without model instances, field binding or attribute
+    lookups. represent(rows) gives the same data as serializer.data.
+    """
+    def __init__(self, fields, annotations, text_columns):
+        self.fields = fields  # (output name, column, converter or None for as-is)
+        self.annotations = annotations
+        # alias -> model field read as the stored text, skipping the field's from_db_value()
+        self.text_columns = text_columns
+        self.columns = list(dict.fromkeys(
+            ['pk', *(column for _, column, _ in fields if column not in text_columns)]
+        ))
+
+    def values(self, queryset):
+        """queryset.values() with everything represent() and the paginators read, or None if it can't be done"""
+        if not self.annotations <= set(queryset.query.annotations):
+            return None
+        ordering = [str(name).lstrip('-') for name in queryset.query.order_by]
+        columns = dict.fromkeys([*self.columns, *(name for name in ordering if name not in ('?', 'pk'))])
+        text = {alias: ExpressionWrapper(F(name), output_field=CharField()) for alias, name in self.text_columns.items()}
+        return queryset.values(*columns, **text)
+
+    def represent(self, rows):
+        fields = self.fields
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in fields:
+                value = row[column]
+                # like Serializer.to_representation, None skips the field's conversion
+                item[name] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
+
+
+@functools.lru_cache(maxsize=128)
+def values_representation(serializer_class, fields=None):
+    """
+    ValuesRepresentation of serializer_class trimmed to `fields` (a tuple, as
+    ?fields=), or None when one of its fields can't be read from a column:
+    nested serializers, method fields, dotted sources, related fields other
+    than primary keys.
+    """
+    serializer = serializer_class(fields=list(fields) if fields else None, expand=[])
+    model = serializer.Meta.model
+    compiled, annotations, text_columns = [], set(), {}
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField, serializers.SerializerMethodField)):
+            return None
+        if len(field.source_attrs) != 1:
+            return None
+        source = field.source_attrs[0]
+        try:
+            model_field = model._meta.get_field(source)
+        except FieldDoesNotExist:
+            model_field = None
+        if isinstance(field, serializers.RelatedField):
+            if not isinstance(field, serializers.PrimaryKeyRelatedField) or field.pk_field is not None or model_field is None:
+                return None
+            compiled.append((field.field_name, model_field.attname, None))  # the id is the representation
+            continue
+        if model_field is None:
+            annotations.add(source)  # e.g. balance from with_balances()
+        elif not model_field.concrete or model_field.is_relation:
+            return None
+        elif isinstance(model_field, PhoneNumberField) and _phone_text_is_representation(field):
+            # parsing every number back into a PhoneNumber only to print it again is most of a tenant row's cost
+            alias = f'{source}_as_text'
+            text_columns[alias] = source
+            compiled.append((field.field_name, alias, None))
+            continue
+        compiled.append((field.field_name, source, _converter(field)))
+    return ValuesRepresentation(tuple(compiled), annotations, text_columns)
+
+
+def _converter(field):
+    """
+    field.to_representation, or an equivalent with the field's settings
+    resolved up front for the types a values() row gives the common fields
+    """
+    to_representation = type(field).to_representation
+    if to_representation is serializers.CharField.to_representation:
+        return str
+    if to_representation is serializers.IntegerField.to_representation:
+        return int
+    if to_representation is serializers.BooleanField.to_representation:
+        return bool  # the database gives bools (or 0/1), which is where DRF ends up too
+
+    if to_representation is serializers.DecimalField.to_representation:
+        coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+        if not coerce_to_string or field.localize or field.normalize_output or field.decimal_places is None:
+            return field.to_representation
+        quantum = decimal.Decimal('.1') ** field.decimal_places
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        rounding = field.rounding
+
+        def convert_decimal(value):
+            if not isinstance(value, decimal.Decimal):
+                return field.to_representation(value)
+            return '{:f}'.format(value.quantize(quantum, rounding=rounding, context=context))
+        return convert_decimal
+
+    if to_representation is serializers.DateField.to_representation:
+        if getattr(field, 'format', api_settings.DATE_FORMAT) != ISO_8601:
+            return field.to_representation
+        return lambda value: value.isoformat()
+
+    if to_representation is serializers.DateTimeField.to_representation:
+        if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601 or hasattr(field, 'timezone') or not settings.USE_TZ:
+            return field.to_representation
+
+        def convert_datetime(value):
+            if not isinstance(value, datetime.datetime) or value.tzinfo is None:
+                return field.to_representation(value)
+            value = value.astimezone(timezone.get_current_timezone()).isoformat()
+            return value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return convert_datetime
+
+    return field.to_representation
+
+
+def _phone_text_is_representation(field):
+    """
+    Valid numbers are stored in PHONENUMBER_DB_FORMAT and printed in
+    PHONENUMBER_DEFAULT_FORMAT, invalid ones stored and printed as typed, so
+    the stored text is the output when both formats are the same.
+    """
+    same_format = getattr(settings, 'PHONENUMBER_DB_FORMAT', 'E164') == getattr(settings, 'PHONENUMBER_DEFAULT_FORMAT', 'E164')
+    return same_format and type(field).to_representation is serializers.CharField.to_representation
+
+
+class TenantSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    # read from Tenant.objects.with_balances() annotations when the view uses it
+    balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    expandable_fields = {'house': ('HouseSerializer', 'houses')}
+    expand_queryset = 'with_balances'
 
     class Meta:
         model = Tenant
         fields = '__all__'
 
-class HouseSerializer(serializers.ModelSerializer):
+class HouseSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    expandable_fields = {'flat_building': ('FlatBuildingSerializer', 'flats'), 'tenants': ('TenantSerializer', 'tenants')}
 
     class Meta:
         model = House
@@ -32,15 +351,17 @@ class HouseSerializer(serializers.ModelSerializer):
             )
         return attrs
     
-class FlatBuildingSerializer(serializers.ModelSerializer):
+class FlatBuildingSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    expandable_fields = {'houses': ('HouseSerializer', 'houses')}
 
     class Meta:
         model = FlatBuilding
-        fields = '__all__'
+        exclude = ['house_count']
 
-class PaymentSerializer(serializers.ModelSerializer):
+class PaymentSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    expandable_fields = {'tenant': ('TenantSerializer', 'tenants'), 'rent_charge': ('RentChargeSerializer', 'rent_charges')}
 
     class Meta:
         model = Payment
@@ -113,9 +434,47 @@ class AdminLoginSerializer(serializers.Serializer):
         data['refresh'] = str(refresh)
         return data
 
-class RentChargeSerializer(serializers.ModelSerializer):
+class RentChargeSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     user = serializers.HiddenField(default=serializers.CurrentUserDefault())
+    # read from RentCharge.objects.with_payment_totals() annotations when the view uses it
+    total_paid = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    balance = serializers.DecimalField(max_digits=12, decimal_places=2, read_only=True)
+    is_paid = serializers.BooleanField(read_only=True)
+    expandable_fields = {'tenant': ('TenantSerializer', 'tenants')}
+    expand_queryset = 'with_payment_totals'
 
     class Meta:
         model = RentCharge
-        fields = '__all__'
\ No newline at end of file
+        fields = '__all__'
+
+class GenerateRentChargesSerializer(serializers.Serializer):
+    year = serializers.IntegerField(min_value=2000, max_value=2100)
+    month = serializers.ChoiceField(choices=RentCharge.MONTH_CHOICES)
+    # leave out to bill every active tenant of the landlord
+    tenant_ids = serializers.ListField(child=serializers.IntegerField(), required=False, allow_empty=False)
+    send_reminders = serializers.BooleanField(default=True)
+
+class ExportSerializer(serializers.Serializer):
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    building = serializers.IntegerField(required=False)
+    output = serializers.ChoiceField(choices=['csv', 'ndjson'], default='csv')
+
+    def validate(self, data):
+        if data.get('start') and data.get('end') and data['end'] < data['start']:
+            raise serializers.ValidationError("end is before start.")
+        return data
+
+class TenantSearchSerializer(serializers.Serializer):
+    q = serializers.CharField(max_length=100)
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=20)
+
+class SyncSerializer(serializers.Serializer):
+    cursor = serializers.CharField(required=False)
+    updated_since = serializers.DateTimeField(required=False)
+    limit = serializers.IntegerField(min_value=1, required=False)
+
+    def validate(self, data):
+        if data.get('cursor') and data.get('updated_since'):
+            raise serializers.ValidationError("Give either cursor or updated_since, not both.")
+        return data
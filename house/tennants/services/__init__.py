@@ -1,3 +1,4 @@
-from .sms import TwilioNotificationService
+from .sms import TwilioNotificationService, LocMemSMSClient
+from .dispatch import SMSDispatcher, SMSMessage
 
-__all__ = ['TwilioNotificationService']
\ No newline at end of file
+__all__ = ['TwilioNotificationService', 'LocMemSMSClient', 'SMSDispatcher', 'SMSMessage']
\ No newline at end of file
@@ -0,0 +1,193 @@
+from concurrent.futures import ProcessPoolExecutor
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection, connections, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from tennants.cache import invalidate
+from tennants.models import RentCharge, Tenant
+from .ledger import rebuild_ledger
+from .reminders import queue_reminders
+import logging
+import multiprocessing
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def billable_tenants(user):
+    """Active tenants of a landlord that live in a house"""
+    return Tenant.objects.filter(user=user, is_active=True, house__isnull=False)
+
+
+def generate_rent_charges(user, year, month, tenant_ids=None, send_reminders=True, update_ledger=True, batch_size=1000):
+    """
+    Bill a landlord's active tenants for one month, set-based:
+    one query loads tenant -> rent and whether they are already billed, one
+    bulk INSERT (conflicts on tenant/year/month ignored) creates the rest,
+    after locking those tenants and reading what was billed in the meantime.
+    bulk_create skips the model signals, so the ledger is rebuilt for the
+    billed tenants and reminders are queued as one batch afterwards.
+
+    Returns {'created': n, 'skipped': n, 'not_found': n}; not_found counts
+    requested tenant_ids that are not billable tenants of this landlord.
+    Pass update_ledger=False when billing several months and rebuild once at the end.
+    """
+    if month not in dict(RentCharge.MONTH_CHOICES):
+        # bulk_create skips full_clean, so check what it would have caught
+        raise ValidationError({'month': f"{month} is not a valid month"})
+
+    tenants = billable_tenants(user)
+    if tenant_ids is not None:
+        tenant_ids = set(tenant_ids)
+        tenants = tenants.filter(pk__in=tenant_ids)
+
+    already_billed = RentCharge.objects.filter(tenant=OuterRef('pk'), year=year, month=month)
+    rows = list(
+        tenants.annotate(already_billed=Exists(already_billed))
+        .values_list('pk', 'house__house_rent_amount', 'already_billed')
+    )
+    to_bill = {pk: rent for pk, rent, billed in rows if not billed}
+    counts = {
+        'created': 0,
+        'skipped': len(rows),
+        'not_found': len(tenant_ids) - len(rows) if tenant_ids is not None else 0,
+    }
+    if not to_bill:
+        return counts
+
+    with transaction.atomic():
+        # a concurrent run for the same tenants waits here for this one to commit (on databases
+        # with row locks), and whatever it billed before that is read back and left out
+        list(Tenant.objects.select_for_update().filter(pk__in=to_bill).values_list('pk', flat=True))
+        billed_meanwhile = set(
+            RentCharge.objects.filter(tenant_id__in=to_bill, year=year, month=month).values_list('tenant_id', flat=True)
+        )
+        billed = [pk for pk in to_bill if pk not in billed_meanwhile]
+        RentCharge.objects.bulk_create(
+            [
+                RentCharge(user=user, tenant_id=pk, year=year, month=month, amount_due=to_bill[pk])
+                for pk in billed
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        counts['created'] = len(billed)
+        counts['skipped'] = len(rows) - len(billed)
+        if update_ledger and billed:
+            rebuild_ledger(Tenant.objects.filter(pk__in=billed))
+
+        if send_reminders:
+            charges = (
+                RentCharge.objects.filter(tenant__in=tenants, year=year, month=month, reminder_sent=False)
+                .with_payment_totals()
+                .select_related('tenant__house__flat_building')
+            )
+            queue_reminders(charges)
+
+    # bulk_create skips the signals that normally drop the cached lists
+    invalidate(RentCharge, user.pk)
+    logger.info(f"Billed {counts['created']} tenant(s) of user {user.pk} for {month}/{year}, skipped {counts['skipped']}")
+    return counts
+
+
+# ------------------------------
+# Scheduled / backfill billing runs
+# ------------------------------
+def month_range(start, end):
+    """[(year, month), ...] from start to end inclusive, both given as (year, month)"""
+    (year, month), months = start, []
+    while (year, month) <= tuple(end):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def landlords_to_bill():
+    """Ids of users with at least one billable tenant"""
+    return list(
+        Tenant.objects.filter(is_active=True, house__isnull=False, user__isnull=False)
+        .order_by('user_id')
+        .values_list('user_id', flat=True)
+        .distinct()
+    )
+
+
+def bill_landlord(user_id, months, send_reminders=True):
+    """
+    Bill one landlord for every (year, month) in one transaction and rebuild
+    their ledger once. Reminders are only queued for the current month, a
+    backfill must not text tenants about last year's rent.
+    Returns {'user_id', 'created', 'skipped', 'elapsed'}; a landlord deleted
+    since the run started is logged and skipped.
+    """
+    started = time.monotonic()
+    today = timezone.now().date()
+    result = {'user_id': user_id, 'created': 0, 'skipped': 0}
+    try:
+        user = User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        logger.warning(f"Skipping billing for user {user_id}: no such user")
+        result['elapsed'] = time.monotonic() - started
+        return result
+    with transaction.atomic():
+        for year, month in months:
+            counts = generate_rent_charges(
+                user, year, month,
+                send_reminders=send_reminders and (year, month) == (today.year, today.month),
+                update_ledger=False,
+            )
+            result['created'] += counts['created']
+            result['skipped'] += counts['skipped']
+        rebuild_ledger(billable_tenants(user))
+    result['elapsed'] = time.monotonic() - started
+    return result
+
+
+def _bill_landlord_in_worker(args):
+    # each worker process opens its own database connection on first use
+    return bill_landlord(*args)
+
+
+def run_billing(months, user_ids=None, processes=1, send_reminders=True, progress=None):
+    """
+    Bill every landlord (or just user_ids) for the given months, one shard per
+    landlord, spread over `processes` worker processes. Each landlord commits
+    on its own and existing charges are skipped through the unique
+    (tenant, year, month) key, so an interrupted run is resumed by running it again.
+    `progress(done, total, result)` is called as each landlord finishes.
+    Returns {'landlords', 'created', 'skipped', 'elapsed', 'rate'}.
+    """
+    started = time.monotonic()
+    user_ids = landlords_to_bill() if user_ids is None else list(user_ids)
+    if processes > 1 and connection.vendor == 'sqlite':
+        logger.warning("SQLite allows a single writer, billing in one process")
+        processes = 1
+
+    if processes > 1:
+        # forked children must not share the parent's open connections
+        connections.close_all()
+        pool = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('fork'))
+        results = pool.map(_bill_landlord_in_worker, [(user_id, months, send_reminders) for user_id in user_ids])
+    else:
+        pool = None
+        results = (bill_landlord(user_id, months, send_reminders) for user_id in user_ids)
+
+    summary = {'landlords': len(user_ids), 'created': 0, 'skipped': 0}
+    try:
+        for done, result in enumerate(results, 1):
+            summary['created'] += result['created']
+            summary['skipped'] += result['skipped']
+            if progress:
+                progress(done, len(user_ids), result)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    summary['elapsed'] = time.monotonic() - started
+    summary['rate'] = summary['created'] / summary['elapsed'] if summary['elapsed'] else 0.0
+    logger.info(
+        f"Billing run for {len(months)} month(s): {summary['created']} created, {summary['skipped']} skipped "
+        f"across {summary['landlords']} landlord(s) in {summary['elapsed']:.1f}s"
+    )
+    return summary
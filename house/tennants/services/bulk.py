@@ -0,0 +1,276 @@
+"""
+Set-based validation and inserts for the bulk API endpoints.
+
+Every resource has a validate_* function that checks a whole batch of rows
+(already field-validated by serializers.BulkRowMixin) with a couple of
+queries and returns {row index: {field: [message]}}, and a create_* function
+that inserts the rows with bulk_create and then does in one pass what the
+per-row signals would have done: ledger rows, house occupancy, building
+stats, outbox messages, the search index and cache invalidation.
+
+bulk_create has to hand back primary keys (SQLite, PostgreSQL, MariaDB),
+they key the outbox messages.
+"""
+from collections import Counter
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Exists, F, IntegerField, OuterRef, Q, Value, When
+from django.utils import timezone
+from rest_framework.settings import api_settings
+from tennants.cache import invalidate
+from tennants.models import FlatBuilding, House, OutboxMessage, Payment, RentCharge, Tenant, TenantLedger
+from . import outbox, search
+from .ledger import rebuild_ledger
+from .occupancy import clear_building_stats
+from .sms import TwilioNotificationService
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_ROWS = 1000
+BATCH_SIZE = 1000
+NON_FIELD = api_settings.NON_FIELD_ERRORS_KEY
+
+
+def _add_error(errors, index, message, field=NON_FIELD):
+    errors.setdefault(index, {}).setdefault(field, []).append(message)
+
+
+# ------------------------------
+# Buildings
+# ------------------------------
+def validate_buildings(user, rows):
+    errors = {}
+    for index, row in rows.items():
+        if row.get('number_of_houses', 0) < 0:
+            _add_error(errors, index, "Number of houses must be non-negative", 'number_of_houses')
+    return errors
+
+
+def create_buildings(user, rows, batch_size=BATCH_SIZE):
+    with transaction.atomic():
+        buildings = FlatBuilding.objects.bulk_create([FlatBuilding(**{**row, 'user': user}) for row in rows], batch_size=batch_size)
+    invalidate(FlatBuilding, user.pk)
+    return buildings
+
+
+# ------------------------------
+# Houses
+# ------------------------------
+def validate_houses(user, rows):
+    """Same rules as House.clean(), for the whole batch in two queries"""
+    errors = {}
+    building_ids = {row['flat_building_id'] for row in rows.values()}
+    buildings = FlatBuilding.objects.filter(user=user, pk__in=building_ids).in_bulk()
+    taken = set(House.objects.filter(flat_building__in=buildings).values_list('flat_building_id', 'house_number'))
+    added = Counter()
+
+    for index, row in rows.items():
+        building = buildings.get(row['flat_building_id'])
+        if building is None:
+            _add_error(errors, index, "Flat building not found", 'flat_building')
+            continue
+        if row.get('house_rent_amount', 0) < 0 or row.get('deposit_amount', 0) < 0:
+            _add_error(errors, index, "Rent and deposit must be non-negative")
+        key = (building.pk, row['house_number'])
+        if key in taken:
+            _add_error(errors, index, f"House number {row['house_number']} already exists in {building.building_name}", 'house_number')
+        taken.add(key)
+        if index in errors:
+            continue  # a rejected row doesn't take up a place in the building
+        added[building.pk] += 1
+        if building.house_count + added[building.pk] > building.number_of_houses:
+            _add_error(errors, index, f"Cannot add more houses to {building.building_name}. Limit reached.", 'flat_building')
+    return errors
+
+
+def create_houses(user, rows, batch_size=BATCH_SIZE):
+    """
+    Insert validated house rows. Raises IntegrityError, with nothing written,
+    when a building filled up after validate_houses() read its house_count.
+    """
+    added = Counter(row['flat_building_id'] for row in rows)
+    with transaction.atomic():
+        # what House.save() does one at a time: take the places, only where the building still has them,
+        # in one UPDATE that holds the building rows until the houses are inserted
+        if added:
+            adding = Case(
+                *(When(pk=building_id, then=Value(count)) for building_id, count in added.items()),
+                output_field=IntegerField(),
+            )
+            has_room = FlatBuilding.objects.filter(pk__in=added, house_count__lte=F('number_of_houses') - adding)
+            if has_room.update(house_count=F('house_count') + adding) != len(added):
+                raise IntegrityError("A building filled up while its houses were being validated")
+        houses = House.objects.bulk_create([House(**{**row, 'user': user}) for row in rows], batch_size=batch_size)
+    for building_id in {house.flat_building_id for house in houses}:
+        clear_building_stats(building_id)
+    invalidate(House, user.pk)
+    return houses
+
+
+# ------------------------------
+# Tenants
+# ------------------------------
+UNIQUE_TENANT_FIELDS = ('email', 'phone', 'id_number')
+
+
+def check_unique_tenant_fields(rows, errors):
+    """
+    Add an error to every row of {key: row} whose email, phone or id_number
+    is taken by an existing tenant or by an earlier row, in one query.
+    """
+    values = {field: {str(row[field]) for row in rows.values() if row.get(field)} for field in UNIQUE_TENANT_FIELDS}
+    taken = {field: set() for field in UNIQUE_TENANT_FIELDS}
+    existing = Tenant.objects.filter(
+        Q(email__in=values['email']) | Q(phone__in=values['phone']) | Q(id_number__in=values['id_number'])
+    ).values_list(*UNIQUE_TENANT_FIELDS)
+    for tenant in existing:
+        for field, value in zip(UNIQUE_TENANT_FIELDS, tenant):
+            taken[field].add(str(value))
+
+    for key, row in rows.items():
+        for field in UNIQUE_TENANT_FIELDS:
+            value = row.get(field)
+            if not value:
+                continue
+            if str(value) in taken[field]:
+                _add_error(errors, key, f"A tenant with this {field.replace('_', ' ')} already exists.", field)
+            taken[field].add(str(value))
+    return errors
+
+
+def validate_tenants(user, rows):
+    """Same rules as Tenant.clean() and the unique fields, for the whole batch in two queries"""
+    errors = {}
+    house_ids = {row['house_id'] for row in rows.values() if row.get('house_id')}
+    occupied = Tenant.objects.filter(house=OuterRef('pk'), is_active=True)
+    houses = House.objects.filter(user=user, pk__in=house_ids).annotate(occupied=Exists(occupied)).in_bulk()
+    occupied_houses = {pk for pk, house in houses.items() if house.occupied}
+
+    for index, row in rows.items():
+        house_id = row.get('house_id')
+        if house_id:
+            house = houses.get(house_id)
+            if house is None:
+                _add_error(errors, index, "House not found", 'house')
+            elif row.get('is_active', True):
+                if house_id in occupied_houses:
+                    _add_error(errors, index, f"House {house.house_number} is already occupied by another tenant.", 'house')
+                occupied_houses.add(house_id)
+    return check_unique_tenant_fields(rows, errors)
+
+
+def create_tenants(user, rows, notifier=None, welcome=True, batch_size=BATCH_SIZE):
+    notifier = notifier or TwilioNotificationService()
+    with transaction.atomic():
+        tenants = Tenant.objects.bulk_create([Tenant(**{**row, 'user': user}) for row in rows], batch_size=batch_size)
+        TenantLedger.objects.bulk_create([TenantLedger(tenant=tenant) for tenant in tenants], batch_size=batch_size)
+        search.index_tenants(tenants)
+
+        houses = House.objects.filter(pk__in={t.house_id for t in tenants if t.house_id}).select_related('flat_building').in_bulk()
+        moved_in = {t.house_id for t in tenants if t.house_id and t.is_active}
+        House.objects.filter(pk__in=moved_in, occupation=False).update(occupation=True, updated_at=timezone.now())
+
+        messages = []
+        for tenant in tenants:
+            if tenant.house_id:
+                tenant.house = houses[tenant.house_id]
+            if welcome and tenant.house_id and tenant.is_active and tenant.sms_notifications:
+                messages.append(OutboxMessage(
+                    kind='welcome',
+                    idempotency_key=f"welcome:{tenant.pk}",
+                    to_number=str(tenant.phone),
+                    body=notifier._generate_welcome_message(tenant),
+                    user=user,
+                    tenant=tenant,
+                ))
+        outbox.enqueue_many(messages)
+
+    for building_id in {house.flat_building_id for house in houses.values()}:
+        clear_building_stats(building_id)
+    invalidate(Tenant, user.pk)
+    invalidate(House, user.pk)
+    return tenants
+
+
+# ------------------------------
+# Payments
+# ------------------------------
+def validate_payments(user, rows):
+    """Same rules as Payment.clean(), checking every charge belongs to the landlord, in one query"""
+    errors = {}
+    charge_ids = {row['rent_charge_id'] for row in rows.values()}
+    charges = RentCharge.objects.filter(user=user, pk__in=charge_ids).in_bulk()
+    for index, row in rows.items():
+        charge = charges.get(row['rent_charge_id'])
+        if charge is None:
+            _add_error(errors, index, "Rent charge not found", 'rent_charge')
+        elif charge.tenant_id != row['tenant_id']:
+            _add_error(errors, index, "Payment tenant must match rent charge tenant")
+        if row.get('payment_method') != 'cash' and not row.get('payment_reference'):
+            _add_error(errors, index, "Reference required for non-cash payments", 'payment_reference')
+    return errors
+
+
+def create_payments(user, rows, notifier=None):
+    notifier = notifier or TwilioNotificationService()
+    with transaction.atomic():
+        tenants = Tenant.objects.filter(pk__in={row['tenant_id'] for row in rows}).select_related('house').in_bulk()
+        payments = []
+        for row in rows:
+            payment = Payment(**{**row, 'user': user})
+            if not payment.amount:
+                # what the set_payment_amount signal does for single payments
+                house = tenants[payment.tenant_id].house
+                payment.amount = house.house_rent_amount if house else Decimal('0')
+            payments.append(payment)
+        payments = Payment.objects.bulk_create(payments)
+        rebuild_ledger(Tenant.objects.filter(pk__in=tenants))
+
+        # balances after the whole batch, read once
+        charges = RentCharge.objects.filter(pk__in={p.rent_charge_id for p in payments}).in_bulk()
+        messages = []
+        for payment in payments:
+            payment.tenant = tenants[payment.tenant_id]
+            payment.rent_charge = charges[payment.rent_charge_id]
+            if payment.tenant.sms_notifications:
+                messages.append(OutboxMessage(
+                    kind='payment_confirmation',
+                    idempotency_key=f"payment_confirmation:{payment.pk}",
+                    to_number=str(payment.tenant.phone),
+                    body=notifier._generate_payment_confirmation(payment),
+                    user=user,
+                    tenant=payment.tenant,
+                    rent_charge=payment.rent_charge,
+                ))
+        outbox.enqueue_many(messages)
+    invalidate(Payment, user.pk)
+    return payments
+
+
+RESOURCES = {
+    'flats': (validate_buildings, create_buildings),
+    'houses': (validate_houses, create_houses),
+    'tenants': (validate_tenants, create_tenants),
+    'payments': (validate_payments, create_payments),
+}
+
+
+def bulk_insert(user, resource, rows, errors=None):
+    """
+    Validate the whole batch and insert it only if every row passes.
+    `rows` maps the row's index in the payload to its field-validated data and
+    `errors` carries the field errors of the rows that didn't get that far,
+    so the caller gets every problem in the batch at once.
+    Returns (objects, errors); objects is empty when there are errors.
+    """
+    validate, create = RESOURCES[resource]
+    errors = dict(errors or {})
+    for index, row_errors in validate(user, rows).items():
+        for field, messages in row_errors.items():
+            errors.setdefault(index, {}).setdefault(field, []).extend(messages)
+    if errors:
+        return [], errors
+    objects = create(user, [rows[index] for index in sorted(rows)])
+    logger.info(f"Bulk created {len(objects)} {resource} for user={user.pk}")
+    return objects, {}
@@ -0,0 +1,66 @@
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.db.models import Count, F, OuterRef, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from tennants.cache import get_or_build
+from tennants.models import MONEY, FlatBuilding, House, RentCharge, Tenant, count_subquery, total_subquery
+
+
+def _money_sum(expression, condition):
+    return Coalesce(Sum(expression, filter=condition), Value(Decimal('0')), output_field=MONEY)
+
+
+def compute_snapshot(user, today=None):
+    """
+    Portfolio numbers for one landlord in two queries: one for the property
+    counts and one conditional aggregate over the rent charges.
+    """
+    today = today or timezone.now().date()
+
+    houses = House.objects.filter(user=OuterRef('pk'))
+    occupied = houses.filter(occupation=True)
+    portfolio = (
+        User.objects.filter(pk=user.pk)
+        .annotate(
+            total_buildings=count_subquery(FlatBuilding.objects.filter(user=OuterRef('pk')), 'user', 'pk'),
+            total_houses=count_subquery(houses, 'user', 'pk'),
+            occupied_houses=count_subquery(occupied, 'user', 'pk'),
+            active_tenants=count_subquery(Tenant.objects.filter(user=OuterRef('pk'), is_active=True), 'user', 'pk'),
+            rent_roll=total_subquery(occupied, 'user', 'house_rent_amount'),
+        )
+        .values('total_buildings', 'total_houses', 'occupied_houses', 'active_tenants', 'rent_roll')
+        .get()
+    )
+
+    this_month = Q(year=today.year, month=today.month)
+    past_months = Q(year__lt=today.year) | Q(year=today.year, month__lt=today.month)
+    in_arrears = past_months & Q(amount_due__gt=F('amount_paid'))
+    charges = RentCharge.objects.filter(user=user).aggregate(
+        billed_this_month=_money_sum('amount_due', this_month),
+        collected_this_month=_money_sum('amount_paid', this_month),
+        arrears=_money_sum(F('amount_due') - F('amount_paid'), in_arrears),
+        tenants_in_arrears=Count('tenant', filter=in_arrears, distinct=True),
+    )
+
+    total_houses = portfolio['total_houses']
+    snapshot = {
+        **portfolio,
+        'vacant_houses': total_houses - portfolio['occupied_houses'],
+        'percent_occupied': round(portfolio['occupied_houses'] / total_houses * 100, 2) if total_houses else 0.0,
+        **charges,
+        'outstanding_this_month': charges['billed_this_month'] - charges['collected_this_month'],
+        'month': f"{today:%Y-%m}",
+    }
+    return snapshot
+
+
+def dashboard_snapshot(user, today=None):
+    """
+    The cached snapshot, computed on a miss. Versioned by the "dashboard"
+    generation (see tennants.cache.DEPENDENCIES); the month is part of the key
+    so the snapshot rolls over by itself.
+    """
+    today = today or timezone.now().date()
+    snapshot, _ = get_or_build(user.pk, 'dashboard', f"{today:%Y-%m}", lambda: compute_snapshot(user, today))
+    return snapshot
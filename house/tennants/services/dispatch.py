@@ -0,0 +1,221 @@
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from django.conf import settings
+import itertools
+import json
+import logging
+import random
+import requests
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DISPATCH_DEFAULTS = {
+    'WORKERS': 8,
+    'RATE_PER_SECOND': 10,
+    'MAX_RETRIES': 2,
+    'BACKOFF': 0.5,
+}
+
+
+def dispatch_setting(name):
+    return getattr(settings, 'SMS_DISPATCH', {}).get(name, DISPATCH_DEFAULTS[name])
+
+
+@dataclass
+class SMSMessage:
+    to: str
+    body: str
+    reference: object = None  # e.g. the rent charge the message is about
+
+
+@dataclass
+class DispatchResult:
+    message: SMSMessage
+    success: bool
+    result: str  # provider SID on success, error text on failure
+    attempts: int
+    retryable: bool = True  # False when sending the message again can't help, or could deliver it twice
+
+
+@dataclass
+class DispatchReport:
+    results: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def sent(self):
+        return sum(1 for r in self.results if r.success)
+
+    @property
+    def failed(self):
+        return len(self.results) - self.sent
+
+    @property
+    def throughput(self):
+        """Messages handled per second"""
+        return len(self.results) / self.elapsed if self.elapsed else 0.0
+
+
+def is_transient(exc):
+    """
+    Whether a failed send is worth repeating: the provider was unreachable,
+    busy (5xx) or rate limiting (429). Other provider errors (an invalid
+    number, bad credentials) fail the same way every time, and after a read
+    timeout the provider may already have taken the message.
+    """
+    if isinstance(exc, requests.ReadTimeout):
+        return False
+    if isinstance(exc, (requests.ConnectionError, ConnectionError)):
+        return True
+    # HTTPError carries the response, Twilio's TwilioRestException the status
+    status = getattr(getattr(exc, 'response', None), 'status_code', None) or getattr(exc, 'status', None)
+    return isinstance(status, int) and (status == 429 or status >= 500)
+
+
+# ------------------------------
+# Transports
+# ------------------------------
+class TwilioTransport:
+    def __init__(self, client, from_number):
+        self.client = client
+        self.from_number = from_number
+
+    def send(self, to, body):
+        return self.client.messages.create(body=body, from_=self.from_number, to=str(to)).sid
+
+
+class HTTPTransport:
+    """POSTs {"to", "body"} as JSON and reads {"sid"} back, e.g. from FakeSMSServer"""
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        """One requests.Session per dispatcher thread, Session isn't thread-safe"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def send(self, to, body):
+        response = self.session.post(self.url, json={'to': str(to), 'body': body}, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()['sid']
+
+
+# ------------------------------
+# Dispatcher
+# ------------------------------
+class RateLimiter:
+    """Spaces calls out so no more than rate_per_second start in any second, across threads"""
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(self._next, now) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+class SMSDispatcher:
+    """
+    Sends a batch of messages through a transport with a bounded thread pool,
+    an optional per-second rate limit and retry with exponential backoff for
+    transient failures (see is_transient).
+    Settings default from settings.SMS_DISPATCH.
+    """
+    def __init__(self, transport, workers=None, rate_per_second=None, max_retries=None, backoff=None):
+        self.transport = transport
+        self.workers = workers or dispatch_setting('WORKERS')
+        rate = dispatch_setting('RATE_PER_SECOND') if rate_per_second is None else rate_per_second
+        self.rate_limiter = RateLimiter(rate) if rate else None
+        self.max_retries = dispatch_setting('MAX_RETRIES') if max_retries is None else max_retries
+        self.backoff = dispatch_setting('BACKOFF') if backoff is None else backoff
+
+    def _send_one(self, message):
+        attempts = 0
+        while True:
+            attempts += 1
+            if self.rate_limiter:
+                self.rate_limiter.acquire()
+            try:
+                sid = self.transport.send(message.to, message.body)
+                return DispatchResult(message, True, sid, attempts)
+            except Exception as e:
+                retryable = is_transient(e)
+                if not retryable or attempts > self.max_retries:
+                    logger.error(f"Failed to send SMS to {message.to} after {attempts} attempt(s): {e}")
+                    return DispatchResult(message, False, str(e), attempts, retryable)
+                time.sleep(self.backoff * (2 ** (attempts - 1)) * random.uniform(0.5, 1.5))
+
+    def dispatch(self, messages):
+        messages = list(messages)
+        started = time.monotonic()
+        if not messages:
+            return DispatchReport()
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(messages))) as pool:
+            results = list(pool.map(self._send_one, messages))
+        report = DispatchReport(results, time.monotonic() - started)
+        logger.info(
+            f"Dispatched {len(results)} SMS: {report.sent} sent, {report.failed} failed, "
+            f"{report.throughput:.1f} msg/s"
+        )
+        return report
+
+
+# ------------------------------
+# Local fake SMS server (load testing)
+# ------------------------------
+class FakeSMSServer:
+    """
+    Minimal HTTP endpoint that accepts HTTPTransport requests, waits `latency`
+    seconds to mimic the provider round trip and fails `failure_rate` of calls.
+    Use as a context manager; `url` is the endpoint to hand to HTTPTransport.
+    """
+    def __init__(self, latency=0.05, failure_rate=0.0, port=0):
+        counter = itertools.count(1)
+        received = self.received = []
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                time.sleep(latency)
+                if random.random() < failure_rate:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                received.append(payload)
+                body = json.dumps({'sid': f"FK{next(counter):08d}"}).encode()
+                self.send_response(201)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 256  # the default backlog of 5 drops connections under load
+
+        self.httpd = Server(('127.0.0.1', port), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/messages"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,149 @@
+"""
+Streaming exports of tenants, payments and rent charges as CSV or NDJSON.
+
+Rows come from a single values_list() query per export, balances included
+as annotations, read with .iterator() and written out one line at a time,
+so memory use doesn't depend on the size of the history. (MySQL's client
+still buffers the result set; SQLite and PostgreSQL fetch it in chunks.)
+"""
+from decimal import Decimal
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F, ExpressionWrapper
+from tennants.models import MONEY, Payment, RentCharge, Tenant
+import csv
+import json
+
+CHUNK_SIZE = 2000
+CENTS = Decimal('0.01')
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def tenant_rows(user, start=None, end=None, building=None):
+    queryset = Tenant.objects.filter(user=user).with_balances()
+    if start:
+        queryset = queryset.filter(created_at__date__gte=start)
+    if end:
+        queryset = queryset.filter(created_at__date__lte=end)
+    if building:
+        queryset = queryset.filter(house__flat_building_id=building)
+    return queryset, [
+        ('id', 'pk'),
+        ('full_name', 'full_name'),
+        ('email', 'email'),
+        ('phone', 'phone'),
+        ('id_number', 'id_number'),
+        ('building', 'house__flat_building__building_name'),
+        ('house_number', 'house__house_number'),
+        ('rent', 'house__house_rent_amount'),
+        ('is_active', 'is_active'),
+        ('rent_due_date', 'rent_due_date'),
+        ('created_at', 'created_at'),
+        ('total_due', 'total_due'),
+        ('total_paid', 'total_paid'),
+        ('balance', 'balance'),
+    ]
+
+
+def payment_rows(user, start=None, end=None, building=None):
+    queryset = Payment.objects.filter(user=user).annotate(
+        # from the charge's denormalized total, no aggregate per row
+        charge_balance=ExpressionWrapper(F('rent_charge__amount_due') - F('rent_charge__amount_paid'), output_field=MONEY),
+    )
+    if start:
+        queryset = queryset.filter(paid_at__date__gte=start)
+    if end:
+        queryset = queryset.filter(paid_at__date__lte=end)
+    if building:
+        queryset = queryset.filter(tenant__house__flat_building_id=building)
+    return queryset, [
+        ('id', 'pk'),
+        ('paid_at', 'paid_at'),
+        ('tenant_id', 'tenant_id'),
+        ('tenant', 'tenant__full_name'),
+        ('building', 'tenant__house__flat_building__building_name'),
+        ('house_number', 'tenant__house__house_number'),
+        ('rent_charge_id', 'rent_charge_id'),
+        ('year', 'rent_charge__year'),
+        ('month', 'rent_charge__month'),
+        ('amount', 'amount'),
+        ('payment_method', 'payment_method'),
+        ('payment_reference', 'payment_reference'),
+        ('charge_balance', 'charge_balance'),
+    ]
+
+
+def rent_charge_rows(user, start=None, end=None, building=None):
+    queryset = RentCharge.objects.filter(user=user).with_payment_totals()
+    # charges are dated by their month, compared as year * 12 + month
+    if start or end:
+        queryset = queryset.annotate(period=F('year') * 12 + F('month'))
+    if start:
+        queryset = queryset.filter(period__gte=start.year * 12 + start.month)
+    if end:
+        queryset = queryset.filter(period__lte=end.year * 12 + end.month)
+    if building:
+        queryset = queryset.filter(tenant__house__flat_building_id=building)
+    return queryset, [
+        ('id', 'pk'),
+        ('year', 'year'),
+        ('month', 'month'),
+        ('tenant_id', 'tenant_id'),
+        ('tenant', 'tenant__full_name'),
+        ('building', 'tenant__house__flat_building__building_name'),
+        ('house_number', 'tenant__house__house_number'),
+        ('amount_due', 'amount_due'),
+        ('total_paid', 'total_paid'),
+        ('balance', 'balance'),
+        ('is_paid', 'is_paid'),
+        ('reminder_sent', 'reminder_sent'),
+    ]
+
+
+EXPORTS = {
+    'tenants': tenant_rows,
+    'payments': payment_rows,
+    'rent_charges': rent_charge_rows,
+}
+
+
+def export_rows(user, resource, **filters):
+    """(header, row iterator) for one export; filters are start, end (dates) and building (id)"""
+    queryset, columns = EXPORTS[resource](user, **filters)
+    header = [name for name, _ in columns]
+    rows = queryset.order_by('pk').values_list(*[lookup for _, lookup in columns]).iterator(chunk_size=CHUNK_SIZE)
+    return header, (tuple(_cell(value) for value in row) for row in rows)
+
+
+def _cell(value):
+    # every decimal in the exports is money; computed ones come back from SQLite unscaled
+    return value.quantize(CENTS) if isinstance(value, Decimal) else value
+
+
+class _Line:
+    """File-like object whose write() just hands the line back to csv.writer's caller"""
+    def write(self, value):
+        return value
+
+
+class _Encoder(DjangoJSONEncoder):
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)  # e.g. PhoneNumber
+
+
+def stream_export(user, resource, output='csv', **filters):
+    """Generator of CSV or NDJSON lines for an export"""
+    header, rows = export_rows(user, resource, **filters)
+    if output == 'csv':
+        writer = csv.writer(_Line())
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(header, row)), cls=_Encoder) + '\n'
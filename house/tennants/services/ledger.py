@@ -0,0 +1,96 @@
+from django.db import transaction
+from django.db.models import Case, F, OuterRef, Q, Value, When
+from django.utils import timezone
+from tennants.cache import invalidate
+from tennants.models import Payment, RentCharge, Tenant, TenantLedger, total_subquery
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def rebuild_ledger(tenants=None, chunk_size=2000):
+    """
+    Recompute RentCharge.amount_paid and every TenantLedger row for the given
+    tenants (all tenants by default) straight from the payment history.
+    Returns (charges_updated, ledgers_written).
+    """
+    if tenants is None:
+        tenants = Tenant.objects.all()
+    tenant_ids = tenants.values('pk')
+
+    now = timezone.now()
+    with transaction.atomic():
+        payments = Payment.objects.filter(rent_charge=OuterRef('pk'))
+        paid = total_subquery(payments, 'rent_charge', 'amount')
+        charges_updated = RentCharge.objects.filter(tenant__in=tenant_ids).update(
+            amount_paid=paid,
+            # only the charges whose total moves count as changed for delta sync
+            updated_at=Case(When(~Q(amount_paid=paid), then=Value(now)), default=F('updated_at')),
+        )
+
+        rows = (
+            Tenant.objects.filter(pk__in=tenant_ids)
+            .with_balances()
+            .values_list('pk', 'total_due', 'total_paid', 'ledger__total_due', 'ledger__total_paid')
+            .iterator(chunk_size=chunk_size)
+        )
+        ledgers_written = 0
+        batch, changed = [], []
+        for tenant_id, due, paid, stored_due, stored_paid in rows:
+            batch.append(TenantLedger(tenant_id=tenant_id, total_due=due, total_paid=paid))
+            if (due, paid) != (stored_due, stored_paid):
+                changed.append(tenant_id)
+            if len(batch) >= chunk_size:
+                ledgers_written += _upsert_ledgers(batch, changed, now)
+                batch, changed = [], []
+        if batch:
+            ledgers_written += _upsert_ledgers(batch, changed, now)
+
+    # the UPDATE and upserts above skip the signals that drop cached balances
+    invalidate(Payment, *tenants.order_by().values_list('user_id', flat=True).distinct())
+    logger.info(f"Ledger rebuilt: {charges_updated} charges, {ledgers_written} tenants")
+    return charges_updated, ledgers_written
+
+
+def _upsert_ledgers(batch, changed, now):
+    TenantLedger.objects.bulk_create(
+        batch,
+        update_conflicts=True,
+        unique_fields=['tenant'],
+        update_fields=['total_due', 'total_paid'],
+    )
+    # a new balance is a change to the tenant as delta sync sees it
+    if changed:
+        Tenant.objects.filter(pk__in=changed).update(updated_at=now)
+    return len(batch)
+
+
+def verify_ledger(tenants=None):
+    """
+    Compare the stored totals with the payment history without writing anything.
+    Returns a dict with the drifted charge ids and tenant ids.
+    """
+    if tenants is None:
+        tenants = Tenant.objects.all()
+    tenant_ids = tenants.values('pk')
+
+    drifted_charges = (
+        RentCharge.objects.filter(tenant__in=tenant_ids)
+        .with_payment_totals()
+        .exclude(amount_paid=F('total_paid'))
+        .values_list('pk', flat=True)
+    )
+    drifted_tenants = (
+        Tenant.objects.filter(pk__in=tenant_ids)
+        .with_balances()
+        .filter(
+            Q(ledger__isnull=True)
+            | ~Q(ledger__total_due=F('total_due'))
+            | ~Q(ledger__total_paid=F('total_paid'))
+        )
+        .values_list('pk', flat=True)
+    )
+    return {
+        'charges': list(drifted_charges),
+        'tenants': list(drifted_tenants),
+    }
@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from tennants.cache import invalidate
+from tennants.models import FlatBuilding, House, Tenant
+import logging
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = getattr(settings, 'CACHE_TTL', 60 * 15)
+
+# stat name -> cache key template, cleared by signals.clear_building_cache
+BUILDING_STAT_KEYS = {
+    'occupied': 'flat_{id}_occupied',
+    'vacant': 'flat_{id}_vacant',
+    'tenant_count': 'flat_{id}_tenant_count',
+    'rent_roll': 'flat_{id}_rent_roll',
+}
+
+
+def building_stat_keys(building_id):
+    return [key.format(id=building_id) for key in BUILDING_STAT_KEYS.values()]
+
+
+def clear_building_stats(building_id):
+    cache.delete_many(building_stat_keys(building_id))
+
+
+def building_stats(buildings):
+    """
+    Occupancy stats for a queryset of buildings as a list of dicts.
+    Buildings whose stats are all cached cost nothing; the rest are computed
+    with one with_occupancy() query and written back to the cache.
+    """
+    rows = list(buildings.order_by('pk').values('pk', 'building_name', 'number_of_houses'))
+    keys = {row['pk']: dict(zip(BUILDING_STAT_KEYS, building_stat_keys(row['pk']))) for row in rows}
+    cached = cache.get_many([key for building_keys in keys.values() for key in building_keys.values()])
+
+    missing = [pk for pk, building_keys in keys.items() if not all(key in cached for key in building_keys.values())]
+    if missing:
+        fresh = {}
+        for building in FlatBuilding.objects.filter(pk__in=missing).with_occupancy().values(
+            'pk', 'occupied_count', 'vacant_count', 'active_tenant_count', 'rent_roll'
+        ):
+            values = {
+                'occupied': building['occupied_count'],
+                'vacant': building['vacant_count'],
+                'tenant_count': building['active_tenant_count'],
+                'rent_roll': building['rent_roll'],
+            }
+            fresh.update({keys[building['pk']][stat]: value for stat, value in values.items()})
+        cache.set_many(fresh, CACHE_TTL)
+        cached.update(fresh)
+
+    return [
+        {
+            'id': row['pk'],
+            'building_name': row['building_name'],
+            'number_of_houses': row['number_of_houses'],
+            **{stat: cached[key] for stat, key in keys[row['pk']].items()},
+        }
+        for row in rows
+    ]
+
+
+# ------------------------------
+# Repair
+# ------------------------------
+def recompute_occupancy(user=None, dry_run=False):
+    """
+    Set House.occupation to whether the house has an active tenant, and
+    FlatBuilding.house_count to the houses it has, for one landlord or all of
+    them, where signals were bypassed (QuerySet.update(), bulk_create, raw
+    deletes). Each is one UPDATE of just the rows that drifted, so it is safe
+    to run at any time. Returns {'houses': n, 'buildings': n} drifted rows.
+    """
+    houses = House.objects.all() if user is None else House.objects.filter(user=user)
+    buildings = FlatBuilding.objects.all() if user is None else FlatBuilding.objects.filter(user=user)
+    occupied = Exists(Tenant.objects.filter(house=OuterRef('pk'), is_active=True))
+    house_total = Coalesce(Subquery(
+        House.objects.filter(flat_building=OuterRef('pk')).order_by().values('flat_building').annotate(n=Count('pk')).values('n')
+    ), Value(0))
+
+    drifted_houses = houses.alias(occupied=occupied).exclude(occupation=F('occupied'))
+    drifted_buildings = buildings.alias(house_total=house_total).exclude(house_count=F('house_total'))
+    with transaction.atomic():
+        affected = set(drifted_houses.values_list('flat_building_id', 'user_id').distinct())
+        if dry_run:
+            counts = {'houses': drifted_houses.count(), 'buildings': drifted_buildings.count()}
+        else:
+            counts = {
+                'houses': drifted_houses.update(occupation=occupied, updated_at=timezone.now()),
+                'buildings': drifted_buildings.update(house_count=house_total),
+            }
+
+    if not dry_run:
+        for building_id, _ in affected:
+            clear_building_stats(building_id)
+        invalidate(House, *{user_id for _, user_id in affected})
+    scope = f"user={user.pk}" if user else "all users"
+    logger.info(f"Occupancy for {scope}: {counts['houses']} houses and {counts['buildings']} building counts drifted"
+                f"{' (dry run)' if dry_run else ', repaired'}")
+    return counts
@@ -0,0 +1,225 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.utils import timezone
+from tennants.cache import invalidate
+from tennants.models import OutboxMessage, RentCharge, Tenant
+from .dispatch import SMSMessage
+from .sms import TwilioNotificationService
+import logging
+import threading
+import uuid
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_DEFAULTS = {
+    'DELIVERY': 'thread',   # thread | celery | sync | manual
+    'BATCH_SIZE': 100,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_DELAY': 60,      # seconds, doubled after every failed attempt
+    'CLAIM_TIMEOUT': 600,   # seconds before a row stuck in "sending" is picked up again
+    'POLL_INTERVAL': 30,    # seconds between retry sweeps of the in-process worker
+}
+
+
+def outbox_setting(name):
+    return getattr(settings, 'SMS_OUTBOX', {}).get(name, OUTBOX_DEFAULTS[name])
+
+
+# ------------------------------
+# Enqueueing
+# ------------------------------
+def enqueue(kind, key, to, body, **related):
+    """
+    Queue one SMS. `kind` and `key` (e.g. the payment pk) form the idempotency
+    key, so queueing the same notification again does nothing.
+    `related` may carry user, tenant and rent_charge.
+    """
+    return enqueue_many([
+        OutboxMessage(kind=kind, idempotency_key=f"{kind}:{key}", to_number=str(to), body=body, **related)
+    ])
+
+
+def enqueue_many(messages):
+    """
+    Insert unsaved OutboxMessage rows in one statement, skipping keys that are
+    already queued, and schedule delivery once the current transaction commits.
+    Returns how many rows were actually inserted.
+    """
+    messages = list(messages)
+    if not messages:
+        return 0
+    keys = {message.idempotency_key for message in messages}
+    with transaction.atomic(savepoint=False):
+        # ignore_conflicts hands back no pks: what was inserted is what wasn't queued already
+        queued = set(OutboxMessage.objects.filter(idempotency_key__in=keys).values_list('idempotency_key', flat=True))
+        OutboxMessage.objects.bulk_create(messages, ignore_conflicts=True)
+    inserted = len(keys - queued)
+    if inserted:
+        transaction.on_commit(schedule_delivery)
+    return inserted
+
+
+# ------------------------------
+# Delivery
+# ------------------------------
+def claim_batch(batch_size=None):
+    """
+    Mark up to batch_size due rows as sending under a fresh claim token and
+    return them. The status check in the UPDATE means two workers can never
+    claim (and send) the same row.
+    """
+    now = timezone.now()
+    due = Q(status=OutboxMessage.PENDING) | Q(status=OutboxMessage.SENDING)
+    due &= Q(next_attempt_at__lte=now)
+    ids = list(
+        OutboxMessage.objects.filter(due)
+        .order_by('next_attempt_at', 'pk')
+        .values_list('pk', flat=True)[:batch_size or outbox_setting('BATCH_SIZE')]
+    )
+    if not ids:
+        return []
+
+    token = uuid.uuid4()
+    OutboxMessage.objects.filter(due, pk__in=ids).update(
+        status=OutboxMessage.SENDING,
+        claim_token=token,
+        attempts=F('attempts') + 1,
+        next_attempt_at=now + timedelta(seconds=outbox_setting('CLAIM_TIMEOUT')),
+    )
+    return list(OutboxMessage.objects.filter(claim_token=token).order_by('pk'))
+
+
+def _per_row(messages, attname):
+    """CASE giving each message its own value of attname, for one UPDATE over all of them"""
+    return Case(
+        *(When(pk=message.pk, then=Value(getattr(message, attname))) for message in messages),
+        output_field=OutboxMessage._meta.get_field(attname),
+    )
+
+
+def record_results(report):
+    """
+    Write back the outcome of a dispatched batch, one UPDATE per outcome, and
+    mark delivered reminders. Rows are only written while they still carry the
+    claim token they were sent under: a row whose claim expired and was taken
+    by another worker belongs to that worker now and is left alone.
+    Returns the messages written back.
+    """
+    now = timezone.now()
+    max_attempts = outbox_setting('MAX_ATTEMPTS')
+    claimed = {}
+    for result in report.results:
+        message = result.message.reference
+        claimed.setdefault(message.claim_token, []).append(message.pk)
+        message.claim_token = None
+        if result.success:
+            message.status = OutboxMessage.SENT
+            message.provider_sid = result.result
+            message.sent_at = now
+            message.last_error = None
+        else:
+            message.last_error = result.result
+            if not result.retryable or message.attempts >= max_attempts:
+                message.status = OutboxMessage.FAILED
+            else:
+                message.status = OutboxMessage.PENDING
+                delay = outbox_setting('RETRY_DELAY') * 2 ** (message.attempts - 1)
+                message.next_attempt_at = now + timedelta(seconds=delay)
+    if not claimed:
+        return []
+
+    still_ours = Q()
+    for token, ids in claimed.items():
+        still_ours |= Q(claim_token=token, pk__in=ids)
+    # per outcome: the values every row gets, and the fields that differ from row to row
+    writes = {
+        OutboxMessage.SENT: ({'sent_at': now, 'last_error': None}, ('provider_sid',)),
+        OutboxMessage.PENDING: ({}, ('last_error', 'next_attempt_at')),
+        OutboxMessage.FAILED: ({}, ('last_error',)),
+    }
+    with transaction.atomic():
+        held = set(OutboxMessage.objects.select_for_update().filter(still_ours).values_list('pk', flat=True))
+        messages = [result.message.reference for result in report.results if result.message.reference.pk in held]
+        outcomes = {}
+        for message in messages:
+            outcomes.setdefault(message.status, []).append(message)
+        for status, group in outcomes.items():
+            fixed, varying = writes[status]
+            OutboxMessage.objects.filter(still_ours, pk__in=[m.pk for m in group]).update(
+                status=status, claim_token=None, **fixed, **{name: _per_row(group, name) for name in varying}
+            )
+    for pk in [result.message.reference.pk for result in report.results if result.message.reference.pk not in held]:
+        logger.warning(f"Outbox message {pk} was reclaimed while sending; leaving it to the new claim")
+
+    reminders = [m for m in messages if m.status == OutboxMessage.SENT and m.kind == 'rent_reminder']
+    if reminders:
+        RentCharge.objects.filter(pk__in=[m.rent_charge_id for m in reminders]).update(reminder_sent=True, updated_at=now)
+        Tenant.objects.filter(pk__in=[m.tenant_id for m in reminders]).update(last_reminder_sent=now, updated_at=now)
+        invalidate(RentCharge, *{m.user_id for m in reminders})
+    return messages
+
+
+def deliver_pending(notifier=None, batch_size=None, **dispatch_options):
+    """
+    Send everything that is due, one claimed batch at a time.
+    Returns {'sent': n, 'failed': n}; transient failures are retried later until MAX_ATTEMPTS.
+    """
+    counts = {'sent': 0, 'failed': 0}
+    while True:
+        batch = claim_batch(batch_size)
+        if not batch:
+            return counts
+        notifier = notifier or TwilioNotificationService()
+        report = notifier.send_many(
+            [SMSMessage(m.to_number, m.body, reference=m) for m in batch], **dispatch_options
+        )
+        record_results(report)
+        counts['sent'] += report.sent
+        counts['failed'] += report.failed
+
+
+class OutboxWorker:
+    """
+    Background thread that delivers the outbox inside the web process.
+    wake() is cheap and safe to call from on_commit hooks; the thread also
+    sweeps every POLL_INTERVAL seconds to pick up retries.
+    """
+    def __init__(self):
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def wake(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sms-outbox', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=outbox_setting('POLL_INTERVAL'))
+            self._wake.clear()
+            try:
+                deliver_pending()
+            except Exception:
+                logger.exception("SMS outbox delivery failed")
+            finally:
+                connection.close()
+
+
+worker = OutboxWorker()
+
+
+def schedule_delivery():
+    """Hand the outbox to whatever SMS_OUTBOX['DELIVERY'] selects"""
+    mode = outbox_setting('DELIVERY')
+    if mode == 'thread':
+        worker.wake()
+    elif mode == 'celery':
+        from .tasks import deliver_outbox
+        deliver_outbox.delay()
+    elif mode == 'sync':
+        deliver_pending()
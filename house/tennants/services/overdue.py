@@ -0,0 +1,80 @@
+from itertools import islice
+from django.db.models import Q
+from django.utils import timezone
+from tennants.cache import invalidate
+from tennants.models import RentCharge, Tenant
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def overdue_charges(user_id, today=None):
+    """
+    Unpaid, past-due rent charges for one landlord as a single annotated query.
+    A charge is past due once its month is over, or during its month once the
+    tenant's due date has passed.
+    """
+    today = today or timezone.now().date()
+    past_due = (
+        Q(year__lt=today.year)
+        | Q(year=today.year, month__lt=today.month)
+        | Q(year=today.year, month=today.month, tenant__rent_due_date__lt=today)
+    )
+    return (
+        RentCharge.objects.filter(
+            past_due,
+            user_id=user_id,
+            tenant__is_active=True,
+            tenant__sms_notifications=True,
+        )
+        .with_payment_totals()
+        .filter(balance__gt=0)
+        .select_related('tenant__house__flat_building')
+        .order_by('pk')
+    )
+
+
+def iter_overdue_batches(user_id, today=None, chunk_size=2000, batch_size=200):
+    """Stream a landlord's overdue charges from the database in lists of batch_size"""
+    charges = overdue_charges(user_id, today).iterator(chunk_size=chunk_size)
+    while True:
+        batch = list(islice(charges, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def landlords_with_charges():
+    return (
+        RentCharge.objects.filter(user__isnull=False)
+        .order_by()
+        .values_list('user_id', flat=True)
+        .distinct()
+    )
+
+
+def send_overdue_notices(notifier, today=None, chunk_size=2000, batch_size=200):
+    """
+    Find every overdue charge, landlord by landlord, and hand them to the
+    notifier in batches. Returns a dict of found/sent/failed counts.
+    """
+    counts = {'found': 0, 'sent': 0, 'failed': 0}
+
+    for user_id in landlords_with_charges():
+        for batch in iter_overdue_batches(user_id, today, chunk_size, batch_size):
+            counts['found'] += len(batch)
+            notified = []
+            for rent_charge, success, result in notifier.send_overdue_notices(batch):
+                if success:
+                    counts['sent'] += 1
+                    notified.append(rent_charge.tenant_id)
+                else:
+                    counts['failed'] += 1
+                    logger.error(f"Failed to send overdue notice for charge {rent_charge.pk}: {result}")
+            if notified:
+                now = timezone.now()
+                Tenant.objects.filter(pk__in=notified).update(last_notification_sent=now, updated_at=now)
+                invalidate(Tenant, user_id)
+
+    logger.info(f"Overdue notices: {counts}")
+    return counts
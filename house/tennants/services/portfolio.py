@@ -0,0 +1,176 @@
+"""
+One-pass import of a landlord's portfolio from a CSV file.
+
+Each line is one house, with its building and optionally its tenant:
+
+    building_name,address,number_of_houses,house_number,house_size,house_rent_amount,
+    deposit_amount,full_name,email,phone,id_number,rent_due_date
+
+Buildings are matched by name against the landlord's existing ones and
+created otherwise; address and number_of_houses are only needed for new
+ones. Lines without a full_name are vacant houses.
+
+The whole file is checked before anything is written, with three queries
+for what already exists and in-memory sets for duplicates inside the file,
+then inserted with chunked bulk_create through services/bulk.py.
+"""
+from collections import Counter
+from django.db import transaction
+from phonenumber_field.serializerfields import PhoneNumberField
+from rest_framework import serializers
+from tennants.models import FlatBuilding, House
+from . import bulk
+import csv
+import io
+import logging
+
+logger = logging.getLogger(__name__)
+
+TENANT_FIELDS = ('full_name', 'email', 'phone', 'id_number', 'rent_due_date')
+
+
+class PortfolioRowSerializer(serializers.Serializer):
+    building_name = serializers.CharField(max_length=50)
+    address = serializers.CharField(max_length=50, required=False)
+    number_of_houses = serializers.IntegerField(min_value=0, required=False)
+    house_number = serializers.CharField(max_length=5)
+    house_size = serializers.CharField(max_length=10, required=False)
+    house_rent_amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    deposit_amount = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    full_name = serializers.CharField(max_length=50, required=False)
+    email = serializers.EmailField(required=False)
+    phone = PhoneNumberField(required=False)
+    id_number = serializers.CharField(max_length=10, required=False)
+    rent_due_date = serializers.DateField(required=False)
+
+    def to_internal_value(self, data):
+        # blank CSV cells mean "not given"
+        return super().to_internal_value({key: value for key, value in data.items() if key and value not in ('', None)})
+
+    def validate(self, data):
+        if data.get('full_name'):
+            missing = [field for field in ('email', 'phone') if not data.get(field)]
+            if missing:
+                raise serializers.ValidationError({field: "Required for a tenant." for field in missing})
+        elif any(data.get(field) for field in TENANT_FIELDS):
+            raise serializers.ValidationError({'full_name': "Required for a tenant."})
+        return data
+
+
+def _add_error(errors, line, message, field=bulk.NON_FIELD):
+    errors.setdefault(line, {}).setdefault(field, []).append(message)
+
+
+def read_rows(source):
+    """{line number: raw dict} from a path, text or binary file object"""
+    if isinstance(source, str):
+        with open(source, newline='', encoding='utf-8-sig') as handle:
+            return read_rows(handle)
+    if isinstance(source.read(0), bytes):
+        source = io.TextIOWrapper(source, encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(source)
+    return {reader.line_num: row for row in reader}
+
+
+def validate_portfolio(user, raw_rows):
+    """
+    Field-validate every line and check the file as a whole against the
+    landlord's data. Returns (rows, errors, new_buildings): rows and errors
+    keyed by line number, and the buildings the file would create by name.
+    """
+    row_serializer = PortfolioRowSerializer()
+    rows, errors = {}, {}
+    for line, raw in raw_rows.items():
+        try:
+            rows[line] = row_serializer.run_validation(raw)
+        except serializers.ValidationError as exc:
+            errors[line] = serializers.as_serializer_error(exc)
+
+    names = {row['building_name'] for row in rows.values()}
+    buildings = {
+        building.building_name: building
+        for building in FlatBuilding.objects.filter(user=user, building_name__in=names)
+    }
+    taken_numbers = set(
+        House.objects.filter(flat_building__in=buildings.values())
+        .values_list('flat_building__building_name', 'house_number')
+    )
+    bulk.check_unique_tenant_fields(rows, errors)
+
+    # new buildings take address and number_of_houses from the first line that gives them
+    new_buildings = {}
+    for row in rows.values():
+        name = row['building_name']
+        if name not in buildings:
+            definition = new_buildings.setdefault(name, {'building_name': name})
+            for field in ('address', 'number_of_houses'):
+                if field in row:
+                    definition.setdefault(field, row[field])
+    for line, row in rows.items():
+        definition = new_buildings.get(row['building_name'], {})
+        for field in ('address', 'number_of_houses'):
+            if definition and field not in definition:
+                _add_error(errors, line, f"{field} is required for the new building {row['building_name']}", field)
+    capacity = {name: building.number_of_houses for name, building in buildings.items()}
+    capacity.update({name: definition.get('number_of_houses', 0) for name, definition in new_buildings.items()})
+
+    added = Counter()
+    for line, row in rows.items():
+        name = row['building_name']
+        key = (name, row['house_number'])
+        if key in taken_numbers:
+            _add_error(errors, line, f"House number {row['house_number']} already exists in {name}", 'house_number')
+        taken_numbers.add(key)
+        if line in errors:
+            continue
+        added[name] += 1
+        existing_count = buildings[name].house_count if name in buildings else 0
+        if existing_count + added[name] > capacity[name]:
+            _add_error(errors, line, f"Cannot add more houses to {name}. Limit reached.", 'house_number')
+    return rows, errors, new_buildings
+
+
+def import_portfolio(user, source, dry_run=False, skip_invalid=False, welcome=False, batch_size=bulk.BATCH_SIZE):
+    """
+    Import a portfolio CSV (see the module docstring). Nothing is written
+    when any line is invalid, unless skip_invalid is set, in which case the
+    valid lines are imported. Welcome messages are only queued with welcome=True.
+
+    Returns {'buildings': n, 'houses': n, 'tenants': n, 'errors': {line: {field: [message]}}}
+    with the counts of what was (or, with dry_run, would be) created.
+    """
+    rows, errors, new_buildings = validate_portfolio(user, read_rows(source))
+    if errors and not skip_invalid:
+        return {'buildings': 0, 'houses': 0, 'tenants': 0, 'errors': errors}
+    rows = [row for line, row in sorted(rows.items()) if line not in errors]
+    names = {row['building_name'] for row in rows}
+    new_buildings = {name: definition for name, definition in new_buildings.items() if name in names}
+
+    tenant_count = sum(1 for row in rows if row.get('full_name'))
+    counts = {'buildings': len(new_buildings), 'houses': len(rows), 'tenants': tenant_count, 'errors': errors}
+    if dry_run:
+        return counts
+
+    with transaction.atomic():
+        existing = dict(FlatBuilding.objects.filter(user=user, building_name__in=names).values_list('building_name', 'pk'))
+        created = bulk.create_buildings(user, list(new_buildings.values()), batch_size=batch_size)
+        building_ids = {**existing, **{building.building_name: building.pk for building in created}}
+
+        house_fields = ('house_number', 'house_size', 'house_rent_amount', 'deposit_amount')
+        houses = bulk.create_houses(user, [
+            {'flat_building_id': building_ids[row['building_name']], **{f: row[f] for f in house_fields if f in row}}
+            for row in rows
+        ], batch_size=batch_size)
+
+        tenants = [
+            {'house_id': house.pk, **{f: row[f] for f in TENANT_FIELDS if f in row}}
+            for row, house in zip(rows, houses)
+            if row.get('full_name')
+        ]
+        bulk.create_tenants(user, tenants, welcome=welcome, batch_size=batch_size)
+
+    logger.info(
+        f"Imported portfolio for user={user.pk}: {counts['buildings']} buildings, "
+        f"{counts['houses']} houses, {counts['tenants']} tenants, {len(errors)} lines skipped"
+    )
+    return counts
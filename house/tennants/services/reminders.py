@@ -0,0 +1,86 @@
+from django.utils import timezone
+from tennants.cache import invalidate
+from tennants.models import OutboxMessage, RentCharge, Tenant
+from . import outbox
+from .dispatch import SMSMessage
+from .sms import TwilioNotificationService
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def reminder_candidates(today=None, user=None):
+    """
+    This month's charges that haven't had a reminder yet and whose tenant is
+    inside their reminder window, as [(rent_charge, days_until_due)].
+    """
+    today = today or timezone.now().date()
+    charges = (
+        RentCharge.objects.filter(
+            year=today.year,
+            month=today.month,
+            reminder_sent=False,
+            tenant__is_active=True,
+            tenant__sms_notifications=True,
+        )
+        .with_payment_totals()
+        .select_related('tenant__house__flat_building')
+        .order_by('pk')
+    )
+    if user is not None:
+        charges = charges.filter(user=user)
+
+    candidates = []
+    for rent_charge in charges:
+        days_until_due = (rent_charge.tenant.rent_due_date - today).days
+        if 0 <= days_until_due <= rent_charge.tenant.reminder_days_before:
+            candidates.append((rent_charge, days_until_due))
+    return candidates
+
+
+def send_reminders(candidates, notifier=None, **dispatch_options):
+    """
+    Send reminders for [(rent_charge, days_until_due)] through the dispatch
+    pipeline and mark the delivered ones in two UPDATEs. Returns the DispatchReport.
+    """
+    notifier = notifier or TwilioNotificationService()
+    messages = [
+        SMSMessage(rent_charge.tenant.phone, notifier._generate_rent_reminder(rent_charge, days), reference=rent_charge)
+        for rent_charge, days in candidates
+    ]
+    report = notifier.send_many(messages, **dispatch_options)
+
+    delivered = [r.message.reference for r in report.results if r.success]
+    if delivered:
+        now = timezone.now()
+        RentCharge.objects.filter(pk__in=[c.pk for c in delivered]).update(reminder_sent=True, updated_at=now)
+        Tenant.objects.filter(pk__in=[c.tenant_id for c in delivered]).update(last_reminder_sent=now, updated_at=now)
+        invalidate(RentCharge, *{c.user_id for c in delivered})
+    return report
+
+
+def queue_reminders(rent_charges, today=None, notifier=None):
+    """
+    Queue reminders in the notification outbox for the given charges whose
+    tenant is inside their reminder window, in one INSERT. Used where charges
+    are bulk created and the post_save reminder never fires. Returns the number queued.
+    """
+    today = today or timezone.now().date()
+    notifier = notifier or TwilioNotificationService()
+    messages = []
+    for rent_charge in rent_charges:
+        tenant = rent_charge.tenant
+        if not (tenant.is_active and tenant.sms_notifications):
+            continue
+        days_until_due = (tenant.rent_due_date - today).days
+        if 0 <= days_until_due <= tenant.reminder_days_before:
+            messages.append(OutboxMessage(
+                kind='rent_reminder',
+                idempotency_key=f"rent_reminder:{rent_charge.pk}",
+                to_number=str(tenant.phone),
+                body=notifier._generate_rent_reminder(rent_charge, days_until_due),
+                user_id=rent_charge.user_id,
+                tenant=tenant,
+                rent_charge=rent_charge,
+            ))
+    return outbox.enqueue_many(messages)
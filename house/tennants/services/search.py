@@ -0,0 +1,210 @@
+"""
+Tenant search by name, email, phone or ID number.
+
+On SQLite the tenants are indexed in an FTS5 table with the trigram
+tokenizer (tennants_tenant_search, rowid = tenant id, created by migration
+0007), kept up to date by the Tenant signals and by services/bulk.py. Any
+three characters of a value find it, so a query matches prefixes and the
+middle of words alike, and every word of the query has to match.
+
+Phones are indexed as the international digits and the national form with
+its trunk 0 ("254712345678 0712345678"), and a query that looks like a phone
+number is reduced to its digits, so 0712 345, +254 712 and 712345 all find
++254712345678.
+
+When no tenant has every word, the words are broken into trigrams and the
+closest names and emails (trigram similarity over SIMILARITY) are returned
+instead, which covers typos like "Jonh Kamau".
+
+A query with a word shorter than three characters can't use the index and
+goes through the ORM (short words match the start of a name), as does every
+query on databases other than SQLite.
+"""
+from django.db import OperationalError, connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+from phonenumber_field.phonenumber import to_python
+from tennants.models import Tenant
+import logging
+import phonenumbers
+import re
+
+logger = logging.getLogger(__name__)
+
+TABLE = 'tennants_tenant_search'
+COLUMNS = ('full_name', 'email', 'phone', 'id_number')
+MAX_LIMIT = 100
+FUZZY_CANDIDATES = 200
+SIMILARITY = 0.3
+
+PHONE_QUERY = re.compile(r'^\+?[\d\s().-]+$')
+WORDS = re.compile(r'[^\W_]+')
+
+_ready = set()
+
+
+def index_available():
+    """Whether this database has the FTS5 table (SQLite with migration 0007 applied)"""
+    if connection.vendor != 'sqlite':
+        return False
+    key = connection.settings_dict['NAME']
+    if key not in _ready:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLE])
+            if cursor.fetchone() is None:
+                return False
+        _ready.add(key)
+    return True
+
+
+def phone_keys(phone):
+    """'254712345678 0712345678' for +254712345678, what the phone column holds"""
+    number = to_python(phone)
+    if not number or not number.is_valid():
+        return re.sub(r'\D', '', str(phone or ''))
+    national = phonenumbers.national_significant_number(number)
+    return f"{number.country_code}{national} 0{national}"
+
+
+def _row(tenant):
+    return (tenant.pk, tenant.full_name, tenant.email, phone_keys(tenant.phone), tenant.id_number or '', tenant.user_id)
+
+
+# ------------------------------
+# Index
+# ------------------------------
+def index_tenants(tenants):
+    """Add or refresh tenants in the index, one statement for the lot"""
+    tenants = [tenant for tenant in tenants if tenant.pk]
+    if not tenants or not index_available():
+        return
+    # one transaction: outside one, SQLite commits every row on its own
+    with transaction.atomic(savepoint=False), connection.cursor() as cursor:
+        cursor.executemany(
+            f"INSERT OR REPLACE INTO {TABLE} (rowid, {', '.join(COLUMNS)}, user_id) VALUES (%s, %s, %s, %s, %s, %s)",
+            [_row(tenant) for tenant in tenants],
+        )
+
+
+def unindex_tenants(tenant_ids):
+    tenant_ids = list(tenant_ids)
+    if not tenant_ids or not index_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE} WHERE rowid IN ({', '.join(['%s'] * len(tenant_ids))})", tenant_ids)
+
+
+def rebuild_index(batch_size=2000):
+    """Reindex every tenant from scratch; returns how many were indexed, None without the index"""
+    if not index_available():
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABLE}")
+    count, batch = 0, []
+    tenants = Tenant.objects.only('full_name', 'email', 'phone', 'id_number', 'user_id').order_by('pk')
+    for tenant in tenants.iterator(chunk_size=batch_size):
+        batch.append(tenant)
+        if len(batch) == batch_size:
+            index_tenants(batch)
+            count, batch = count + len(batch), []
+    index_tenants(batch)
+    return count + len(batch)
+
+
+# ------------------------------
+# Search
+# ------------------------------
+def _phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _trigrams(text):
+    text = f" {text.lower()} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def similarity(word, text):
+    """Best trigram similarity between `word` and any word of `text`"""
+    grams = _trigrams(word)
+    best = 0.0
+    for candidate in WORDS.findall(text.lower()):
+        other = _trigrams(candidate)
+        best = max(best, len(grams & other) / len(grams | other))
+    return best
+
+
+def _match(user, expression, limit):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, full_name, email FROM {TABLE} WHERE {TABLE} MATCH %s AND user_id = %s ORDER BY rank LIMIT %s",
+            [expression, user.pk, limit],
+        )
+        return cursor.fetchall()
+
+
+def _orm_ids(user, query, words, limit):
+    """Short words, and databases without the index"""
+    queryset = Tenant.objects.filter(user=user)
+    digits = re.sub(r'\D', '', query)
+    if PHONE_QUERY.match(query) and digits:
+        condition = Q(phone__contains=digits.lstrip('0')) | Q(id_number__icontains=digits)
+        return list(queryset.filter(condition).order_by('full_name', 'pk').values_list('pk', flat=True)[:limit])
+    for word in words:
+        if len(word) < 3:
+            queryset = queryset.filter(Q(full_name__istartswith=word) | Q(full_name__icontains=f' {word}'))
+        else:
+            queryset = queryset.filter(
+                Q(full_name__icontains=word) | Q(email__icontains=word) | Q(id_number__icontains=word)
+            )
+    return list(queryset.order_by('full_name', 'pk').values_list('pk', flat=True)[:limit])
+
+
+def search_ids(user, query, limit=20):
+    """Ids of the landlord's tenants matching `query`, best match first"""
+    query = (query or '').strip()
+    limit = max(1, min(limit, MAX_LIMIT))
+    words = WORDS.findall(query)
+    if not words:
+        return []
+    if not index_available():
+        return _orm_ids(user, query, words, limit)
+
+    digits = re.sub(r'\D', '', query)
+    if PHONE_QUERY.match(query) and len(digits) >= 3:
+        expression = f"phone : {_phrase(digits)} OR id_number : {_phrase(digits)}"
+        return [row[0] for row in _match(user, expression, limit)]
+    if any(len(word) < 3 for word in words):
+        return _orm_ids(user, query, words, limit)
+
+    try:
+        rows = _match(user, ' AND '.join(_phrase(word) for word in words), limit)
+        if rows:
+            return [row[0] for row in rows]
+        # nothing has every word: rank the tenants sharing trigrams with them by similarity
+        grams = {gram for word in words for gram in _trigrams(word) if ' ' not in gram}
+        if not grams:
+            return []
+        expression = '{full_name email} : (' + ' OR '.join(_phrase(gram) for gram in sorted(grams)) + ')'
+        candidates = _match(user, expression, FUZZY_CANDIDATES)
+    except OperationalError as exc:
+        logger.warning(f"Tenant search failed for {query!r}: {exc}")
+        return _orm_ids(user, query, words, limit)
+
+    scored = []
+    for pk, full_name, email in candidates:
+        text = f"{full_name} {email}"
+        score = sum(similarity(word, text) for word in words) / len(words)
+        if score >= SIMILARITY:
+            scored.append((-score, pk))
+    return [pk for _, pk in sorted(scored)[:limit]]
+
+
+def rank_order(ids):
+    """Expression to order a queryset filtered on `ids` the way search_ids ranked them"""
+    return Case(*(When(pk=pk, then=Value(position)) for position, pk in enumerate(ids)),
+                default=Value(len(ids)), output_field=IntegerField())
+
+
+def search_tenants(queryset, user, query, limit=20):
+    """`queryset` narrowed to the search results, best match first (annotated search_rank)"""
+    ids = search_ids(user, query, limit)
+    return queryset.filter(pk__in=ids).annotate(search_rank=rank_order(ids)).order_by('search_rank')
@@ -1,8 +1,11 @@
 from twilio.rest import Client
 from django.conf import settings
 from django.utils import timezone
+from types import SimpleNamespace
+from .dispatch import SMSDispatcher, SMSMessage, TwilioTransport
 import logging
 import os
+import threading
 from twilio.http.http_client import TwilioHttpClient
 
 logger = logging.getLogger(__name__)
@@ -17,13 +20,31 @@ client = Client(
     http_client=proxy_client
 )
 
-class TwilioNotificationService:
+class LocMemSMSClient:
+    """
+    Stand-in for the Twilio client that keeps messages in memory instead of
+    sending them. Pass it to TwilioNotificationService(client=...) in tests
+    and local runs; sent messages end up in `outbox`.
+    """
     def __init__(self):
-        self.client = Client(
+        self.outbox = []
+        self.messages = self
+        self._lock = threading.Lock()
+
+    def create(self, body, from_, to):
+        with self._lock:
+            message = SimpleNamespace(sid=f"LM{len(self.outbox) + 1:08d}", body=body, from_=from_, to=to)
+            self.outbox.append(message)
+        return message
+
+
+class TwilioNotificationService:
+    def __init__(self, client=None, from_number=None):
+        self.client = client or Client(
             settings.TWILIO_ACCOUNT_SID,
             settings.TWILIO_AUTH_TOKEN
         )
-        self.from_number = settings.TWILIO_PHONE_NUMBER
+        self.from_number = from_number or settings.TWILIO_PHONE_NUMBER
     
     def send_sms(self, to_number, message):
         """Send SMS via Twilio"""
@@ -38,6 +59,14 @@ class TwilioNotificationService:
         except Exception as e:
             logger.error(f"Failed to send SMS to {to_number}: {str(e)}")
             return False, str(e)
+
+    def send_many(self, messages, **options):
+        """
+        Send a list of SMSMessage concurrently (see SMSDispatcher for the
+        worker/rate/retry options). Returns a DispatchReport.
+        """
+        transport = TwilioTransport(self.client, self.from_number)
+        return SMSDispatcher(transport, **options).dispatch(messages)
     
     def send_rent_due_reminder(self, rent_charge):
         """Send rent due reminder"""
@@ -54,8 +83,7 @@ class TwilioNotificationService:
         
         if success:
             rent_charge.reminder_sent = True
-            rent_charge.reminder_sent_at = timezone.now()
-            rent_charge.save(update_fields=['reminder_sent', 'reminder_sent_at'])
+            rent_charge.save(update_fields=['reminder_sent'])
             
             tenant.last_reminder_sent = timezone.now()
             tenant.save(update_fields=['last_reminder_sent'])
@@ -84,11 +112,21 @@ class TwilioNotificationService:
         """Send overdue payment notice"""
         tenant = rent_charge.tenant
         
-        if not tenant.sms_notifications_enabled:
+        if not tenant.sms_notifications:
             return False, "Notifications disabled"
         
         message = self._generate_overdue_notice(rent_charge)
         return self.send_sms(tenant.phone, message)
+
+    def send_overdue_notices(self, rent_charges):
+        """Send overdue notices for a batch of charges, returns [(rent_charge, success, result)]"""
+        messages = [
+            SMSMessage(rent_charge.tenant.phone, self._generate_overdue_notice(rent_charge), reference=rent_charge)
+            for rent_charge in rent_charges
+            if rent_charge.tenant.sms_notifications
+        ]
+        report = self.send_many(messages)
+        return [(r.message.reference, r.success, r.result) for r in report.results]
     
     def _generate_rent_reminder(self, rent_charge, days_until_due):
         """Generate rent reminder message"""
@@ -0,0 +1,167 @@
+"""
+Delta sync for offline clients.
+
+One request returns every building, house, tenant, rent charge and payment
+of the landlord that changed since the client's cursor, in the same shape as
+the list endpoints, plus the ids deleted since then (from Tombstone rows).
+
+Each resource is read in (updated_at, id) order from where the cursor left
+it, at most `limit` rows at a time; has_more says to call again straight
+away. Once a resource is caught up its position is set OVERLAP seconds
+before the read started, so a write that committed late with an earlier
+timestamp is picked up next time. Rows can therefore arrive twice; clients
+upsert by id.
+
+A cursor issued more than TOMBSTONE_DAYS ago (or an updated_since that far
+back) can't see every deletion any more: the response then has reset set and
+starts over with everything, and the client replaces its local copy. The age
+is that of the cursor, not of the rows it points at, so paging through rows
+last touched long ago still finishes.
+"""
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from tennants.models import FlatBuilding, House, Payment, RentCharge, Tenant, Tombstone
+from tennants.serializers import (FlatBuildingSerializer, HouseSerializer, PaymentSerializer, RentChargeSerializer,
+                                  TenantSerializer, values_representation)
+import base64
+import binascii
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'PAGE_SIZE': 1000,
+    'MAX_PAGE_SIZE': 5000,
+    'OVERLAP': 5,
+    'TOMBSTONE_DAYS': 90,
+}
+
+RESOURCES = {
+    'flats': (FlatBuilding, FlatBuildingSerializer),
+    'houses': (House, HouseSerializer),
+    'tenants': (Tenant, TenantSerializer),
+    'rent_charges': (RentCharge, RentChargeSerializer),
+    'payments': (Payment, PaymentSerializer),
+}
+RESOURCE_NAMES = {model: name for name, (model, _) in RESOURCES.items()}
+DELETED = 'deleted'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def sync_setting(name):
+    return getattr(settings, 'SYNC', {}).get(name, DEFAULTS[name])
+
+
+# ------------------------------
+# Cursors
+# ------------------------------
+def encode_cursor(positions, issued):
+    """{stream: (datetime, id)} and the time the cursor was issued -> opaque string"""
+    payload = {
+        'issued': issued.isoformat(),
+        'positions': {stream: [when.isoformat(), pk] for stream, (when, pk) in positions.items()},
+    }
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor):
+    """Opaque string -> ({stream: (datetime, id)}, issued)"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+        issued = datetime.fromisoformat(payload['issued'])
+        positions = {
+            stream: (datetime.fromisoformat(when), int(pk)) for stream, (when, pk) in payload['positions'].items()
+        }
+    except (ValueError, TypeError, AttributeError, KeyError, binascii.Error):
+        raise InvalidCursor("Invalid cursor")
+    if set(positions) != {*RESOURCES, DELETED} or timezone.is_naive(issued) or \
+            any(timezone.is_naive(when) for when, _ in positions.values()):
+        raise InvalidCursor("Invalid cursor")
+    return positions, issued
+
+
+def _after(field, position):
+    when, pk = position
+    return Q(**{f'{field}__gt': when}) | Q(**{field: when, 'pk__gt': pk})
+
+
+# ------------------------------
+# Sync
+# ------------------------------
+def record_deletion(instance):
+    """Tombstone for a deleted row of one of the synced models"""
+    Tombstone.objects.create(user_id=instance.user_id, resource=RESOURCE_NAMES[type(instance)], object_id=instance.pk)
+
+
+def changes_since(user, cursor=None, updated_since=None, limit=None):
+    """
+    Everything that changed for `user` after `cursor` (from a previous call)
+    or `updated_since` (a datetime); neither means a full download.
+
+    Returns {'cursor', 'has_more', 'reset', 'changes': {resource: [rows]},
+    'deleted': {resource: [ids]}}. Raises InvalidCursor for a bad cursor.
+    """
+    limit = min(limit or sync_setting('PAGE_SIZE'), sync_setting('MAX_PAGE_SIZE'))
+    started = timezone.now()
+    if cursor:
+        positions, since = decode_cursor(cursor)
+    elif updated_since:
+        positions, since = {stream: (updated_since, 0) for stream in [*RESOURCES, DELETED]}, updated_since
+    else:
+        positions, since = {}, None
+
+    # deletions older than the horizon may have been pruned since the client last synced
+    horizon = started - timedelta(days=sync_setting('TOMBSTONE_DAYS'))
+    reset = since is not None and since < horizon
+    if reset:
+        positions = {}
+    caught_up = (started - timedelta(seconds=sync_setting('OVERLAP')), 0)
+
+    result = {'cursor': None, 'has_more': False, 'reset': reset, 'changes': {}, 'deleted': {}}
+    next_positions = {}
+    for name, (model, serializer_class) in RESOURCES.items():
+        queryset = model.objects.filter(user=user)
+        if serializer_class.expand_queryset:
+            queryset = getattr(queryset, serializer_class.expand_queryset)()
+        if name in positions:
+            queryset = queryset.filter(_after('updated_at', positions[name]))
+        representation = values_representation(serializer_class, ())
+        rows = list(representation.values(queryset.order_by('updated_at', 'pk'))[:limit + 1])
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_positions[name] = (rows[-1]['updated_at'], rows[-1]['pk'])
+            result['has_more'] = True
+        else:
+            next_positions[name] = max(positions.get(name, caught_up), caught_up)
+        result['changes'][name] = representation.represent(rows)
+
+    tombstones = Tombstone.objects.filter(user=user)
+    if DELETED in positions:
+        tombstones = tombstones.filter(_after('deleted_at', positions[DELETED]))
+    tombstones = list(tombstones.order_by('deleted_at', 'pk').values_list('deleted_at', 'pk', 'resource', 'object_id')[:limit + 1])
+    if len(tombstones) > limit:
+        tombstones = tombstones[:limit]
+        next_positions[DELETED] = tombstones[-1][:2]
+        result['has_more'] = True
+    else:
+        next_positions[DELETED] = max(positions.get(DELETED, caught_up), caught_up)
+    result['deleted'] = {name: [] for name in RESOURCES}
+    for _, _, resource, object_id in tombstones:
+        result['deleted'][resource].append(object_id)
+
+    result['cursor'] = encode_cursor(next_positions, started)
+    return result
+
+
+def prune_tombstones(now=None):
+    """Delete tombstones older than SYNC['TOMBSTONE_DAYS']; returns how many"""
+    horizon = (now or timezone.now()) - timedelta(days=sync_setting('TOMBSTONE_DAYS'))
+    deleted, _ = Tombstone.objects.filter(deleted_at__lt=horizon).delete()
+    logger.info(f"Pruned {deleted} sync tombstones older than {horizon}")
+    return deleted
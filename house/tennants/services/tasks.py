@@ -1,8 +1,8 @@
 from celery import shared_task
 from django.utils import timezone
 from datetime import timedelta
-from tennants.models import RentCharge, Tenant
 from .sms import TwilioNotificationService
+from . import billing, occupancy, outbox, overdue, reminders, sync
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,41 +13,16 @@ def send_daily_rent_reminders():
     Daily task to check and send rent reminders
     Runs every day to check for upcoming rent due dates
     """
-    notification_service = TwilioNotificationService()
-    today = timezone.now().date()
-    sent_count = 0
-    
-    # Get all active tenants
-    active_tenants = Tenant.objects.filter(is_active=True, sms_notifications_enabled=True)
-    
-    for tenant in active_tenants:
-        days_until_due = (tenant.rent_due_date - today).days
-        
-        # Check if reminder should be sent
-        if days_until_due == tenant.reminder_days_before or days_until_due == 0:
-            # Find the current rent charge for this tenant
-            current_month = today.month
-            current_year = today.year
-            
-            try:
-                rent_charge = RentCharge.objects.get(
-                    tenant=tenant,
-                    year=current_year,
-                    month=current_month
-                )
-                
-                # Only send if not already sent
-                if not rent_charge.reminder_sent:
-                    success, result = notification_service.send_rent_due_reminder(rent_charge)
-                    if success:
-                        sent_count += 1
-                        logger.info(f"Reminder sent to {tenant.full_name}")
-                    
-            except RentCharge.DoesNotExist:
-                logger.warning(f"No rent charge found for {tenant.full_name} for {current_month}/{current_year}")
-    
-    logger.info(f"Daily rent reminders completed. Sent: {sent_count}")
-    return f"Sent {sent_count} reminders"
+    # only on the first day of the reminder window and on the due date itself
+    candidates = [
+        (rent_charge, days_until_due)
+        for rent_charge, days_until_due in reminders.reminder_candidates()
+        if days_until_due in (rent_charge.tenant.reminder_days_before, 0)
+    ]
+    report = reminders.send_reminders(candidates)
+
+    logger.info(f"Daily rent reminders completed. Sent: {report.sent} ({report.throughput:.1f} msg/s)")
+    return f"Sent {report.sent} reminders"
 
 
 @shared_task
@@ -56,25 +31,54 @@ def send_overdue_notices():
     Check for overdue rent and send notices
     Run this weekly or as needed
     """
-    notification_service = TwilioNotificationService()
+    counts = overdue.send_overdue_notices(TwilioNotificationService())
+    return f"Sent {counts['sent']} overdue notices ({counts['failed']} failed)"
+
+
+@shared_task
+def deliver_outbox():
+    """
+    Send queued SMS from the notification outbox
+    Queued after each commit when SMS_OUTBOX['DELIVERY'] is "celery"; also safe to run periodically
+    """
+    counts = outbox.deliver_pending()
+    return f"Delivered {counts['sent']} queued SMS ({counts['failed']} failed)"
+
+
+@shared_task
+def run_monthly_billing():
+    """
+    Bill every landlord for the current month
+    Schedule on the 1st of each month; each landlord is billed by its own task so workers share the load
+    """
     today = timezone.now().date()
-    sent_count = 0
-    
-    # Get rent charges that are overdue and unpaid
-    overdue_charges = RentCharge.objects.filter(
-        tenant__is_active=True,
-        tenant__sms_notifications_enabled=True,
-        tenant__rent_due_date__lt=today
-    ).exclude(
-        balance__lte=0  # Exclude fully paid
-    )
-    
-    for rent_charge in overdue_charges:
-        # Send overdue notice
-        success, result = notification_service.send_overdue_notice(rent_charge)
-        if success:
-            sent_count += 1
-            logger.info(f"Overdue notice sent to {rent_charge.tenant.full_name}")
-    
-    logger.info(f"Overdue notices completed. Sent: {sent_count}")
-    return f"Sent {sent_count} overdue notices"
\ No newline at end of file
+    user_ids = billing.landlords_to_bill()
+    for user_id in user_ids:
+        bill_landlord.delay(user_id, today.year, today.month)
+    return f"Queued billing for {len(user_ids)} landlord(s)"
+
+
+@shared_task
+def bill_landlord(user_id, year, month):
+    """Bill one landlord for one month, re-running is harmless"""
+    result = billing.bill_landlord(user_id, [(year, month)])
+    return f"User {user_id}: {result['created']} created, {result['skipped']} skipped"
+
+
+@shared_task
+def prune_sync_tombstones():
+    """
+    Forget deletions older than SYNC['TOMBSTONE_DAYS']
+    Schedule daily; clients further behind than that get a full resync
+    """
+    return f"Pruned {sync.prune_tombstones()} tombstones"
+
+
+@shared_task
+def recompute_occupancy():
+    """
+    Repair house occupancy and building house counts that drifted past the signals
+    Schedule nightly, or queue after a bulk change; runs that find nothing to fix write nothing
+    """
+    counts = occupancy.recompute_occupancy()
+    return f"Repaired {counts['houses']} houses and {counts['buildings']} building counts"
@@ -16,7 +16,11 @@ from django.core.cache import cache
 
 from django.utils import timezone
 from datetime import timedelta
-from .models import RentCharge, Payment, Tenant
+from .models import RentCharge, Payment, Tenant, TenantLedger
+from django.db.models import F
+from tennants.services import outbox, search, sync
+from tennants.cache import invalidate
+from tennants.services.occupancy import clear_building_stats
 from tennants.services.sms import TwilioNotificationService
 import logging
 
@@ -25,55 +29,133 @@ logger = logging.getLogger(__name__)
 notification_service = TwilioNotificationService()
 
 
+# ------------------------------
+# Balance ledger
+# ------------------------------
+# RentCharge.save/Payment.save wrap the save in a transaction, so these
+# handlers commit or roll back together with the row that triggered them.
+# They are registered before the SMS receivers so messages see fresh totals.
+# An edit's previous values come from the field tracker (TrackedFieldsMixin),
+# or from the database for an instance that wasn't loaded from it.
+
+@receiver(post_save, sender=Tenant)
+def create_tenant_ledger(sender, instance, created, **kwargs):
+    if created:
+        TenantLedger.objects.get_or_create(tenant=instance)
+
+
+@receiver(pre_save, sender=RentCharge)
+def remember_previous_charge(sender, instance, **kwargs):
+    instance._ledger_previous = None
+    if instance.pk:
+        instance._ledger_previous = (
+            instance.saved_values() or RentCharge.objects.filter(pk=instance.pk).values(*instance.tracked_fields).first()
+        )
+
+
+@receiver(post_save, sender=RentCharge)
+def update_ledger_on_charge_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_ledger_previous', None)
+    if previous and previous['tenant_id'] == instance.tenant_id:
+        TenantLedger.bump(instance.tenant_id, due=instance.amount_due - previous['amount_due'])
+        return
+    if previous:
+        TenantLedger.bump(previous['tenant_id'], due=-previous['amount_due'])
+    TenantLedger.bump(instance.tenant_id, due=instance.amount_due)
+
+
+@receiver(post_delete, sender=RentCharge)
+def update_ledger_on_charge_delete(sender, instance, **kwargs):
+    TenantLedger.bump(instance.tenant_id, due=-instance.amount_due)
+
+
+def _apply_payment(tenant_id, rent_charge_id, amount):
+    TenantLedger.bump(tenant_id, paid=amount)
+    if rent_charge_id and amount:
+        RentCharge.objects.filter(pk=rent_charge_id).update(amount_paid=F('amount_paid') + amount, updated_at=timezone.now())
+
+
+@receiver(pre_save, sender=Payment)
+def remember_previous_payment(sender, instance, **kwargs):
+    instance._ledger_previous = None
+    if instance.pk:
+        instance._ledger_previous = (
+            instance.saved_values() or Payment.objects.filter(pk=instance.pk).values(*instance.tracked_fields).first()
+        )
+
+
+@receiver(post_save, sender=Payment)
+def update_ledger_on_payment_save(sender, instance, **kwargs):
+    previous = getattr(instance, '_ledger_previous', None)
+    if previous:
+        _apply_payment(previous['tenant_id'], previous['rent_charge_id'], -previous['amount'])
+    _apply_payment(instance.tenant_id, instance.rent_charge_id, instance.amount)
+
+    # the charge object hanging off this payment is used right away (e.g. for the
+    # confirmation SMS), so pull in the new total instead of leaving it stale
+    if Payment.rent_charge.is_cached(instance):
+        instance.rent_charge.refresh_from_db(fields=['amount_paid'])
+
+
+@receiver(post_delete, sender=Payment)
+def update_ledger_on_payment_delete(sender, instance, **kwargs):
+    _apply_payment(instance.tenant_id, instance.rent_charge_id, -instance.amount)
+
+
+
+# ------------------------------
+# SMS notifications
+# ------------------------------
+# Messages are written to the outbox in the same transaction as the row that
+# triggered them and sent after commit (see services/outbox.py), so saving a
+# payment never waits on Twilio and a rollback never texts anyone.
+
 @receiver(post_save, sender=RentCharge)
 def send_rent_reminder_on_create(sender, instance, created, **kwargs):
     """
-    Send rent reminder when RentCharge is created
+    Queue a rent reminder when RentCharge is created
     Checks if reminder should be sent based on tenant's preference
     """
-    if created and instance.tenant.is_active:
-        tenant = instance.tenant
+    tenant = instance.tenant
+    if created and tenant.is_active and tenant.sms_notifications:
         days_until_due = (tenant.rent_due_date - timezone.now().date()).days
-        
-        # Send reminder if within the reminder window
+
+        # Queue reminder if within the reminder window
         if 0 <= days_until_due <= tenant.reminder_days_before:
-            logger.info(f"Sending rent reminder to {tenant.full_name}")
-            success, result = notification_service.send_rent_due_reminder(instance)
-            
-            if success:
-                logger.info(f"Rent reminder sent successfully to {tenant.full_name}")
-            else:
-                logger.error(f"Failed to send rent reminder to {tenant.full_name}: {result}")
+            logger.info(f"Queueing rent reminder for {tenant.full_name}")
+            outbox.enqueue(
+                'rent_reminder', instance.pk, tenant.phone,
+                notification_service._generate_rent_reminder(instance, days_until_due),
+                user=instance.user, tenant=tenant, rent_charge=instance,
+            )
 
 
 @receiver(post_save, sender=Payment)
 def send_payment_confirmation(sender, instance, created, **kwargs):
     """
-    Send payment confirmation SMS when payment is recorded
+    Queue a payment confirmation SMS when payment is recorded
     """
-    if created:
-        logger.info(f"Sending payment confirmation to {instance.tenant.full_name}")
-        success, result = notification_service.send_payment_confirmation(instance)
-        
-        if success:
-            logger.info(f"Payment confirmation sent to {instance.tenant.full_name}")
-        else:
-            logger.error(f"Failed to send payment confirmation: {result}")
+    if created and instance.tenant.sms_notifications:
+        logger.info(f"Queueing payment confirmation for {instance.tenant.full_name}")
+        outbox.enqueue(
+            'payment_confirmation', instance.pk, instance.tenant.phone,
+            notification_service._generate_payment_confirmation(instance),
+            user=instance.user, tenant=instance.tenant, rent_charge=instance.rent_charge,
+        )
 
 
 @receiver(post_save, sender=Tenant)
 def send_welcome_message(sender, instance, created, **kwargs):
     """
-    Send welcome message when new tenant is created and assigned to a house
+    Queue a welcome message when new tenant is created and assigned to a house
     """
-    if created and instance.house and instance.is_active:
-        logger.info(f"Sending welcome message to {instance.full_name}")
-        success, result = notification_service.send_move_in_welcome(instance)
-        
-        if success:
-            logger.info(f"Welcome message sent to {instance.full_name}")
-        else:
-            logger.error(f"Failed to send welcome message: {result}")
+    if created and instance.house and instance.is_active and instance.sms_notifications:
+        logger.info(f"Queueing welcome message for {instance.full_name}")
+        outbox.enqueue(
+            'welcome', instance.pk, instance.phone,
+            notification_service._generate_welcome_message(instance),
+            user=instance.user, tenant=instance,
+        )
 
 
 @receiver(pre_save, sender=Tenant)
@@ -81,21 +163,37 @@ def notify_on_tenant_activation(sender, instance, **kwargs):
     """
     Send notification when tenant status changes
     """
-    if instance.pk:
-        try:
-            old_instance = Tenant.objects.get(pk=instance.pk)
-            
-            # If tenant is being deactivated
-            if old_instance.is_active and not instance.is_active:
-                logger.info(f"Tenant {instance.full_name} deactivated")
-                # You can send a move-out confirmation here if needed
-                
-            # If tenant is being reactivated
-            elif not old_instance.is_active and instance.is_active:
-                logger.info(f"Tenant {instance.full_name} reactivated")
-                
-        except Tenant.DoesNotExist:
-            pass
+    if instance.pk and 'is_active' in instance.changed_fields():
+        saved = instance.saved_values()
+        was_active = saved['is_active'] if saved else Tenant.objects.filter(pk=instance.pk).values_list('is_active', flat=True).first()
+        if was_active is None:
+            return
+
+        # If tenant is being deactivated
+        if was_active and not instance.is_active:
+            logger.info(f"Tenant {instance.full_name} deactivated")
+            # You can send a move-out confirmation here if needed
+
+        # If tenant is being reactivated
+        elif not was_active and instance.is_active:
+            logger.info(f"Tenant {instance.full_name} reactivated")
+
+
+
+# ------------------------------
+# Search index
+# ------------------------------
+# Bulk inserts index their tenants themselves (services/bulk.py).
+
+@receiver(post_save, sender=Tenant)
+def index_tenant(sender, instance, created, **kwargs):
+    if created or instance.changed_fields() & {'full_name', 'email', 'phone', 'id_number'}:
+        search.index_tenants([instance])
+
+
+@receiver(post_delete, sender=Tenant)
+def unindex_tenant(sender, instance, **kwargs):
+    search.unindex_tenants([instance.pk])
 
 
 
@@ -114,10 +212,16 @@ def update_house_occupation(sender, instance, **kwargs):
         house.auto_change_occupation()
 
 
-# whenever a Tenant is created or updated
+# whenever a Tenant moves in, out or between houses
 @receiver(post_save, sender=Tenant)
-def update_house_occupation_on_save(sender, instance, **kwargs):
-    
+def update_house_occupation_on_save(sender, instance, created, **kwargs):
+    if not created and not {'house_id', 'is_active'} & instance.changed_fields():
+        return
+    previous = (instance.saved_values() or {}).get('house_id')
+    if previous and previous != instance.house_id:
+        house = House.objects.filter(pk=previous).first()
+        if house:
+            house.auto_change_occupation()
     if instance.house:
         instance.house.auto_change_occupation()
 
@@ -129,13 +233,6 @@ def set_payment_amount(sender, instance, **kwargs):
             instance.amount = instance.tenant.house.house_rent_amount
 
 
-@receiver(pre_delete, sender=Payment)
-def adjust_tenant_balance_on_delete(sender, instance, **kwargs):
-    tenant = instance.tenant
-    if tenant:
-        tenant.balance += instance.amount_paid
-
-
 @receiver([post_save, post_delete], sender=Tenant)
 def clear_tenant_cache(sender, instance, **kwargs):
     cache_key = f"tenant:{instance.id}"
@@ -143,9 +240,65 @@ def clear_tenant_cache(sender, instance, **kwargs):
 
 
 
+@receiver(post_delete, sender=House)
+def release_house_place(sender, instance, **kwargs):
+    # House.save() counts houses in, this counts them out
+    FlatBuilding.objects.filter(pk=instance.flat_building_id).update(house_count=F('house_count') - 1)
+
+
 @receiver([post_save, post_delete], sender=House)
-def clear_building_cache(sender, instance, **kwargs):
+def clear_building_cache(sender, instance, signal, created=False, **kwargs):
+    if signal is post_save and not created:
+        changed = instance.changed_fields()
+        if not changed:
+            return
+        previous = (instance.saved_values() or {}).get('flat_building_id')
+        if 'flat_building_id' in changed and previous:
+            clear_building_stats(previous)
     if instance.flat_building_id:
-        cache.delete(f"flat_{instance.flat_building_id}_occupied")
-        cache.delete(f"flat_{instance.flat_building_id}_vacant")
-        cache.delete(f"flat_{instance.flat_building_id}_tenant_count")
\ No newline at end of file
+        clear_building_stats(instance.flat_building_id)
+
+
+@receiver([post_save, post_delete], sender=FlatBuilding)
+def clear_building_cache_on_building_change(sender, instance, **kwargs):
+    # vacant depends on number_of_houses
+    clear_building_stats(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=Tenant)
+def clear_building_cache_on_tenant_change(sender, instance, signal, created=False, **kwargs):
+    # tenant_count moves without the house itself being saved
+    if signal is post_save and not created and not {'house_id', 'is_active'} & instance.changed_fields():
+        return
+    if instance.house_id:
+        if Tenant.house.is_cached(instance):
+            building_id = instance.house.flat_building_id
+        else:
+            building_id = House.objects.filter(pk=instance.house_id).values_list('flat_building_id', flat=True).first()
+        if building_id:
+            clear_building_stats(building_id)
+
+
+
+
+@receiver([post_save, post_delete], sender=FlatBuilding)
+@receiver([post_save, post_delete], sender=House)
+@receiver([post_save, post_delete], sender=Tenant)
+@receiver([post_save, post_delete], sender=RentCharge)
+@receiver([post_save, post_delete], sender=Payment)
+def invalidate_cached_resources(sender, instance, **kwargs):
+    """Drop cached API responses and the dashboard that depend on this row (see tennants.cache.DEPENDENCIES)"""
+    invalidate(sender, instance.user_id)
+
+
+@receiver(post_delete, sender=FlatBuilding)
+@receiver(post_delete, sender=House)
+@receiver(post_delete, sender=Tenant)
+@receiver(post_delete, sender=RentCharge)
+@receiver(post_delete, sender=Payment)
+def record_sync_deletion(sender, instance, origin=None, **kwargs):
+    """Tombstone for delta sync (services/sync.py)"""
+    # nothing to tell when the landlord's account itself is being deleted
+    if not instance.user_id or isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        return
+    sync.record_deletion(instance)
@@ -0,0 +1,85 @@
+from decimal import Decimal
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework.test import APIClient
+from rest_framework import status
+from tennants.models import FlatBuilding, House, Tenant, RentCharge, Payment
+
+
+class BalanceQuerySetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.flat_building = FlatBuilding.objects.create(
+            user=self.user,
+            building_name="Test Building",
+            address="123 Test Street",
+            number_of_houses=10
+        )
+        self.tenants = []
+        for i in range(3):
+            house = House.objects.create(
+                user=self.user,
+                flat_building=self.flat_building,
+                house_number=f"10{i}",
+                house_rent_amount=1000,
+            )
+            tenant = Tenant.objects.create(
+                user=self.user,
+                full_name=f"Tenant {i}",
+                email=f"tenant{i}@example.com",
+                phone=f"+25471234567{i}",
+                house=house,
+                id_number=f"ID{i}"
+            )
+            charge = RentCharge.objects.create(
+                user=self.user, tenant=tenant, year=2026, month=1, amount_due=Decimal('1000.00')
+            )
+            Payment.objects.create(
+                user=self.user, tenant=tenant, rent_charge=charge,
+                amount=Decimal('250.00') * (i + 1), payment_method='cash'
+            )
+            self.tenants.append(tenant)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_with_balances_annotations(self):
+        """Tenant.objects.with_balances() annotates totals and balance"""
+        tenant = Tenant.objects.with_balances().get(pk=self.tenants[1].pk)
+        self.assertEqual(tenant.total_due, Decimal('1000.00'))
+        self.assertEqual(tenant.total_paid, Decimal('500.00'))
+        with self.assertNumQueries(0):
+            self.assertEqual(tenant.balance, Decimal('500.00'))
+
+    def test_with_payment_totals_annotations(self):
+        """RentCharge.objects.with_payment_totals() feeds the existing properties"""
+        charges = list(RentCharge.objects.with_payment_totals().order_by('tenant_id'))
+        with self.assertNumQueries(0):
+            self.assertEqual([c.total_paid for c in charges], [Decimal('250.00'), Decimal('500.00'), Decimal('750.00')])
+            self.assertEqual(charges[2].balance, Decimal('250.00'))
+            self.assertFalse(charges[2].is_paid)
+
+        RentCharge.objects.filter(pk=charges[0].pk).update(amount_due=Decimal('250.00'))
+        self.assertTrue(RentCharge.objects.with_payment_totals().get(pk=charges[0].pk).is_paid)
+
+    def test_properties_without_annotations(self):
+        """Plain instances still compute the same values"""
+        tenant = Tenant.objects.get(pk=self.tenants[0].pk)
+        self.assertEqual(tenant.balance, Decimal('750.00'))
+
+    def test_tenant_api_list_includes_balance(self):
+        """The tenant API list serializes the annotated balance"""
+        response = self.client.get('/api/tenants/api/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        balances = [row['balance'] for row in response.data['results']]
+        self.assertEqual(balances, ['750.00', '500.00', '250.00'])
+
+    def test_rent_charge_api_list_query_count(self):
+        """Rent charge list pages cost the same number of queries regardless of rows"""
+        with self.assertNumQueries(1):  # keyset page, no COUNT unless asked for
+            response = self.client.get('/api/rent-charges/api/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['total_paid'], '250.00')
+        self.assertEqual(response.data['results'][0]['is_paid'], False)
@@ -0,0 +1,163 @@
+from datetime import timedelta
+from unittest import mock
+from decimal import Decimal
+from io import StringIO
+from django.db import transaction
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant, RentCharge, OutboxMessage
+from tennants.services.billing import bill_landlord, generate_rent_charges, landlords_to_bill, month_range, run_billing
+from tennants.services.ledger import verify_ledger
+
+
+class RentChargeGenerationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='landlord', password='testpass123')
+        building = FlatBuilding.objects.create(
+            user=self.user, building_name="Test Building", address="Street", number_of_houses=10
+        )
+        today = timezone.now().date()
+        self.tenants = []
+        for i, rent in enumerate([1000, 1500, 2000]):
+            house = House.objects.create(user=self.user, flat_building=building, house_number=f"10{i}", house_rent_amount=rent)
+            self.tenants.append(Tenant.objects.create(
+                user=self.user, full_name=f"Tenant {i}", email=f"t{i}@example.com", phone=f"+25471234567{i}",
+                house=house, id_number=f"ID{i}", rent_due_date=today + timedelta(days=2 if i == 0 else 20)
+            ))
+        self.tenants[2].is_active = False
+        self.tenants[2].save()
+
+    def test_generate_is_set_based_and_idempotent(self):
+        # load, lock, billed meanwhile, insert, ledger rebuild (3) + touching the billed tenants + its owners for
+        # cache invalidation, reminder charges, queued keys and outbox insert + savepoints; independent of tenant count
+        with self.assertNumQueries(16):
+            counts = generate_rent_charges(self.user, 2026, 5)
+        self.assertEqual(counts, {'created': 2, 'skipped': 0, 'not_found': 0})
+        self.assertEqual(
+            sorted(RentCharge.objects.values_list('tenant__full_name', 'amount_due')),
+            [("Tenant 0", Decimal('1000.00')), ("Tenant 1", Decimal('1500.00'))]
+        )
+        self.assertEqual(verify_ledger(), {'charges': [], 'tenants': []})
+        # only the tenant inside their reminder window gets one
+        reminders = OutboxMessage.objects.filter(kind='rent_reminder')
+        self.assertEqual(list(reminders.values_list('tenant', flat=True)), [self.tenants[0].pk])
+
+        counts = generate_rent_charges(self.user, 2026, 5)
+        self.assertEqual(counts, {'created': 0, 'skipped': 2, 'not_found': 0})
+        self.assertEqual(RentCharge.objects.count(), 2)
+        self.assertEqual(reminders.count(), 1)
+
+    def test_counts_only_what_this_run_inserted(self):
+        """A concurrent run that bills a tenant first gets that row counted, not this one"""
+        atomic, raced = transaction.atomic, []
+
+        def race(*args, **kwargs):
+            # the other run commits between this run's load and its transaction
+            if not raced:
+                raced.append(True)
+                RentCharge.objects.bulk_create([
+                    RentCharge(user=self.user, tenant=self.tenants[0], year=2026, month=5, amount_due=Decimal('1000.00'))
+                ])
+            return atomic(*args, **kwargs)
+
+        # on a coarse clock both runs stamp their rows with the same time
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now()), \
+                mock.patch('tennants.services.billing.transaction.atomic', side_effect=race), \
+                mock.patch('tennants.services.billing.rebuild_ledger') as rebuild:
+            counts = generate_rent_charges(self.user, 2026, 5, send_reminders=False)
+        self.assertEqual(counts, {'created': 1, 'skipped': 1, 'not_found': 0})
+        self.assertEqual(RentCharge.objects.filter(year=2026, month=5).count(), 2)
+        # only the tenant billed by this run has its ledger rebuilt
+        self.assertEqual(list(rebuild.call_args.args[0].values_list('pk', flat=True)), [self.tenants[1].pk])
+
+    def test_selected_tenants_only(self):
+        counts = generate_rent_charges(self.user, 2026, 5, tenant_ids=[self.tenants[1].pk, self.tenants[2].pk, 999])
+        self.assertEqual(counts, {'created': 1, 'skipped': 0, 'not_found': 2})
+
+    def test_api_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('rent-charge-generate')
+
+        response = client.post(url, {'year': 2026, 'month': 5}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data, {'created': 2, 'skipped': 0, 'not_found': 0})
+
+        response = client.post(url, {'year': 2026, 'month': 5}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['skipped'], 2)
+
+        response = client.post(url, {'year': 2026, 'month': 13}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command('generate_rent_charges', '--year', '2026', '--month', '5', stdout=out)
+        self.assertIn("landlord: 2 created, 0 skipped", out.getvalue())
+        self.assertEqual(RentCharge.objects.filter(year=2026, month=5).count(), 2)
+
+
+class BillingRunTest(TestCase):
+    def setUp(self):
+        self.landlords = []
+        for n in range(2):
+            user = User.objects.create_user(username=f'landlord{n}', password='testpass123')
+            building = FlatBuilding.objects.create(
+                user=user, building_name=f"Building {n}", address="Street", number_of_houses=5
+            )
+            for i in range(2):
+                house = House.objects.create(user=user, flat_building=building, house_number=f"{n}0{i}", house_rent_amount=1000)
+                Tenant.objects.create(
+                    user=user, full_name=f"Tenant {n}{i}", email=f"t{n}{i}@example.com", phone=f"+2547123456{n}{i}",
+                    house=house, id_number=f"ID{n}{i}", rent_due_date=timezone.now().date()
+                )
+            self.landlords.append(user)
+        OutboxMessage.objects.all().delete()
+
+    def test_month_range(self):
+        self.assertEqual(month_range((2025, 11), (2026, 2)), [(2025, 11), (2025, 12), (2026, 1), (2026, 2)])
+        self.assertEqual(month_range((2026, 3), (2026, 2)), [])
+
+    def test_backfill_is_resumable(self):
+        """A rerun only fills in what is missing and backfilled months send no reminders"""
+        months = month_range((2025, 1), (2025, 12))
+        RentCharge.objects.create(
+            user=self.landlords[0], tenant=Tenant.objects.filter(user=self.landlords[0]).first(),
+            year=2025, month=6, amount_due=Decimal('1000.00')
+        )
+        OutboxMessage.objects.all().delete()
+        progress = []
+        summary = run_billing(months, processes=2, progress=lambda done, total, result: progress.append((done, total)))
+
+        self.assertEqual((summary['landlords'], summary['created'], summary['skipped']), (2, 47, 1))
+        self.assertEqual(progress, [(1, 2), (2, 2)])
+        self.assertEqual(RentCharge.objects.count(), 48)
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertEqual(verify_ledger(), {'charges': [], 'tenants': []})
+
+        summary = run_billing(months, user_ids=[self.landlords[1].pk])
+        self.assertEqual((summary['created'], summary['skipped']), (0, 24))
+
+    def test_tenants_without_a_landlord_are_not_billed(self):
+        building = FlatBuilding.objects.create(building_name="Orphan", address="Street", number_of_houses=1)
+        house = House.objects.create(flat_building=building, house_number="1", house_rent_amount=1000)
+        Tenant.objects.create(full_name="Orphan", email="orphan@example.com", phone="+254799000111",
+                              house=house, id_number="ORPHAN")
+        self.assertEqual(landlords_to_bill(), [user.pk for user in self.landlords])
+
+        summary = run_billing([(2026, 1)])
+        self.assertEqual((summary['landlords'], summary['created']), (2, 4))
+
+    def test_missing_landlord_is_skipped(self):
+        result = bill_landlord(99999, [(2026, 1)])
+        self.assertEqual((result['created'], result['skipped']), (0, 0))
+
+    def test_run_monthly_billing_command(self):
+        out = StringIO()
+        call_command('run_monthly_billing', '--from', '2026-01', '--to', '2026-02', '--user', 'landlord0', stdout=out)
+        self.assertIn("[1/1] user", out.getvalue())
+        self.assertIn("Done: 4 created, 0 skipped for 1 landlord(s)", out.getvalue())
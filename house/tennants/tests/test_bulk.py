@@ -0,0 +1,160 @@
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant, TenantLedger, RentCharge, Payment, OutboxMessage
+from tennants.services import bulk
+
+
+@override_settings(SMS_OUTBOX={'DELIVERY': 'manual'})
+class BulkCreateTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.building = FlatBuilding.objects.create(
+            user=self.user, building_name="Sunrise", address="Street", number_of_houses=5
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def add_houses(self, count):
+        response = self.client.post(reverse('house-bulk'), [
+            {'flat_building': self.building.pk, 'house_number': f"{i}", 'house_rent_amount': '1000.00'}
+            for i in range(count)
+        ], format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return response.data['ids']
+
+    def tenant_row(self, i, house_id, **extra):
+        return {
+            'full_name': f"Tenant {i}", 'email': f"t{i}@example.com", 'phone': f"+25471234567{i}",
+            'id_number': f"ID{i}", 'house': house_id,
+            'rent_due_date': str(timezone.now().date() + timedelta(days=2)), **extra
+        }
+
+    def test_buildings(self):
+        response = self.client.post(reverse('flat-bulk'), [
+            {'building_name': "North", 'address': "Street", 'number_of_houses': 3},
+            {'building_name': "South", 'address': "Street", 'number_of_houses': 4},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(FlatBuilding.objects.filter(user=self.user, pk__in=response.data['ids']).count(), 2)
+
+    def test_houses_validated_as_a_set(self):
+        with self.assertNumQueries(6):  # two checks, one INSERT and the house_count UPDATE in a savepoint, whatever the batch size
+            ids = self.add_houses(3)
+        self.assertEqual(House.objects.filter(pk__in=ids, user=self.user).count(), 3)
+
+        response = self.client.post(reverse('house-bulk'), [
+            {'flat_building': self.building.pk, 'house_number': "0", 'house_rent_amount': '1000.00'},
+            {'flat_building': self.building.pk, 'house_number': "7", 'house_rent_amount': '1000.00'},
+            {'flat_building': self.building.pk, 'house_number': "8", 'house_rent_amount': '1000.00'},
+            {'flat_building': self.building.pk, 'house_number': "9", 'house_rent_amount': 'lots'},
+            {'flat_building': 999, 'house_number': "1"},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = {row['index']: row['errors'] for row in response.data['errors']}
+        self.assertEqual(sorted(errors), [0, 3, 4])
+        self.assertIn('house_number', errors[0])   # already exists
+        self.assertIn('house_rent_amount', errors[3])
+        self.assertIn('flat_building', errors[4])
+        # 0 is rejected, so 7 and 8 still fit in the building; nothing was written
+        self.assertEqual(House.objects.count(), 3)
+
+    def test_capacity_counts_the_batch(self):
+        self.add_houses(4)
+        response = self.client.post(reverse('house-bulk'), [
+            {'flat_building': self.building.pk, 'house_number': n} for n in ("a", "b")
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([row['index'] for row in response.data['errors']], [1])
+
+    def test_building_filled_meanwhile_is_a_conflict(self):
+        self.add_houses(3)
+        rows = {i: {'flat_building_id': self.building.pk, 'house_number': f"N{i}"} for i in range(2)}
+        self.assertEqual(bulk.validate_houses(self.user, rows), {})
+        House.objects.create(user=self.user, flat_building=self.building, house_number="late")  # a concurrent save
+
+        with self.assertRaises(IntegrityError):
+            bulk.create_houses(self.user, list(rows.values()))
+        self.assertFalse(House.objects.filter(house_number__startswith="N").exists())
+        self.building.refresh_from_db()
+        self.assertEqual(self.building.house_count, 4)
+
+        with mock.patch.dict(bulk.RESOURCES, houses=(lambda user, rows: {}, bulk.create_houses)):
+            response = self.client.post(reverse('house-bulk'), [
+                {'flat_building': self.building.pk, 'house_number': f"N{i}"} for i in range(2)
+            ], format='json')
+        self.assertEqual(response.status_code, 409)
+
+    def test_tenants_post_processing(self):
+        house_ids = self.add_houses(3)
+        rows = [self.tenant_row(i, house_id) for i, house_id in enumerate(house_ids)]
+        response = self.client.post(reverse('tenant-bulk'), rows, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        self.assertEqual(House.objects.filter(occupation=True).count(), 3)
+        self.assertEqual(TenantLedger.objects.filter(tenant__in=response.data['ids']).count(), 3)
+        self.assertEqual(OutboxMessage.objects.filter(kind='welcome').count(), 3)
+        self.assertEqual(FlatBuilding.objects.with_occupancy().get().occupied_count, 3)
+
+    def test_tenant_conflicts(self):
+        house_ids = self.add_houses(2)
+        self.client.post(reverse('tenant-bulk'), [self.tenant_row(0, house_ids[0])], format='json')
+        response = self.client.post(reverse('tenant-bulk'), [
+            self.tenant_row(1, house_ids[0]),                        # house taken
+            self.tenant_row(2, house_ids[1]),
+            self.tenant_row(3, house_ids[1], email="t2@example.com"),  # house and email taken in the batch
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        errors = {row['index']: row['errors'] for row in response.data['errors']}
+        self.assertEqual(sorted(errors), [0, 2])
+        self.assertEqual(set(errors[2]), {'house', 'email'})
+        self.assertEqual(Tenant.objects.count(), 1)
+
+    def test_payments_update_ledger_once(self):
+        house_ids = self.add_houses(2)
+        tenant_ids = self.client.post(
+            reverse('tenant-bulk'), [self.tenant_row(i, h) for i, h in enumerate(house_ids)], format='json'
+        ).data['ids']
+        charges = RentCharge.objects.bulk_create([
+            RentCharge(user=self.user, tenant_id=pk, year=2026, month=1, amount_due=Decimal('1000.00')) for pk in tenant_ids
+        ])
+        response = self.client.post(reverse('payment-bulk'), [
+            {'tenant': charges[0].tenant_id, 'rent_charge': charges[0].pk, 'amount': '300.00', 'payment_method': 'cash'},
+            {'tenant': charges[0].tenant_id, 'rent_charge': charges[0].pk, 'amount': '200.00', 'payment_method': 'cash'},
+            {'tenant': charges[1].tenant_id, 'rent_charge': charges[1].pk, 'amount': '0', 'payment_method': 'cash'},
+        ], format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+
+        charges[0].refresh_from_db()
+        self.assertEqual(charges[0].amount_paid, Decimal('500.00'))
+        self.assertEqual(TenantLedger.objects.get(tenant_id=tenant_ids[0]).balance, Decimal('500.00'))
+        self.assertEqual(TenantLedger.objects.get(tenant_id=tenant_ids[1]).balance, Decimal('0.00'))
+        self.assertEqual(OutboxMessage.objects.filter(kind='payment_confirmation').count(), 3)
+
+    def test_payment_rules(self):
+        other = User.objects.create_user(username='other', password='testpass123')
+        house_ids = self.add_houses(1)
+        tenant_id = self.client.post(reverse('tenant-bulk'), [self.tenant_row(0, house_ids[0])], format='json').data['ids'][0]
+        charge = RentCharge.objects.create(user=self.user, tenant_id=tenant_id, year=2026, month=1, amount_due=Decimal('1000.00'))
+        foreign = RentCharge.objects.create(user=other, tenant_id=tenant_id, year=2026, month=2, amount_due=Decimal('1000.00'))
+        response = self.client.post(reverse('payment-bulk'), [
+            {'tenant': tenant_id, 'rent_charge': charge.pk, 'amount': '10.00', 'payment_method': 'mobile_money'},
+            {'tenant': tenant_id, 'rent_charge': foreign.pk, 'amount': '10.00', 'payment_method': 'cash'},
+        ], format='json')
+        errors = {row['index']: row['errors'] for row in response.data['errors']}
+        self.assertIn('payment_reference', errors[0])
+        self.assertIn('rent_charge', errors[1])
+        self.assertFalse(Payment.objects.exists())
+
+    def test_payload_must_be_a_list(self):
+        self.assertEqual(self.client.post(reverse('flat-bulk'), {'building_name': "x"}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(reverse('flat-bulk'), [], format='json').status_code, 400)
@@ -0,0 +1,166 @@
+from datetime import date
+import threading
+import time
+from decimal import Decimal
+from django.test import TestCase, SimpleTestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from tennants import cache as response_cache
+from tennants.cache import DEPENDENCIES
+from tennants.models import FlatBuilding, House, Tenant, RentCharge, Payment
+from tennants.services.billing import generate_rent_charges
+
+
+class GenerationCounterTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_changes_only_that_namespace(self):
+        tenants = response_cache.response_key(1, 'tenants', '/api/tenants/api/')
+        houses = response_cache.response_key(1, 'houses', '/api/houses/api/')
+        other_user = response_cache.response_key(2, 'tenants', '/api/tenants/api/')
+        self.assertEqual(tenants, response_cache.response_key(1, 'tenants', '/api/tenants/api/'))
+
+        response_cache.bump(1, 'tenants')
+        self.assertNotEqual(tenants, response_cache.response_key(1, 'tenants', '/api/tenants/api/'))
+        self.assertEqual(houses, response_cache.response_key(1, 'houses', '/api/houses/api/'))
+        self.assertEqual(other_user, response_cache.response_key(2, 'tenants', '/api/tenants/api/'))
+
+    def test_lost_counter_never_goes_back(self):
+        """A counter that is evicted restarts above its old value"""
+        before = response_cache.generations(1, ['tenants'])['tenants']
+        cache.delete("gen:1:tenants")
+        response_cache.bump(1, 'tenants')
+        self.assertGreater(response_cache.generations(1, ['tenants'])['tenants'], before)
+
+
+class ResponseCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_create_invalidates_cached_list(self):
+        url = reverse('flat-list')
+        self.assertEqual(self.client.get(url).data['count'], 0)
+        FlatBuilding.objects.bulk_create([
+            FlatBuilding(user=self.user, building_name="Hidden", address="Street", number_of_houses=1)
+        ])
+        # served from the cache, the signal-less insert isn't seen
+        self.assertEqual(self.client.get(url).data['count'], 0)
+
+        response = self.client.post(url, {'building_name': "New", 'address': "Street", 'number_of_houses': 2})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get(url).data['count'], 2)
+
+    def test_stats_endpoint_is_for_superusers(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='landlord', password='testpass123', is_staff=True))
+        self.assertEqual(client.get(reverse('cache-stats')).status_code, 403)
+        client.force_authenticate(User.objects.create_superuser(username='root', password='testpass123'))
+        response = client.get(reverse('cache-stats'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hit_ratio', response.data)
+
+
+class DependencyInvalidationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.building = FlatBuilding.objects.create(
+            user=self.user, building_name="Sunrise", address="Street", number_of_houses=5
+        )
+        self.house = House.objects.create(
+            user=self.user, flat_building=self.building, house_number="101", house_rent_amount=1000
+        )
+        self.tenant = Tenant.objects.create(
+            user=self.user, full_name="John Doe", email="john@example.com", phone="+254712345678",
+            house=self.house, id_number="12345678", rent_due_date=date(2026, 3, 5)
+        )
+        self.charge = RentCharge.objects.create(
+            user=self.user, tenant=self.tenant, year=2026, month=1, amount_due=Decimal('1000.00')
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_every_user_owned_model_is_mapped(self):
+        for model in (FlatBuilding, House, Tenant, RentCharge, Payment):
+            self.assertIn(model.__name__, DEPENDENCIES)
+
+    def test_detail_update_and_delete_invalidate_list(self):
+        url = reverse('flat-list')
+        self.client.get(url)
+        response = self.client.patch(reverse('flat-detail', args=[self.building.pk]), {'building_name': "Sunset"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(url).data['results'][0]['building_name'], "Sunset")
+
+    def test_payment_refreshes_tenant_balances(self):
+        url = reverse('tenant-list')
+        self.assertEqual(self.client.get(url).data['results'][0]['balance'], '1000.00')
+        Payment.objects.create(
+            user=self.user, tenant=self.tenant, rent_charge=self.charge, amount=Decimal('400.00'), payment_method='cash'
+        )
+        self.assertEqual(self.client.get(url).data['results'][0]['balance'], '600.00')
+
+    def test_signal_driven_occupancy_change_refreshes_houses(self):
+        url = reverse('house-list')
+        self.assertTrue(self.client.get(url).data['results'][0]['occupation'])
+        self.tenant.is_active = False
+        self.tenant.save()  # House.auto_change_occupation saves the house
+        self.assertFalse(self.client.get(url).data['results'][0]['occupation'])
+
+    def test_bulk_billing_refreshes_rent_charges(self):
+        url = reverse('rent-charge-list')
+        self.assertEqual(len(self.client.get(url).data['results']), 1)
+        generate_rent_charges(self.user, 2026, 2, send_reminders=False)
+        self.assertEqual(len(self.client.get(url).data['results']), 2)
+
+
+class SingleFlightTest(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return {'build': self.builds}
+
+    def page(self, path='/api/flats/'):
+        return response_cache.get_or_build(1, 'flats', path, self.build)
+
+    def test_hit_and_miss(self):
+        self.assertEqual(self.page(), ({'build': 1}, False))
+        self.assertEqual(self.page(), ({'build': 1}, False))
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(response_cache.cache_stats(), {'hit': 1, 'miss': 1, 'stale': 0, 'hit_ratio': 0.5})
+
+    def test_rebuild_in_progress_serves_previous_copy(self):
+        self.page()
+        response_cache.bump(1, 'flats')
+        key = f"lock:page:1:flats:{response_cache._digest('/api/flats/')}"
+        cache.add(key, 'another-worker', 10)
+        self.assertEqual(self.page(), ({'build': 1}, True))
+        self.assertEqual(self.builds, 1)
+
+        cache.delete(key)
+        self.assertEqual(self.page(), ({'build': 2}, False))
+        self.assertEqual(response_cache.cache_stats()['stale'], 1)
+
+    def test_soft_expiry_rebuilds(self):
+        self.page()
+        key = f"page:1:flats:{response_cache._digest('/api/flats/')}"
+        entry = cache.get(key)
+        entry['fresh_until'] = 0
+        cache.set(key, entry)
+        self.assertEqual(self.page(), ({'build': 2}, False))
+
+    def test_nothing_to_serve_waits_for_builder(self):
+        digest = response_cache._digest('/api/flats/')
+        cache.add(f"lock:page:1:flats:{digest}", 'another-worker', 10)
+        entry = {'version': response_cache.resource_version(1, 'flats'), 'fresh_until': time.time() + 60, 'data': 'theirs'}
+        threading.Timer(0.1, cache.set, [f"page:1:flats:{digest}", entry]).start()
+        self.assertEqual(self.page(), ('theirs', False))
+        self.assertEqual(self.builds, 0)
@@ -0,0 +1,61 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.building = FlatBuilding.objects.create(
+            user=self.user, building_name="Sunrise", address="Street", number_of_houses=5
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_unchanged_list_is_not_modified(self):
+        url = reverse('flat-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn('no-cache', response['Cache-Control'])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+        self.assertFalse(response.content)
+
+    def test_write_changes_etag(self):
+        url = reverse('flat-list')
+        etag = self.client.get(url)['ETag']
+        self.client.patch(reverse('flat-detail', args=[self.building.pk]), {'building_name': "Sunset"})
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['results'][0]['building_name'], "Sunset")
+
+    def test_detail_and_dependent_resources(self):
+        url = reverse('flat-detail', args=[self.building.pk])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # the etag is per path, another building doesn't match
+        other = FlatBuilding.objects.create(user=self.user, building_name="Other", address="Street", number_of_houses=1)
+        self.assertEqual(self.client.get(reverse('flat-detail', args=[other.pk]), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        houses = reverse('house-list')
+        etag = self.client.get(houses)['ETag']
+        House.objects.create(user=self.user, flat_building=self.building, house_number="101", house_rent_amount=1000)
+        self.assertEqual(self.client.get(houses, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_etags_are_per_user(self):
+        url = reverse('flat-list')
+        etag = self.client.get(url)['ETag']
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='other', password='testpass123'))
+        self.assertEqual(other.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
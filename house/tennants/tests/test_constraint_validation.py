@@ -0,0 +1,131 @@
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from tennants.models import FlatBuilding, House, Tenant
+from tennants.services import bulk
+
+
+@override_settings(SMS_OUTBOX={'DELIVERY': 'manual'})
+class ConstraintValidationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.building = FlatBuilding.objects.create(user=self.user, building_name="Sunrise", address="Street", number_of_houses=2)
+        self.house = House.objects.create(user=self.user, flat_building=self.building, house_number="101", house_rent_amount=1000)
+        self.tenant = Tenant.objects.create(user=self.user, house=self.house, full_name="John Kamau", email="john@example.com",
+                                            phone="+254712345678", id_number="12345678")
+
+    def new_tenant(self, **fields):
+        values = {'user': self.user, 'full_name': "Mary Wanjiku", 'email': "mary@example.com",
+                  'phone': "+254722000111", 'id_number': "87654321", **fields}
+        return Tenant(**values)
+
+    def test_saves_leave_the_checks_to_the_database(self):
+        house = House.objects.get(pk=self.house.pk)
+        house.house_rent_amount = 1200
+        with self.assertNumQueries(3):  # the UPDATE in a savepoint
+            house.save()
+        with self.assertNumQueries(4):  # house_count UPDATE and INSERT in a savepoint
+            House.objects.create(user=self.user, flat_building=self.building, house_number="102")
+
+    def test_one_active_tenant_per_house(self):
+        with self.assertRaises(ValidationError) as raised:
+            self.new_tenant(house=self.house).save()
+        self.assertIn("is already occupied by another tenant", str(raised.exception))
+        self.assertFalse(Tenant.objects.filter(email="mary@example.com").exists())
+
+        # past tenants don't count
+        self.new_tenant(house=self.house, is_active=False).save()
+        self.tenant.is_active = False
+        self.tenant.save()
+        self.new_tenant(house=self.house, email="ann@example.com", phone="+254733000222", id_number="11111111").save()
+
+    def test_inactive_tenant_in_an_occupied_house_passes_full_clean(self):
+        tenant = self.new_tenant(house=self.house, is_active=False)
+        tenant.full_clean()
+        tenant.is_active = True
+        with self.assertRaises(ValidationError) as raised:
+            tenant.full_clean()
+        self.assertIn("is already occupied by another tenant", str(raised.exception))
+
+    def test_unique_fields_keep_their_messages(self):
+        with self.assertRaises(ValidationError) as raised:
+            self.new_tenant(email="john@example.com").save()
+        self.assertIn('email', raised.exception.message_dict)
+
+        with self.assertRaises(ValidationError) as raised:
+            self.new_tenant(id_number="12345678").save()
+        self.assertIn("ID number 12345678 is already in use", str(raised.exception))
+
+    def test_field_errors_still_raised(self):
+        with self.assertRaises(ValidationError) as raised:
+            self.new_tenant(email="not an email").save()
+        self.assertIn('email', raised.exception.message_dict)
+        with self.assertRaises(ValidationError):
+            House(user=self.user, flat_building=self.building, house_number="103", house_rent_amount=-5).save()
+
+    def test_building_capacity_uses_the_counter(self):
+        self.building.refresh_from_db()
+        self.assertEqual(self.building.house_count, 1)
+        House.objects.create(user=self.user, flat_building=self.building, house_number="102")
+        with self.assertRaises(ValidationError) as raised:
+            House.objects.create(user=self.user, flat_building=self.building, house_number="103")
+        self.assertIn("Cannot add more houses to Sunrise. Limit reached.", str(raised.exception))
+        self.building.refresh_from_db()
+        self.assertEqual(self.building.house_count, 2)
+        self.assertEqual(self.building.houses.count(), 2)
+
+    def test_duplicate_house_number_does_not_take_a_place(self):
+        with self.assertRaises(ValidationError) as raised:
+            House.objects.create(user=self.user, flat_building=self.building, house_number="101")
+        self.assertIn("House number 101 already exists in Sunrise", str(raised.exception))
+        self.building.refresh_from_db()
+        self.assertEqual(self.building.house_count, 1)
+
+    def test_counter_follows_moves_deletes_and_bulk_inserts(self):
+        other = FlatBuilding.objects.create(user=self.user, building_name="Sunset", address="Road", number_of_houses=5)
+        house = House.objects.get(pk=self.house.pk)
+        house.flat_building = other
+        house.save()
+        bulk.create_houses(self.user, [
+            {'flat_building_id': other.pk, 'house_number': str(i)} for i in range(3)
+        ] + [{'flat_building_id': self.building.pk, 'house_number': "9"}])
+        self.building.refresh_from_db()
+        other.refresh_from_db()
+        self.assertEqual((self.building.house_count, other.house_count), (1, 4))
+
+        house.delete()
+        other.refresh_from_db()
+        self.assertEqual(other.house_count, 3)
+
+
+class ActiveTenantMigrationTest(TransactionTestCase):
+    before = [('tennants', '0007_tenant_search_index')]
+    after = [('tennants', '0008_house_count_and_active_tenant_constraint')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_duplicate_active_tenants_are_deactivated(self):
+        apps = self.migrate(self.before)
+        user = apps.get_model('auth', 'User').objects.create(username='legacy')
+        building = apps.get_model('tennants', 'FlatBuilding').objects.create(
+            user_id=user.pk, building_name="Old", address="Street", number_of_houses=2)
+        house = apps.get_model('tennants', 'House').objects.create(user_id=user.pk, flat_building=building, house_number="1")
+        Tenant = apps.get_model('tennants', 'Tenant')
+        first, second = [
+            Tenant.objects.create(user_id=user.pk, house=house, full_name=f"Tenant {i}", email=f"t{i}@example.com",
+                                  phone=f"+25471234567{i}", id_number=f"ID{i}")
+            for i in range(2)
+        ]
+        try:
+            apps = self.migrate(self.after)
+            Tenant = apps.get_model('tennants', 'Tenant')
+            self.assertEqual(list(Tenant.objects.filter(is_active=True).values_list('pk', flat=True)), [second.pk])
+            self.assertFalse(Tenant.objects.get(pk=first.pk).is_active)
+        finally:
+            self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
@@ -0,0 +1,83 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant, RentCharge, Payment
+from tennants.services.dashboard import compute_snapshot, dashboard_snapshot
+
+
+class DashboardSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.today = timezone.now().date()
+        self.user = User.objects.create_user(username='landlord', password='testpass123')
+        other = User.objects.create_user(username='other', password='testpass123')
+        building = FlatBuilding.objects.create(
+            user=self.user, building_name="Sunrise", address="Street", number_of_houses=4
+        )
+        FlatBuilding.objects.create(user=other, building_name="Elsewhere", address="Street", number_of_houses=4)
+        self.tenants = []
+        for i, rent in enumerate([1000, 2000, 3000]):
+            house = House.objects.create(user=self.user, flat_building=building, house_number=f"10{i}", house_rent_amount=rent)
+            if i < 2:
+                self.tenants.append(Tenant.objects.create(
+                    user=self.user, full_name=f"Tenant {i}", email=f"t{i}@example.com", phone=f"+25471234567{i}",
+                    house=house, id_number=f"ID{i}", rent_due_date=date(2026, 3, 5)
+                ))
+
+        # this month: both billed, tenant 0 paid 600
+        current = self.charge(self.tenants[0], self.today.year, self.today.month, '1000.00')
+        self.charge(self.tenants[1], self.today.year, self.today.month, '2000.00')
+        self.pay(current, '600.00')
+        # arrears: tenant 1 owes 500 from an earlier year, fully paid charge doesn't count
+        old = self.charge(self.tenants[1], self.today.year - 1, 1, '2000.00')
+        self.pay(old, '1500.00')
+        paid = self.charge(self.tenants[0], self.today.year - 1, 1, '1000.00')
+        self.pay(paid, '1000.00')
+
+    def charge(self, tenant, year, month, amount):
+        return RentCharge.objects.create(user=self.user, tenant=tenant, year=year, month=month, amount_due=Decimal(amount))
+
+    def pay(self, charge, amount):
+        return Payment.objects.create(
+            user=self.user, tenant=charge.tenant, rent_charge=charge, amount=Decimal(amount), payment_method='cash'
+        )
+
+    def test_snapshot_numbers(self):
+        with self.assertNumQueries(2):
+            snapshot = compute_snapshot(self.user)
+        self.assertEqual(snapshot['total_buildings'], 1)
+        self.assertEqual((snapshot['total_houses'], snapshot['occupied_houses'], snapshot['vacant_houses']), (3, 2, 1))
+        self.assertEqual(snapshot['active_tenants'], 2)
+        self.assertEqual(snapshot['percent_occupied'], 66.67)
+        self.assertEqual(snapshot['rent_roll'], Decimal('3000.00'))
+        self.assertEqual(snapshot['billed_this_month'], Decimal('3000.00'))
+        self.assertEqual(snapshot['collected_this_month'], Decimal('600.00'))
+        self.assertEqual(snapshot['outstanding_this_month'], Decimal('2400.00'))
+        self.assertEqual((snapshot['arrears'], snapshot['tenants_in_arrears']), (Decimal('500.00'), 1))
+
+    def test_snapshot_cached_until_data_changes(self):
+        dashboard_snapshot(self.user)
+        with self.assertNumQueries(0):
+            dashboard_snapshot(self.user)
+
+        self.pay(RentCharge.objects.get(tenant=self.tenants[1], year=self.today.year - 1), '500.00')
+        snapshot = dashboard_snapshot(self.user)
+        self.assertEqual((snapshot['arrears'], snapshot['tenants_in_arrears']), (Decimal('0.00'), 0))
+
+    def test_web_and_json_share_numbers(self):
+        self.client.force_login(self.user)
+        page = self.client.get(reverse('dashboard'))
+        self.assertEqual(page.status_code, 200)
+        self.assertEqual(page.context['outstanding_this_month'], Decimal('2400.00'))
+        self.assertEqual(len(page.context['unpaid_charges']), 3)
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        data = client.get(reverse('dashboard-api')).data
+        self.assertEqual(data['outstanding_this_month'], page.context['outstanding_this_month'])
+        self.assertEqual(data['occupied_houses'], 2)
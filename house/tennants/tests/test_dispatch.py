@@ -0,0 +1,142 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+import requests
+import threading
+import time
+from django.test import TestCase, SimpleTestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+from tennants.models import FlatBuilding, House, Tenant, RentCharge
+from tennants.services.dispatch import FakeSMSServer, HTTPTransport, SMSDispatcher, SMSMessage
+from tennants.services.reminders import reminder_candidates, send_reminders
+from tennants.services.sms import LocMemSMSClient, TwilioNotificationService
+
+
+class FlakyTransport:
+    """Fails the first `failures` calls per number, then succeeds"""
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = {}
+
+    def send(self, to, body):
+        self.calls[to] = self.calls.get(to, 0) + 1
+        if self.calls[to] <= self.failures:
+            raise ConnectionError("provider unavailable")
+        return f"SID-{to}"
+
+
+class RejectingTransport:
+    """Fails every call with `error`, counting them"""
+    def __init__(self, error):
+        self.error = error
+        self.calls = 0
+
+    def send(self, to, body):
+        self.calls += 1
+        raise self.error
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class SMSDispatcherTest(SimpleTestCase):
+    def messages(self, count):
+        return [SMSMessage(f"+2547000000{i:02d}", f"message {i}", reference=i) for i in range(count)]
+
+    def test_dispatch_against_fake_server(self):
+        """Messages go through the HTTP transport concurrently and are tracked per message"""
+        with FakeSMSServer(latency=0.05) as server:
+            report = SMSDispatcher(HTTPTransport(server.url), workers=10, rate_per_second=0).dispatch(self.messages(20))
+
+        self.assertEqual(report.sent, 20)
+        self.assertEqual(len(server.received), 20)
+        self.assertEqual([r.message.reference for r in report.results], list(range(20)))
+        self.assertTrue(all(r.result.startswith("FK") for r in report.results))
+        # 20 x 50ms serially would take a second
+        self.assertLess(report.elapsed, 0.8)
+        self.assertGreater(report.throughput, 25)
+
+    def test_retry_with_backoff(self):
+        """Transient failures are retried up to max_retries"""
+        report = SMSDispatcher(FlakyTransport(failures=2), workers=2, rate_per_second=0,
+                               max_retries=2, backoff=0.001).dispatch(self.messages(3))
+        self.assertEqual(report.sent, 3)
+        self.assertTrue(all(r.attempts == 3 for r in report.results))
+
+        report = SMSDispatcher(FlakyTransport(failures=5), workers=2, rate_per_second=0,
+                               max_retries=1, backoff=0.001).dispatch(self.messages(2))
+        self.assertEqual(report.failed, 2)
+        self.assertEqual(report.results[0].result, "provider unavailable")
+
+    def test_only_transient_failures_are_retried(self):
+        for error, calls in [(http_error(400), 1), (requests.ReadTimeout("read timed out"), 1), (ValueError("bad"), 1),
+                             (http_error(429), 3), (http_error(503), 3), (requests.ConnectTimeout("no route"), 3)]:
+            transport = RejectingTransport(error)
+            report = SMSDispatcher(transport, workers=1, rate_per_second=0, max_retries=2, backoff=0.001).dispatch(self.messages(1))
+            self.assertEqual(transport.calls, calls, error)
+            self.assertEqual(report.results[0].retryable, calls > 1, error)
+
+    def test_http_transport_session_per_thread(self):
+        transport = HTTPTransport("http://127.0.0.1/messages")
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(transport.session))
+        thread.start()
+        thread.join()
+        self.assertIs(transport.session, transport.session)
+        self.assertIsNot(transport.session, sessions[0])
+
+    def test_rate_limit(self):
+        """The per-second limit holds across worker threads"""
+        started = time.monotonic()
+        SMSDispatcher(FlakyTransport(failures=0), workers=5, rate_per_second=50).dispatch(self.messages(11))
+        self.assertGreaterEqual(time.monotonic() - started, 0.19)
+
+    def test_loadtest_command(self):
+        """sms_loadtest reports throughput against the built-in fake server"""
+        out = StringIO()
+        call_command('sms_loadtest', '--messages', '30', '--workers', '10', '--latency', '0.01', stdout=out)
+        self.assertIn("30 sent", out.getvalue())
+        self.assertIn("msg/s", out.getvalue())
+
+
+class RentReminderDispatchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        building = FlatBuilding.objects.create(
+            user=self.user, building_name="Test Building", address="Street", number_of_houses=5
+        )
+        today = timezone.now().date()
+        self.charges = []
+        for i, days in enumerate([1, 2, 10]):
+            house = House.objects.create(user=self.user, flat_building=building, house_number=f"10{i}", house_rent_amount=1000)
+            tenant = Tenant.objects.create(
+                user=self.user, full_name=f"Tenant {i}", email=f"t{i}@example.com", phone=f"+25471234567{i}",
+                house=house, id_number=f"ID{i}", rent_due_date=today + timedelta(days=days)
+            )
+            charge = RentCharge.objects.create(
+                user=self.user, tenant=tenant, year=today.year, month=today.month, amount_due=Decimal('1000.00')
+            )
+            self.charges.append(charge)
+        RentCharge.objects.update(reminder_sent=False)
+
+    def test_reminders_dispatched_and_marked(self):
+        """Tenants inside their window get one reminder and their charges are marked"""
+        sms = LocMemSMSClient()
+        notifier = TwilioNotificationService(client=sms, from_number="+15550000000")
+
+        candidates = reminder_candidates(user=self.user)
+        self.assertEqual([c.pk for c, _ in candidates], [self.charges[0].pk, self.charges[1].pk])
+
+        report = send_reminders(candidates, notifier, rate_per_second=0)
+        self.assertEqual(report.sent, 2)
+        self.assertEqual(len(sms.outbox), 2)
+        self.assertEqual(
+            set(RentCharge.objects.filter(reminder_sent=True).values_list('pk', flat=True)),
+            {self.charges[0].pk, self.charges[1].pk}
+        )
+        self.assertEqual(reminder_candidates(user=self.user), [])
@@ -0,0 +1,92 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.urls import reverse
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant, RentCharge, Payment
+import csv
+import json
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='landlord', password='testpass123')
+        self.tenants = []
+        for b, name in enumerate(["North", "South"]):
+            building = FlatBuilding.objects.create(user=self.user, building_name=name, address="Street", number_of_houses=2)
+            house = House.objects.create(user=self.user, flat_building=building, house_number=f"{b}01", house_rent_amount=1000)
+            self.tenants.append(Tenant.objects.create(
+                user=self.user, full_name=f"Tenant {b}", email=f"t{b}@example.com", phone=f"+25471234567{b}",
+                house=house, id_number=f"ID{b}", rent_due_date=date(2026, 3, 5)
+            ))
+        for month in (1, 2, 3):
+            for tenant in self.tenants:
+                charge = RentCharge.objects.create(user=self.user, tenant=tenant, year=2026, month=month, amount_due=Decimal('1000.00'))
+                Payment.objects.create(
+                    user=self.user, tenant=tenant, rent_charge=charge, amount=Decimal('400.00'), payment_method='cash'
+                )
+        self.north = self.tenants[0].house.flat_building_id
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def download(self, resource, **params):
+        response = self.client.get(reverse('export', args=[resource]), params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_tenants_csv_with_balances(self):
+        with self.assertNumQueries(1):
+            rows = list(csv.DictReader(self.download('tenants').splitlines()))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['building'], "North")
+        self.assertEqual(rows[0]['phone'], "+254712345670")
+        self.assertEqual(Decimal(rows[0]['balance']), Decimal('1800.00'))
+
+    def test_rent_charges_ndjson_filtered(self):
+        lines = self.download('rent_charges', output='ndjson', start='2026-02-01', end='2026-03-31', building=self.north)
+        rows = [json.loads(line) for line in lines.splitlines()]
+        self.assertEqual([(row['month'], row['tenant']) for row in rows], [(2, "Tenant 0"), (3, "Tenant 0")])
+        self.assertEqual((rows[0]['total_paid'], rows[0]['balance'], rows[0]['is_paid']), ('400.00', '600.00', False))
+
+    def test_payments(self):
+        response = self.client.get(reverse('export', args=['payments']), {'output': 'ndjson'})
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('attachment; filename="payments-', response['Content-Disposition'])
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['charge_balance'], '600.00')
+
+    def test_accept_header_picks_the_format(self):
+        for accept, content_type in [('text/csv', 'text/csv'), ('application/x-ndjson', 'application/x-ndjson')]:
+            response = self.client.get(reverse('export', args=['payments']), HTTP_ACCEPT=accept)
+            self.assertEqual(response.status_code, 200, accept)
+            self.assertEqual(response['Content-Type'], content_type)
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual(len(rows), 6)
+
+        # ?output= wins over the header, errors stay JSON
+        response = self.client.get(reverse('export', args=['payments']), {'output': 'csv'}, HTTP_ACCEPT='application/x-ndjson')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        response = self.client.get(reverse('export', args=['payments']), {'start': 'soon'}, HTTP_ACCEPT='text/csv')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('start', response.json())
+
+    def test_only_own_rows_and_bad_parameters(self):
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user(username='other', password='testpass123'))
+        response = other.get(reverse('export', args=['tenants']))
+        self.assertEqual(b''.join(response.streaming_content).decode().count('\n'), 1)  # header only
+
+        self.assertEqual(self.client.get(reverse('export', args=['houses'])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('export', args=['tenants']), {'start': 'soon'}).status_code, 400)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('export_data', 'payments', '--user', 'landlord', '--building', str(self.north), stdout=out)
+        rows = list(csv.DictReader(out.getvalue().splitlines()))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['building'] for row in rows}, {"North"})
@@ -0,0 +1,110 @@
+from decimal import Decimal
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from tennants.models import FlatBuilding, House, Tenant, TenantLedger, RentCharge, Payment
+
+
+@override_settings(SMS_OUTBOX={'DELIVERY': 'manual'})
+class FieldTrackingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.building = FlatBuilding.objects.create(user=self.user, building_name="Sunrise", address="Street", number_of_houses=5)
+        self.house = House.objects.create(user=self.user, flat_building=self.building, house_number="101", house_rent_amount=1000)
+        self.other_house = House.objects.create(user=self.user, flat_building=self.building, house_number="102", house_rent_amount=1200)
+        self.tenant = Tenant.objects.create(user=self.user, house=self.house, full_name="John Kamau", email="john@example.com",
+                                            phone="+254712345678", id_number="12345678")
+        self.charge = RentCharge.objects.create(user=self.user, tenant=self.tenant, year=2026, month=1, amount_due=Decimal('1000.00'))
+
+    def ledger(self):
+        return TenantLedger.objects.get(tenant=self.tenant)
+
+    def test_tracks_loaded_values(self):
+        tenant = Tenant.objects.get(pk=self.tenant.pk)
+        self.assertEqual(tenant.changed_fields(), set())
+        tenant.email = "kamau@example.com"
+        self.assertEqual(tenant.changed_fields(), {'email'})
+        tenant.save()
+        self.assertEqual(tenant.changed_fields(), set())
+        self.assertEqual(tenant.saved_values()['email'], "kamau@example.com")
+
+        # nothing is known about unsaved or partly loaded instances
+        self.assertIsNone(Tenant(full_name="New").saved_values())
+        self.assertIsNone(Tenant.objects.only('full_name').get(pk=self.tenant.pk).saved_values())
+
+    def test_editing_a_tenant_is_one_update(self):
+        tenant = Tenant.objects.get(pk=self.tenant.pk)
+        tenant.rent_due_date = tenant.rent_due_date.replace(day=1)
+        with self.assertNumQueries(3):  # the UPDATE in a savepoint
+            tenant.save()
+
+        tenant.email = "kamau@example.com"
+        with CaptureQueriesContext(connection) as queries:
+            tenant.save()
+        statements = [query['sql'].split()[0] for query in queries.captured_queries]
+        self.assertEqual(statements.count('UPDATE'), 1)
+        self.assertNotIn('SELECT', statements)  # the search index is written, nothing is read
+
+    def test_moving_a_tenant_updates_both_houses(self):
+        tenant = Tenant.objects.get(pk=self.tenant.pk)
+        tenant.house = self.other_house
+        tenant.save()
+        self.house.refresh_from_db()
+        self.other_house.refresh_from_db()
+        self.assertFalse(self.house.occupation)
+        self.assertTrue(self.other_house.occupation)
+
+        tenant.is_active = False
+        tenant.save()
+        self.other_house.refresh_from_db()
+        self.assertFalse(self.other_house.occupation)
+
+    def test_partial_saves_only_record_what_was_written(self):
+        tenant = Tenant.objects.get(pk=self.tenant.pk)
+        tenant.is_active = False
+        tenant.full_name = "Unsaved"
+        tenant.save(update_fields=['is_active'])
+        self.assertEqual(tenant.changed_fields(), {'full_name'})
+
+    def test_charge_edits_move_the_ledger_without_reading_the_row(self):
+        charge = RentCharge.objects.get(pk=self.charge.pk)
+        charge.amount_due = Decimal('1500.00')
+        with CaptureQueriesContext(connection) as queries:
+            charge.save()
+        self.assertFalse(any('FROM "tennants_rentcharge"' in query['sql'] for query in queries.captured_queries))
+        self.assertEqual(self.ledger().total_due, Decimal('1500.00'))
+
+    def test_unloaded_instances_read_the_previous_values(self):
+        payment = Payment.objects.create(user=self.user, tenant=self.tenant, rent_charge=self.charge,
+                                         amount=Decimal('400.00'), payment_method='cash')
+        copy = Payment(pk=payment.pk, user=self.user, tenant=self.tenant, rent_charge=self.charge,
+                       amount=Decimal('300.00'), payment_method='cash', paid_at=payment.paid_at)
+        copy._state.adding = False
+        copy.save()
+        self.assertEqual(self.ledger().total_paid, Decimal('300.00'))
+        self.charge.refresh_from_db()
+        self.assertEqual(self.charge.amount_paid, Decimal('300.00'))
+
+    def test_partial_save_of_a_constructed_instance(self):
+        tenant = Tenant(pk=self.tenant.pk, user=self.user, house=self.house, full_name="John Kamau",
+                        email="john@example.com", phone="+254712345678", id_number="12345678")
+        tenant._state.adding = False
+        tenant.email = "kamau@example.com"
+        tenant.save(update_fields=['email'])
+        self.assertEqual(Tenant.objects.get(pk=self.tenant.pk).email, "kamau@example.com")
+        self.assertIsNone(tenant.saved_values())  # only email is known
+
+    def test_refreshing_some_fields_keeps_other_edits_pending(self):
+        tenant = Tenant.objects.get(pk=self.tenant.pk)
+        tenant.full_name = "Unsaved"
+        tenant.email = "unsaved@example.com"
+        tenant.refresh_from_db(fields=['email'])
+        self.assertEqual(tenant.changed_fields(), {'full_name'})
+
+        Tenant.objects.filter(pk=tenant.pk).update(house=self.other_house)
+        tenant.refresh_from_db(fields=['house'])
+        self.assertEqual(tenant.saved_values()['house_id'], self.other_house.pk)
+        self.assertEqual(tenant.changed_fields(), {'full_name'})
+        tenant.refresh_from_db()
+        self.assertEqual(tenant.changed_fields(), set())
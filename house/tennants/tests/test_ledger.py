@@ -0,0 +1,115 @@
+from decimal import Decimal
+from io import StringIO
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from tennants.models import FlatBuilding, House, Tenant, TenantLedger, RentCharge, Payment
+from tennants.services.ledger import rebuild_ledger, verify_ledger
+
+
+class TenantLedgerTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.flat_building = FlatBuilding.objects.create(
+            user=self.user,
+            building_name="Test Building",
+            address="123 Test Street",
+            number_of_houses=5
+        )
+        self.house = House.objects.create(
+            user=self.user,
+            flat_building=self.flat_building,
+            house_number="101",
+            house_rent_amount=1000,
+        )
+        self.tenant = Tenant.objects.create(
+            user=self.user,
+            full_name="John Doe",
+            email="john@example.com",
+            phone="+254712345678",
+            house=self.house,
+            id_number="12345678"
+        )
+        self.charge = RentCharge.objects.create(
+            user=self.user, tenant=self.tenant, year=2026, month=1, amount_due=Decimal('1000.00')
+        )
+
+    def pay(self, amount, charge=None):
+        return Payment.objects.create(
+            user=self.user,
+            tenant=self.tenant,
+            rent_charge=charge or self.charge,
+            amount=Decimal(amount),
+            payment_method='cash',
+        )
+
+    def test_ledger_created_with_tenant(self):
+        """A ledger row is created for every new tenant"""
+        self.assertTrue(TenantLedger.objects.filter(tenant=self.tenant).exists())
+
+    def test_charge_and_payment_update_totals(self):
+        """Charges and payments move the stored totals"""
+        self.pay('400.00')
+        self.charge.refresh_from_db()
+        ledger = TenantLedger.objects.get(tenant=self.tenant)
+
+        self.assertEqual(ledger.total_due, Decimal('1000.00'))
+        self.assertEqual(ledger.total_paid, Decimal('400.00'))
+        self.assertEqual(self.charge.total_paid, Decimal('400.00'))
+        self.assertEqual(self.charge.balance, Decimal('600.00'))
+        self.assertFalse(self.charge.is_paid)
+
+    def test_payment_edit_and_delete_reverse_totals(self):
+        """Editing or deleting a payment replaces or reverses its amount"""
+        payment = self.pay('400.00')
+        payment.amount = Decimal('1000.00')
+        payment.save()
+        self.charge.refresh_from_db()
+        self.assertTrue(self.charge.is_paid)
+
+        payment.delete()
+        self.charge.refresh_from_db()
+        self.assertEqual(self.charge.total_paid, Decimal('0.00'))
+        self.assertEqual(Tenant.objects.get(pk=self.tenant.pk).balance, Decimal('1000.00'))
+
+    def test_charge_delete_reverses_due_and_payments(self):
+        """Deleting a charge drops its amount and the cascaded payments"""
+        self.pay('250.00')
+        self.charge.delete()
+        ledger = TenantLedger.objects.get(tenant=self.tenant)
+        self.assertEqual(ledger.total_due, Decimal('0.00'))
+        self.assertEqual(ledger.total_paid, Decimal('0.00'))
+
+    def test_balance_reads_without_queries(self):
+        """With the ledger joined in, balances cost no extra queries"""
+        self.pay('300.00')
+        tenants = list(Tenant.objects.select_related('ledger'))
+        with self.assertNumQueries(0):
+            self.assertEqual(tenants[0].balance, Decimal('700.00'))
+
+    def test_rebuild_repairs_drift(self):
+        """rebuild_ledger brings drifted totals back in line"""
+        self.pay('300.00')
+        TenantLedger.objects.filter(tenant=self.tenant).update(total_paid=0)
+        RentCharge.objects.filter(pk=self.charge.pk).update(amount_paid=999)
+
+        drift = verify_ledger()
+        self.assertEqual(drift['tenants'], [self.tenant.pk])
+        self.assertEqual(drift['charges'], [self.charge.pk])
+
+        rebuild_ledger()
+        self.assertEqual(verify_ledger(), {'charges': [], 'tenants': []})
+        self.assertEqual(TenantLedger.objects.get(tenant=self.tenant).total_paid, Decimal('300.00'))
+
+    def test_rebuild_ledger_command(self):
+        """The management command verifies, rebuilds and re-verifies"""
+        TenantLedger.objects.filter(tenant=self.tenant).delete()
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_ledger', '--verify-only', stdout=StringIO())
+
+        out = StringIO()
+        call_command('rebuild_ledger', stdout=out)
+        self.assertIn('Ledger rebuilt and verified', out.getvalue())
+        self.assertEqual(TenantLedger.objects.get(tenant=self.tenant).total_due, Decimal('1000.00'))
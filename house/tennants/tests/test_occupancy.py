@@ -0,0 +1,68 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant
+
+
+class BuildingOccupancyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='landlord', password='testpass123')
+        self.building = FlatBuilding.objects.create(
+            user=self.user, building_name="Sunrise", address="Street", number_of_houses=5
+        )
+        self.empty = FlatBuilding.objects.create(
+            user=self.user, building_name="Empty", address="Street", number_of_houses=3
+        )
+        for i, rent in enumerate([1000, 1500, 2000]):
+            house = House.objects.create(
+                user=self.user, flat_building=self.building, house_number=f"10{i}", house_rent_amount=rent
+            )
+            if i < 2:
+                self.tenant = Tenant.objects.create(
+                    user=self.user, full_name=f"Tenant {i}", email=f"t{i}@example.com", phone=f"+25471234567{i}",
+                    house=house, id_number=f"ID{i}", rent_due_date=date(2026, 3, 5)
+                )
+
+    def test_with_occupancy_matches_properties(self):
+        with self.assertNumQueries(1):
+            buildings = list(FlatBuilding.objects.with_occupancy().order_by('pk'))
+            building, empty = buildings
+            self.assertEqual(
+                (building.how_many_occupied, building.vacant_houses, building.tenant_count(), building.rent_roll),
+                (2, 3, 2, Decimal('2500.00'))
+            )
+            self.assertEqual((empty.how_many_occupied, empty.vacant_houses, empty.tenant_count()), (0, 3, 0))
+
+        fresh = FlatBuilding.objects.get(pk=self.building.pk)
+        self.assertEqual(
+            (fresh.how_many_occupied, fresh.vacant_houses, fresh.tenant_count(), fresh.rent_roll),
+            (2, 3, 2, Decimal('2500.00'))
+        )
+
+    def test_stats_endpoint_is_cached_and_invalidated(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('building-stats')
+
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        first = response.data['buildings'][0]
+        self.assertEqual((first['occupied'], first['vacant'], first['tenant_count']), (2, 3, 2))
+        self.assertEqual(response.data['totals']['vacant'], 6)
+        self.assertEqual(cache.get(f"flat_{self.building.pk}_occupied"), 2)
+
+        with self.assertNumQueries(1):  # just the building list, stats come from the cache
+            client.get(url)
+
+        # deactivating a tenant frees the house and must drop the cached numbers
+        self.tenant.is_active = False
+        self.tenant.save()
+        self.assertIsNone(cache.get(f"flat_{self.building.pk}_tenant_count"))
+        first = client.get(url).data['buildings'][0]
+        self.assertEqual((first['occupied'], first['vacant'], first['tenant_count']), (1, 4, 1))
+        self.assertEqual(first['rent_roll'], Decimal('1000.00'))
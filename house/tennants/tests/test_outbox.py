@@ -0,0 +1,180 @@
+from datetime import timedelta
+from unittest import mock
+from decimal import Decimal
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from tennants.models import FlatBuilding, House, Tenant, RentCharge, Payment, OutboxMessage
+from tennants.services import outbox
+from tennants.services.dispatch import SMSMessage
+from tennants.services.sms import LocMemSMSClient, TwilioNotificationService
+import uuid
+
+
+class FailingSMSClient:
+    def __init__(self):
+        self.messages = self
+
+    def create(self, body, from_, to):
+        raise ConnectionError("provider unavailable")
+
+
+@override_settings(SMS_OUTBOX={'DELIVERY': 'manual'})
+class NotificationOutboxTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        building = FlatBuilding.objects.create(
+            user=self.user, building_name="Test Building", address="Street", number_of_houses=5
+        )
+        house = House.objects.create(user=self.user, flat_building=building, house_number="101", house_rent_amount=1000)
+        self.tenant = Tenant.objects.create(
+            user=self.user, full_name="John Doe", email="john@example.com", phone="+254712345678",
+            house=house, id_number="12345678", rent_due_date=timezone.now().date() + timedelta(days=2)
+        )
+        self.charge = RentCharge.objects.create(
+            user=self.user, tenant=self.tenant, year=2026, month=1, amount_due=Decimal('1000.00')
+        )
+        self.sms = LocMemSMSClient()
+        self.notifier = TwilioNotificationService(client=self.sms, from_number="+15550000000")
+
+    def pay(self, amount):
+        return Payment.objects.create(
+            user=self.user, tenant=self.tenant, rent_charge=self.charge,
+            amount=Decimal(amount), payment_method='cash'
+        )
+
+    def test_signals_queue_instead_of_sending(self):
+        """Welcome, reminder and confirmation are written to the outbox, nothing is sent yet"""
+        self.pay('400.00')
+        self.assertEqual(
+            sorted(OutboxMessage.objects.values_list('kind', flat=True)),
+            ['payment_confirmation', 'rent_reminder', 'welcome']
+        )
+        self.assertFalse(OutboxMessage.objects.exclude(status=OutboxMessage.PENDING).exists())
+        confirmation = OutboxMessage.objects.get(kind='payment_confirmation')
+        self.assertIn("Remaining balance: KES 600.00", confirmation.body)
+
+    def test_delivery_scheduled_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.pay('400.00')
+        self.assertIn(outbox.schedule_delivery, callbacks)
+
+    def test_rollback_discards_message(self):
+        """A payment that rolls back leaves nothing behind to send"""
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.pay('400.00')
+                raise RuntimeError
+        self.assertFalse(OutboxMessage.objects.filter(kind='payment_confirmation').exists())
+
+    def test_deliver_is_idempotent(self):
+        """Each message goes out once, even if it is queued or delivered again"""
+        payment = self.pay('400.00')
+        outbox.enqueue('payment_confirmation', payment.pk, self.tenant.phone, "duplicate")
+        self.assertEqual(OutboxMessage.objects.filter(kind='payment_confirmation').count(), 1)
+
+        counts = outbox.deliver_pending(self.notifier, rate_per_second=0)
+        self.assertEqual(counts, {'sent': 3, 'failed': 0})
+        self.assertEqual(outbox.deliver_pending(self.notifier), {'sent': 0, 'failed': 0})
+        self.assertEqual(len(self.sms.outbox), 3)
+        self.assertEqual(OutboxMessage.objects.filter(status=OutboxMessage.SENT, provider_sid__startswith='LM').count(), 3)
+
+        self.charge.refresh_from_db()
+        self.tenant.refresh_from_db()
+        self.assertTrue(self.charge.reminder_sent)
+        self.assertIsNotNone(self.tenant.last_reminder_sent)
+
+    def test_claimed_rows_are_not_claimed_twice(self):
+        claimed = outbox.claim_batch()
+        self.assertEqual(len(claimed), 2)
+        self.assertEqual(outbox.claim_batch(), [])
+
+    @override_settings(SMS_OUTBOX={'DELIVERY': 'manual', 'MAX_ATTEMPTS': 2, 'RETRY_DELAY': 60})
+    def test_failures_retry_later_then_give_up(self):
+        failing = TwilioNotificationService(client=FailingSMSClient(), from_number="+15550000000")
+        self.assertEqual(outbox.deliver_pending(failing, max_retries=0), {'sent': 0, 'failed': 2})
+
+        message = OutboxMessage.objects.get(kind='welcome')
+        self.assertEqual((message.status, message.attempts), (OutboxMessage.PENDING, 1))
+        self.assertGreater(message.next_attempt_at, timezone.now())
+        self.assertEqual(outbox.deliver_pending(failing, max_retries=0), {'sent': 0, 'failed': 0})
+
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+        outbox.deliver_pending(failing, max_retries=0)
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.attempts), (OutboxMessage.FAILED, 2))
+        self.assertEqual(message.last_error, "provider unavailable")
+
+    def test_enqueue_counts_only_new_rows(self):
+        payment = self.pay('400.00')
+        messages = [
+            OutboxMessage(kind='payment_confirmation', idempotency_key=f"payment_confirmation:{payment.pk}",
+                          to_number=str(self.tenant.phone), body="duplicate"),
+            OutboxMessage(kind='overdue_notice', idempotency_key="overdue_notice:1",
+                          to_number=str(self.tenant.phone), body="new"),
+        ]
+        self.assertEqual(outbox.enqueue_many(messages), 1)
+        self.assertEqual(outbox.enqueue('overdue_notice', 1, self.tenant.phone, "again"), 0)
+        self.assertEqual(outbox.enqueue_many([]), 0)
+
+    def test_results_skip_rows_reclaimed_meanwhile(self):
+        """A row whose claim expired and was taken again is left to its new claim"""
+        claimed = outbox.claim_batch()
+        stolen = claimed[0]
+        OutboxMessage.objects.filter(pk=stolen.pk).update(claim_token=uuid.uuid4())
+        report = self.notifier.send_many(
+            [SMSMessage(m.to_number, m.body, reference=m) for m in claimed], rate_per_second=0
+        )
+        written = outbox.record_results(report)
+        self.assertEqual([m.pk for m in written], [claimed[1].pk])
+
+        stolen.refresh_from_db()
+        self.assertEqual(stolen.status, OutboxMessage.SENDING)
+        self.assertIsNotNone(stolen.claim_token)
+        self.assertEqual(OutboxMessage.objects.get(pk=claimed[1].pk).status, OutboxMessage.SENT)
+
+    def test_web_reminders_are_queued_not_sent(self):
+        today = timezone.now().date()
+        RentCharge.objects.bulk_create([RentCharge(user=self.user, tenant=self.tenant, year=today.year,
+                                                   month=today.month, amount_due=Decimal('1000.00'))])
+        self.client.force_login(self.user)
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post(reverse('send_rent_reminders'), follow=True)
+        self.assertRedirects(response, reverse('send_rent_reminders'))
+        self.assertIn("✓ Queued 1 reminders.", [str(m) for m in response.context['messages']])
+        self.assertIn(outbox.schedule_delivery, callbacks)
+        self.assertEqual(self.sms.outbox, [])
+        self.assertEqual(OutboxMessage.objects.filter(kind='rent_reminder', status=OutboxMessage.PENDING).count(), 2)
+
+        response = self.client.post(reverse('send_rent_reminders'), follow=True)
+        self.assertIn("✓ Queued 0 reminders. 1 were already waiting to be sent.", [str(m) for m in response.context['messages']])
+
+    def test_enqueue_in_the_same_clock_tick(self):
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now()):
+            self.assertEqual(outbox.enqueue('overdue_notice', 1, self.tenant.phone, "first"), 1)
+            self.assertEqual(outbox.enqueue('overdue_notice', 1, self.tenant.phone, "again"), 0)
+
+    def test_results_are_written_back_per_outcome(self):
+        for i in range(8):
+            outbox.enqueue('overdue_notice', i, self.tenant.phone, f"notice {i}")
+        claimed = outbox.claim_batch()
+        messages = [SMSMessage(m.to_number, m.body, reference=m) for m in claimed]
+        report = self.notifier.send_many(messages, rate_per_second=0)
+        with self.assertNumQueries(6):  # what is still ours and one UPDATE for the ten sent rows in a savepoint, two for the reminder
+            outbox.record_results(report)
+        self.assertEqual(OutboxMessage.objects.filter(status=OutboxMessage.SENT, claim_token=None).count(), 10)
+        self.assertEqual(len(set(OutboxMessage.objects.values_list('provider_sid', flat=True))), 10)
+
+    def test_permanent_failures_are_not_retried(self):
+        class RejectingSMSClient(FailingSMSClient):
+            def create(self, body, from_, to):
+                error = ValueError("invalid number")
+                error.status = 400
+                raise error
+
+        rejecting = TwilioNotificationService(client=RejectingSMSClient(), from_number="+15550000000")
+        self.assertEqual(outbox.deliver_pending(rejecting), {'sent': 0, 'failed': 2})
+        message = OutboxMessage.objects.get(kind='welcome')
+        self.assertEqual((message.status, message.attempts), (OutboxMessage.FAILED, 1))
@@ -0,0 +1,82 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.contrib.auth.models import User
+from tennants.models import FlatBuilding, House, Tenant, RentCharge, Payment
+from tennants.services.overdue import overdue_charges, send_overdue_notices
+from tennants.services.sms import LocMemSMSClient, TwilioNotificationService
+
+
+class OverdueEngineTest(TestCase):
+    today = date(2026, 3, 10)
+
+    def setUp(self):
+        self.landlord1 = User.objects.create_user(username='landlord1', password='testpass123')
+        self.landlord2 = User.objects.create_user(username='landlord2', password='testpass123')
+        self.tenant1 = self.make_tenant(self.landlord1, "101", "+254712345671", due=date(2026, 3, 5))
+        self.tenant2 = self.make_tenant(self.landlord2, "201", "+254712345672", due=date(2026, 3, 20))
+
+        # landlord1: January unpaid, February fully paid, March due on the 5th and unpaid
+        self.jan = self.charge(self.tenant1, 1)
+        feb = self.charge(self.tenant1, 2)
+        Payment.objects.create(
+            user=self.landlord1, tenant=self.tenant1, rent_charge=feb,
+            amount=Decimal('1000.00'), payment_method='cash'
+        )
+        self.mar = self.charge(self.tenant1, 3)
+        # landlord2: February partly paid, March not yet due
+        self.feb2 = self.charge(self.tenant2, 2)
+        Payment.objects.create(
+            user=self.landlord2, tenant=self.tenant2, rent_charge=self.feb2,
+            amount=Decimal('400.00'), payment_method='cash'
+        )
+        self.charge(self.tenant2, 3)
+
+        self.sms = LocMemSMSClient()
+        self.notifier = TwilioNotificationService(client=self.sms, from_number="+15550000000")
+
+    def make_tenant(self, user, number, phone, due):
+        building = FlatBuilding.objects.create(
+            user=user, building_name=f"Building {number}", address="Street", number_of_houses=5
+        )
+        house = House.objects.create(
+            user=user, flat_building=building, house_number=number, house_rent_amount=1000
+        )
+        return Tenant.objects.create(
+            user=user, full_name=f"Tenant {number}", email=f"t{number}@example.com",
+            phone=phone, house=house, id_number=f"ID{number}", rent_due_date=due
+        )
+
+    def charge(self, tenant, month):
+        return RentCharge.objects.create(
+            user=tenant.user, tenant=tenant, year=2026, month=month, amount_due=Decimal('1000.00')
+        )
+
+    def test_overdue_charges_per_landlord(self):
+        """Only unpaid charges past their due date are selected"""
+        self.assertEqual(
+            list(overdue_charges(self.landlord1.pk, self.today).values_list('pk', flat=True)),
+            [self.jan.pk, self.mar.pk]
+        )
+        overdue = list(overdue_charges(self.landlord2.pk, self.today))
+        self.assertEqual([c.pk for c in overdue], [self.feb2.pk])
+        self.assertEqual(overdue[0].balance, Decimal('600.00'))
+
+    def test_disabled_or_inactive_tenants_skipped(self):
+        """Tenants who opted out or moved out are not notified"""
+        Tenant.objects.filter(pk=self.tenant1.pk).update(sms_notifications=False)
+        Tenant.objects.filter(pk=self.tenant2.pk).update(is_active=False)
+        counts = send_overdue_notices(self.notifier, self.today)
+        self.assertEqual(counts, {'found': 0, 'sent': 0, 'failed': 0})
+
+    def test_send_overdue_notices_in_batches(self):
+        """Notices go through the stand-in backend with a fixed number of queries"""
+        with self.assertNumQueries(5):  # landlords + (charges + last_notification_sent) per landlord
+            counts = send_overdue_notices(self.notifier, self.today, batch_size=10)
+
+        self.assertEqual(counts, {'found': 3, 'sent': 3, 'failed': 0})
+        self.assertEqual(len(self.sms.outbox), 3)
+        self.assertTrue(all("OVERDUE NOTICE" in m.body for m in self.sms.outbox))
+        self.assertTrue(any("KES 600.00" in m.body for m in self.sms.outbox))
+        self.tenant1.refresh_from_db()
+        self.assertIsNotNone(self.tenant1.last_notification_sent)
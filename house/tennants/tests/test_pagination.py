@@ -0,0 +1,108 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant, RentCharge
+from tennants.pagination import KeysetPagination
+import base64
+import json
+
+
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        building = FlatBuilding.objects.create(
+            user=self.user, building_name="Sunrise", address="Street", number_of_houses=10
+        )
+        self.tenants = []
+        for i, name in enumerate(["Carol", "alice", "Bob", "Alice", "Dave"]):
+            house = House.objects.create(user=self.user, flat_building=building, house_number=f"10{i}", house_rent_amount=1000)
+            self.tenants.append(Tenant.objects.create(
+                user=self.user, full_name=name, email=f"t{i}@example.com", phone=f"+25471234567{i}",
+                house=house, id_number=f"ID{i}", rent_due_date=date(2026, 3, 5)
+            ))
+        RentCharge.objects.bulk_create([
+            RentCharge(user=self.user, tenant=self.tenants[0], year=2000 + i // 12, month=i % 12 + 1, amount_due=Decimal('1000.00'))
+            for i in range(25)
+        ])
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def walk(self, url):
+        pages = []
+        while url:
+            data = self.client.get(url).data
+            pages.append(data['results'])
+            url = data['next']
+        return pages
+
+    def test_pages_by_id_without_count(self):
+        url = reverse('rent-charge-list')
+        with self.assertNumQueries(1):
+            data = self.client.get(url).data
+        self.assertNotIn('count', data)
+        self.assertIsNone(data['previous'])
+
+        pages = self.walk(url)
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        ids = [row['id'] for page in pages for row in page]
+        self.assertEqual(ids, sorted(RentCharge.objects.values_list('pk', flat=True)))
+
+    def test_previous_link_returns_the_same_page(self):
+        first = self.client.get(reverse('rent-charge-list')).data
+        second = self.client.get(first['next']).data
+        back = self.client.get(second['previous']).data
+        self.assertEqual(back['results'], first['results'])
+        self.assertIsNone(back['previous'])
+
+    def test_ordering_key_with_ties(self):
+        self.tenants[3].full_name = "alice"
+        self.tenants[3].save()
+        pages = self.walk(reverse('tenant-list') + '?ordering=-full_name&page_size=2')
+        rows = [(row['full_name'], row['id']) for page in pages for row in page]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows, sorted(rows, reverse=True))
+
+    def test_count_modes(self):
+        url = reverse('rent-charge-list')
+        data = self.client.get(url, {'count': 'exact'}).data
+        self.assertEqual((data['count'], data['count_estimated']), (25, False))
+
+        self.assertEqual(self.client.get(url, {'count': 'estimate'}).data['count'], 25)
+        with mock.patch.object(KeysetPagination, 'estimate_limit', 20):
+            data = self.client.get(url, {'count': 'estimate', 'page_size': 1}).data
+        self.assertEqual((data['count'], data['count_estimated']), (20, True))
+
+        self.assertEqual(self.client.get(url, {'count': 'all'}).status_code, 400)
+
+    def test_page_size_is_capped(self):
+        RentCharge.objects.bulk_create([
+            RentCharge(user=self.user, tenant=self.tenants[1], year=2000 + i // 12, month=i % 12 + 1, amount_due=Decimal('1000.00'))
+            for i in range(600)
+        ])
+        data = self.client.get(reverse('rent-charge-list'), {'page_size': 1000}).data
+        self.assertEqual(len(data['results']), 500)
+        self.assertIsNotNone(data['next'])
+
+    def test_bad_cursor(self):
+        self.assertEqual(self.client.get(reverse('rent-charge-list'), {'cursor': 'nope'}).status_code, 404)
+        # a cursor taken under another ordering
+        data = self.client.get(reverse('tenant-list'), {'page_size': 2}).data
+        response = self.client.get(data['next'] + '&ordering=full_name')
+        self.assertEqual(response.status_code, 404)
+
+    def test_tampered_cursor(self):
+        def cursor(*payload):
+            return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+        for payload in (["pk", None, "abc", False], ["pk", None, [1], False], ["pk", None, None, False]):
+            response = self.client.get(reverse('rent-charge-list'), {'cursor': cursor(*payload)})
+            self.assertEqual(response.status_code, 404, payload)
+        for payload in (["created_at", "notadate", 1, False], ["created_at", None, 1, False], ["created_at", "2026-01-01", {}, False]):
+            response = self.client.get(reverse('tenant-list'), {'ordering': 'created_at', 'cursor': cursor(*payload)})
+            self.assertEqual(response.status_code, 404, payload)
@@ -0,0 +1,92 @@
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.urls import reverse
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant, TenantLedger, OutboxMessage
+from tennants.services.portfolio import import_portfolio
+import os
+import tempfile
+
+HEADER = "building_name,address,number_of_houses,house_number,house_rent_amount,full_name,email,phone,id_number\n"
+
+
+def portfolio(*lines):
+    return StringIO(HEADER + "".join(f"{line}\n" for line in lines))
+
+
+@override_settings(SMS_OUTBOX={'DELIVERY': 'manual'})
+class PortfolioImportTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='landlord', password='testpass123')
+
+    def test_imports_buildings_houses_and_tenants(self):
+        units = [f"Sunrise,Street,40,{i},1000,Tenant {i},t{i}@example.com,+2547123{i:05d},ID{i}" for i in range(30)]
+        units += [f"Sunset,Road,10,{i},800,,,,," for i in range(5)]
+        with self.assertNumQueries(19):  # three checks, then a fixed number of statements per table (and the search index)
+            report = import_portfolio(self.user, portfolio(*units))
+        self.assertEqual((report['buildings'], report['houses'], report['tenants'], report['errors']), (2, 35, 30, {}))
+
+        self.assertEqual(FlatBuilding.objects.get(building_name="Sunset").number_of_houses, 10)
+        self.assertEqual(House.objects.filter(occupation=True).count(), 30)
+        self.assertEqual(TenantLedger.objects.count(), 30)
+        self.assertFalse(OutboxMessage.objects.exists())
+        self.assertEqual(FlatBuilding.objects.with_occupancy().get(building_name="Sunrise").vacant_count, 10)
+
+    def test_reports_every_bad_line_and_writes_nothing(self):
+        FlatBuilding.objects.create(user=self.user, building_name="Sunrise", address="Street", number_of_houses=2)
+        report = import_portfolio(self.user, portfolio(
+            "Sunrise,,,1,1000,Ann,ann@example.com,+254712300001,ID1",
+            "Sunrise,,,1,1000,,,,",                                     # duplicate house number
+            "Sunrise,,,2,1000,Ben,ann@example.com,+254712300002,ID2",   # duplicate email
+            "Sunrise,,,3,1000,,,,",                                     # over capacity
+            "Sunset,,,1,1000,,,,",                                      # new building without address/size
+            "Sunrise,,,4,lots,Cid,,,",                                  # bad rent, tenant without email/phone
+        ))
+        self.assertEqual(sorted(report['errors']), [3, 4, 6, 7])
+        self.assertIn('house_number', report['errors'][3])
+        self.assertIn('email', report['errors'][4])
+        self.assertEqual(set(report['errors'][6]), {'address', 'number_of_houses'})
+        self.assertEqual(set(report['errors'][7]), {'house_rent_amount'})
+        self.assertFalse(House.objects.exists())
+        self.assertFalse(FlatBuilding.objects.filter(building_name="Sunset").exists())
+
+    def test_skip_invalid_and_dry_run(self):
+        lines = ["Sunrise,Street,5,1,1000,,,,", "Sunrise,Street,5,1,1000,,,,", "Sunrise,Street,5,2,1000,,,,"]
+        report = import_portfolio(self.user, portfolio(*lines), dry_run=True, skip_invalid=True)
+        self.assertEqual((report['houses'], sorted(report['errors'])), (2, [3]))
+        self.assertFalse(House.objects.exists())
+
+        import_portfolio(self.user, portfolio(*lines), skip_invalid=True)
+        self.assertEqual(sorted(House.objects.values_list('house_number', flat=True)), ['1', '2'])
+
+    def test_welcome_messages_on_request(self):
+        import_portfolio(self.user, portfolio("Sunrise,Street,5,1,1000,Ann,ann@example.com,+254712300001,ID1"), welcome=True)
+        self.assertEqual(OutboxMessage.objects.filter(kind='welcome').count(), 1)
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        upload = SimpleUploadedFile("units.csv", (HEADER + "Sunrise,Street,5,1,1000,,,,\n").encode())
+        response = client.post(reverse('portfolio-import'), {'file': upload})
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['houses'], 1)
+
+        upload = SimpleUploadedFile("units.csv", (HEADER + "Sunrise,,,1,1000,,,,\n").encode())
+        response = client.post(reverse('portfolio-import'), {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['line'], 2)
+
+    def test_command(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as handle:
+            handle.write(HEADER + "Sunrise,Street,5,1,1000,Ann,ann@example.com,+254712300001,ID1\n")
+        self.addCleanup(os.remove, handle.name)
+        out = StringIO()
+        call_command('import_portfolio', handle.name, '--user', 'landlord', stdout=out)
+        self.assertIn("Imported 1 building(s), 1 house(s) and 1 tenant(s)", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('import_portfolio', handle.name, '--user', 'landlord', stdout=out, stderr=StringIO())
+        self.assertEqual(Tenant.objects.count(), 1)
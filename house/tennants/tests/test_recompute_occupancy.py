@@ -0,0 +1,69 @@
+from io import StringIO
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from tennants.models import FlatBuilding, House, Tenant
+from tennants.services.occupancy import building_stats, recompute_occupancy
+
+
+@override_settings(SMS_OUTBOX={'DELIVERY': 'manual'})
+class RecomputeOccupancyTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='landlord', password='testpass123')
+        self.building = FlatBuilding.objects.create(user=self.user, building_name="Sunrise", address="Street", number_of_houses=5)
+        self.houses = [
+            House.objects.create(user=self.user, flat_building=self.building, house_number=f"10{i}", house_rent_amount=1000)
+            for i in range(3)
+        ]
+        self.tenant = Tenant.objects.create(user=self.user, house=self.houses[0], full_name="John Kamau",
+                                            email="john@example.com", phone="+254712345678", id_number="12345678")
+        other = User.objects.create_user(username='other', password='testpass123')
+        other_building = FlatBuilding.objects.create(user=other, building_name="Elsewhere", address="Road", number_of_houses=1)
+        self.other_house = House.objects.create(user=other, flat_building=other_building, house_number="1")
+
+    def drift(self):
+        # what signal-bypassing writes leave behind
+        Tenant.objects.filter(pk=self.tenant.pk).update(is_active=False)
+        House.objects.filter(pk=self.houses[1].pk).update(occupation=True)
+        House.objects.filter(pk=self.other_house.pk).update(occupation=True)
+        FlatBuilding.objects.filter(pk=self.building.pk).update(house_count=0)
+
+    def test_in_sync_writes_nothing(self):
+        with self.assertNumQueries(5):  # lookup of what drifted and the two conditional UPDATEs, in a savepoint
+            counts = recompute_occupancy(self.user)
+        self.assertEqual(counts, {'houses': 0, 'buildings': 0})
+
+    def test_repairs_one_landlord(self):
+        self.drift()
+        self.assertEqual(building_stats(FlatBuilding.objects.filter(pk=self.building.pk))[0]['occupied'], 2)
+
+        self.assertEqual(recompute_occupancy(self.user, dry_run=True), {'houses': 2, 'buildings': 1})
+        self.assertEqual(recompute_occupancy(self.user), {'houses': 2, 'buildings': 1})
+        self.assertEqual(
+            set(House.objects.filter(user=self.user, occupation=True).values_list('pk', flat=True)), set()
+        )
+        self.building.refresh_from_db()
+        self.assertEqual(self.building.house_count, 3)
+        # cached stats were cleared along with it
+        self.assertEqual(building_stats(FlatBuilding.objects.filter(pk=self.building.pk))[0]['occupied'], 0)
+
+        self.other_house.refresh_from_db()
+        self.assertTrue(self.other_house.occupation)  # another landlord's house is left alone
+        self.assertEqual(recompute_occupancy(), {'houses': 1, 'buildings': 0})
+        self.assertEqual(recompute_occupancy(), {'houses': 0, 'buildings': 0})
+
+    def test_command(self):
+        self.drift()
+        with self.assertRaises(CommandError):
+            call_command('recompute_occupancy', '--user', 'landlord', '--dry-run', stdout=StringIO())
+
+        out = StringIO()
+        call_command('recompute_occupancy', '--user', 'landlord', stdout=out)
+        self.assertIn("Drift found: 2 house(s), 1 building house count(s)", out.getvalue())
+        call_command('recompute_occupancy', '--user', 'landlord', '--dry-run', stdout=StringIO())
+
+        with self.assertRaises(CommandError):
+            call_command('recompute_occupancy', '--user', 'nobody', stdout=StringIO())
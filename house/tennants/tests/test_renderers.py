@@ -0,0 +1,73 @@
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from io import BytesIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from io import StringIO
+from phonenumber_field.phonenumber import PhoneNumber
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant
+from tennants.renderers import ORJSONParser, ORJSONRenderer
+
+
+class ORJSONRendererTest(TestCase):
+    def test_same_bytes_as_drf(self):
+        data = {
+            'results': [{'name': 'Añn ', 'paid': True, 'rent': None, 'count': 3}],
+            'when': datetime(2025, 1, 31, 8, 30, tzinfo=timezone.utc),
+            'day': date(2025, 1, 31),
+            'amount': Decimal('1500.50'),
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_types_drf_leaves_to_the_encoder(self):
+        data = {'phone': PhoneNumber.from_string('+254712345678'), 1: 'int key'}
+        self.assertEqual(ORJSONRenderer().render(data), b'{"phone":"+254712345678","1":"int key"}')
+
+    def test_indent(self):
+        self.assertEqual(ORJSONRenderer().render({'a': 1}, 'application/json; indent=4'), b'{\n  "a": 1\n}')
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_parser(self):
+        body = b'{"rows": [{"amount": "1500.50", "house": 3}], "dry_run": false}'
+        self.assertEqual(ORJSONParser().parse(BytesIO(body)), JSONParser().parse(BytesIO(body)))
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(BytesIO(b'{"rows": ['))
+
+
+class APIRenderingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='landlord', password='testpass123')
+        building = FlatBuilding.objects.create(user=self.user, building_name="Sunrise", address="Street", number_of_houses=2)
+        house = House.objects.create(user=self.user, flat_building=building, house_number="1", house_rent_amount=Decimal('1000'))
+        Tenant.objects.create(user=self.user, house=house, full_name="Ann", email="ann@example.com", phone="+254712300001", id_number="ID1")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_production_profile(self):
+        self.assertEqual(api_settings.DEFAULT_RENDERER_CLASSES, [ORJSONRenderer])
+        response = self.client.get(reverse('tenant-list'), HTTP_ACCEPT='text/html')
+        self.assertEqual(response.status_code, 406)
+
+    def test_list_and_create_round_trip(self):
+        response = self.client.get(reverse('tenant-list'))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertEqual(response.json()['results'][0]['phone'], '+254712300001')
+
+        response = self.client.post(reverse('flat-list'), b'{"building_name": "Sunset", "address": "Road"',
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('JSON parse error', response.json()['detail'])
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command('bench_renderers', '--rows', '5', '--repeat', '2', stdout=out)
+        self.assertIn("tenants: 5 rows", out.getvalue())
+        self.assertEqual(User.objects.count(), 1)
@@ -0,0 +1,117 @@
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant
+from tennants.services import bulk, search
+
+
+@override_settings(SMS_OUTBOX={'DELIVERY': 'manual'})
+class TenantSearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.building = FlatBuilding.objects.create(user=self.user, building_name="Sunrise", address="Street", number_of_houses=10)
+        people = [
+            ("John Kamau", "john.kamau@example.com", "+254712345678", "12345678"),
+            ("Mary Wanjiku", "mary@example.com", "+254722000111", "87654321"),
+            ("Johnson Otieno", "otieno@example.com", "+254733000222", "11223344"),
+        ]
+        self.tenants = [
+            Tenant.objects.create(user=self.user, full_name=name, email=email, phone=phone, id_number=id_number)
+            for name, email, phone, id_number in people
+        ]
+        other = User.objects.create_user(username='other', password='testpass123')
+        self.stranger = Tenant.objects.create(user=other, full_name="John Stranger", email="s@example.com",
+                                              phone="+254744000333", id_number="99999999")
+
+    def names(self, query):
+        return [Tenant.objects.get(pk=pk).full_name for pk in search.search_ids(self.user, query)]
+
+    def test_index_is_used(self):
+        self.assertTrue(search.index_available())
+
+    def test_name_prefix_and_substring(self):
+        self.assertEqual(sorted(self.names("john")), ["John Kamau", "Johnson Otieno"])
+        self.assertEqual(self.names("kam"), ["John Kamau"])
+        self.assertEqual(self.names("wanji"), ["Mary Wanjiku"])
+        self.assertEqual(self.names("john kamau"), ["John Kamau"])
+
+    def test_phone_in_any_format(self):
+        for query in ("0712345678", "0712 345", "+254 712 345 678", "712345", "(0712) 345-678"):
+            self.assertEqual(self.names(query), ["John Kamau"], query)
+
+    def test_email_and_id_number(self):
+        self.assertEqual(self.names("mary@exa"), ["Mary Wanjiku"])
+        self.assertEqual(self.names("87654321"), ["Mary Wanjiku"])
+
+    def test_typos_fall_back_to_similar_names(self):
+        self.assertEqual(self.names("Wanjku"), ["Mary Wanjiku"])
+        self.assertEqual(self.names("Jonh Kamau")[0], "John Kamau")
+        self.assertEqual(self.names("zzzqqq"), [])
+
+    def test_short_words_match_name_starts(self):
+        self.assertEqual(self.names("ma"), ["Mary Wanjiku"])
+        self.assertEqual(self.names("jo ka"), ["John Kamau"])
+
+    def test_other_landlords_tenants_are_not_found(self):
+        self.assertNotIn(self.stranger.pk, search.search_ids(self.user, "john"))
+        self.assertEqual(search.search_ids(self.stranger.user, "stranger"), [self.stranger.pk])
+
+    def test_index_follows_updates_and_deletes(self):
+        tenant = self.tenants[1]
+        tenant.full_name = "Mary Achieng"
+        tenant.phone = "+254799888777"
+        tenant.save()
+        self.assertEqual(self.names("achieng"), ["Mary Achieng"])
+        self.assertEqual(self.names("wanjiku"), [])
+        self.assertEqual(self.names("0799888"), ["Mary Achieng"])
+        tenant.delete()
+        self.assertEqual(self.names("achieng"), [])
+
+    def test_bulk_created_tenants_are_indexed(self):
+        house = House.objects.create(user=self.user, flat_building=self.building, house_number="1", house_rent_amount=1000)
+        bulk.create_tenants(self.user, [{
+            'house_id': house.pk, 'full_name': "Peter Mwangi", 'email': "peter@example.com",
+            'phone': "+254700123456", 'id_number': "55555555",
+        }], welcome=False)
+        self.assertEqual(self.names("mwangi"), ["Peter Mwangi"])
+        self.assertEqual(self.names("0700123456"), ["Peter Mwangi"])
+
+    def test_rebuild_index(self):
+        self.assertEqual(search.rebuild_index(), 4)
+        self.assertEqual(self.names("kamau"), ["John Kamau"])
+
+    def test_orm_fallback_without_index(self):
+        with mock.patch('tennants.services.search.index_available', return_value=False):
+            self.assertEqual(sorted(self.names("john")), ["John Kamau", "Johnson Otieno"])
+            self.assertEqual(self.names("0712 345"), ["John Kamau"])
+            self.assertEqual(self.names("mary@exa"), ["Mary Wanjiku"])
+
+
+@override_settings(SMS_OUTBOX={'DELIVERY': 'manual'})
+class TenantSearchViewTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        for i, name in enumerate(["Ann Njeri", "Anne Muthoni", "Brian Ouma"]):
+            Tenant.objects.create(user=self.user, full_name=name, email=f"t{i}@example.com",
+                                  phone=f"+25471234567{i}", id_number=f"ID{i}")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_api_returns_serialized_matches(self):
+        response = self.client.get(reverse('tenant-search'), {'q': 'ann'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(row['full_name'] for row in response.json()), ["Ann Njeri", "Anne Muthoni"])
+        self.assertIn('balance', response.json()[0])
+
+        response = self.client.get(reverse('tenant-search'), {'q': 'ann', 'limit': 1})
+        self.assertEqual(len(response.json()), 1)
+
+    def test_api_requires_a_query(self):
+        self.assertEqual(self.client.get(reverse('tenant-search')).status_code, 400)
+
+    def test_web_list_search(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('tenant_list'), {'q': 'brian'})
+        self.assertEqual([t.full_name for t in response.context['tenants']], ["Brian Ouma"])
@@ -0,0 +1,73 @@
+from datetime import date
+from decimal import Decimal
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant, RentCharge, Payment
+
+
+class SparseFieldsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.building = FlatBuilding.objects.create(
+            user=self.user, building_name="Sunrise", address="Street", number_of_houses=10
+        )
+        for i in range(4):
+            house = House.objects.create(user=self.user, flat_building=self.building, house_number=f"10{i}", house_rent_amount=1000)
+            tenant = Tenant.objects.create(
+                user=self.user, full_name=f"Tenant {i}", email=f"t{i}@example.com", phone=f"+25471234567{i}",
+                house=house, id_number=f"ID{i}", rent_due_date=date(2026, 3, 5)
+            )
+            charge = RentCharge.objects.create(user=self.user, tenant=tenant, year=2026, month=1, amount_due=Decimal('1000.00'))
+            Payment.objects.create(
+                user=self.user, tenant=tenant, rent_charge=charge, amount=Decimal('400.00'), payment_method='cash'
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def test_fields_trim_output(self):
+        response = self.client.get(reverse('tenant-list'), {'fields': 'id,full_name,balance'})
+        self.assertEqual(response.status_code, 200)
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'full_name', 'balance'})
+        self.assertEqual((row['full_name'], row['balance']), ("Tenant 0", '600.00'))
+
+    def test_expand_inlines_related_objects_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('tenant-list'), {'expand': 'house,house.flat_building'})
+        house = response.data['results'][0]['house']
+        self.assertEqual(house['house_number'], "100")
+        self.assertEqual(house['flat_building']['building_name'], "Sunrise")
+
+    def test_expand_cost_does_not_grow_with_rows(self):
+        # payments -> tenant (with balances) -> house, and the charge with its totals
+        params = {'expand': 'tenant,tenant.house,rent_charge', 'fields': 'id,amount'}
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('payment-list'), params)
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'amount', 'tenant', 'rent_charge'})
+        self.assertEqual(row['tenant']['balance'], '600.00')
+        self.assertEqual(row['tenant']['house']['house_number'], "100")
+        self.assertEqual(row['rent_charge']['total_paid'], '400.00')
+
+    def test_reverse_relation_is_prefetched(self):
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('flat-detail', args=[self.building.pk]), {'expand': 'houses'})
+        self.assertEqual(len(response.data['houses']), 4)
+
+    def test_unknown_expansion(self):
+        response = self.client.get(reverse('tenant-list'), {'expand': 'landlord'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('expand', response.data)
+
+    def test_writes_to_inlined_objects_invalidate_page(self):
+        url = reverse('tenant-list')
+        self.client.get(url, {'expand': 'house'})
+        house = House.objects.get(house_number="100")
+        house.house_number = "999"
+        house.save()
+        response = self.client.get(url, {'expand': 'house'})
+        self.assertEqual(response.data['results'][0]['house']['house_number'], "999")
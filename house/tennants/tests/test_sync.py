@@ -0,0 +1,150 @@
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant, RentCharge, Payment, Tombstone
+from tennants.services.ledger import rebuild_ledger
+from tennants.services.sync import changes_since, prune_tombstones
+
+
+def ids(result, resource):
+    return sorted(row['id'] for row in result['changes'][resource])
+
+
+@override_settings(SYNC={'PAGE_SIZE': 1000, 'MAX_PAGE_SIZE': 5000, 'OVERLAP': 0, 'TOMBSTONE_DAYS': 90},
+                   SMS_OUTBOX={'DELIVERY': 'manual'})
+class DeltaSyncTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        self.building = FlatBuilding.objects.create(user=self.user, building_name="Sunrise", address="Street", number_of_houses=10)
+        self.houses, self.tenants = [], []
+        for i in range(3):
+            house = House.objects.create(user=self.user, flat_building=self.building, house_number=f"10{i}", house_rent_amount=1000)
+            self.houses.append(house)
+            self.tenants.append(Tenant.objects.create(
+                user=self.user, full_name=f"Tenant {i}", email=f"t{i}@example.com", phone=f"+25471234567{i}",
+                house=house, id_number=f"ID{i}", rent_due_date=date(2026, 3, 5)
+            ))
+        self.charge = RentCharge.objects.create(user=self.user, tenant=self.tenants[0], year=2026, month=1, amount_due=Decimal('1000.00'))
+        other = User.objects.create_user(username='other', password='testpass123')
+        FlatBuilding.objects.create(user=other, building_name="Elsewhere", address="Road", number_of_houses=1)
+
+    def test_full_download_then_nothing_new(self):
+        first = changes_since(self.user)
+        self.assertEqual(ids(first, 'flats'), [self.building.pk])
+        self.assertEqual(ids(first, 'houses'), [h.pk for h in self.houses])
+        self.assertEqual(ids(first, 'tenants'), [t.pk for t in self.tenants])
+        self.assertEqual(ids(first, 'rent_charges'), [self.charge.pk])
+        self.assertFalse(first['has_more'] or first['reset'])
+        # same shape as the list endpoints
+        balances = {row['id']: row['balance'] for row in first['changes']['tenants']}
+        self.assertEqual(balances[self.tenants[0].pk], '1000.00')
+
+        second = changes_since(self.user, cursor=first['cursor'])
+        self.assertEqual(sum(len(rows) for rows in second['changes'].values()), 0)
+        self.assertEqual(second['deleted'], {name: [] for name in first['changes']})
+
+    def test_only_changed_rows_come_back(self):
+        cursor = changes_since(self.user)['cursor']
+        tenant = self.tenants[1]
+        tenant.full_name = "Renamed"
+        tenant.save()
+        result = changes_since(self.user, cursor=cursor)
+        self.assertEqual(ids(result, 'tenants'), [tenant.pk])
+        self.assertEqual(result['changes']['tenants'][0]['full_name'], "Renamed")
+        self.assertEqual(ids(result, 'houses'), [])
+
+    def test_payment_resends_its_charge_and_tenant_balance(self):
+        cursor = changes_since(self.user)['cursor']
+        payment = Payment.objects.create(
+            user=self.user, tenant=self.tenants[0], rent_charge=self.charge, amount=Decimal('400.00'), payment_method='cash'
+        )
+        result = changes_since(self.user, cursor=cursor)
+        self.assertEqual(ids(result, 'payments'), [payment.pk])
+        self.assertEqual(result['changes']['rent_charges'][0]['amount_paid'], '400.00')
+        self.assertEqual(result['changes']['tenants'][0]['balance'], '600.00')
+
+    def test_deletions_are_reported(self):
+        cursor = changes_since(self.user)['cursor']
+        tenant_id, house_id = self.tenants[2].pk, self.houses[2].pk
+        self.houses[2].delete()  # takes its tenant with it
+        result = changes_since(self.user, cursor=cursor)
+        self.assertEqual(result['deleted']['houses'], [house_id])
+        self.assertEqual(result['deleted']['tenants'], [tenant_id])
+
+        result = changes_since(self.user, cursor=result['cursor'])
+        self.assertEqual(result['deleted']['houses'], [])
+
+    def test_pages_through_large_changes(self):
+        seen, cursor, calls = [], None, 0
+        while True:
+            result = changes_since(self.user, cursor=cursor, limit=2)
+            seen += ids(result, 'houses')
+            cursor, calls = result['cursor'], calls + 1
+            if not result['has_more']:
+                break
+        self.assertEqual(sorted(seen), [h.pk for h in self.houses])
+        self.assertEqual(calls, 2)
+
+    def test_pages_through_rows_older_than_the_horizon(self):
+        old = timezone.now() - timedelta(days=200)
+        House.objects.filter(user=self.user).update(updated_at=old)
+        seen, cursor, calls = [], None, 0
+        while calls < 5:
+            result = changes_since(self.user, cursor=cursor, limit=2)
+            self.assertFalse(result['reset'])
+            seen += ids(result, 'houses')
+            cursor, calls = result['cursor'], calls + 1
+            if not result['has_more']:
+                break
+        self.assertEqual(sorted(seen), [h.pk for h in self.houses])
+        self.assertEqual(calls, 2)
+
+    def test_cursor_issued_before_the_horizon_starts_over(self):
+        with mock.patch('tennants.services.sync.timezone.now', return_value=timezone.now() - timedelta(days=100)):
+            cursor = changes_since(self.user)['cursor']
+        result = changes_since(self.user, cursor=cursor)
+        self.assertTrue(result['reset'])
+        self.assertEqual(ids(result, 'houses'), [h.pk for h in self.houses])
+
+    def test_rebuild_only_touches_what_moved(self):
+        cursor = changes_since(self.user)['cursor']
+        rebuild_ledger()
+        result = changes_since(self.user, cursor=cursor)
+        self.assertEqual((ids(result, 'tenants'), ids(result, 'rent_charges')), ([], []))
+
+        RentCharge.objects.filter(pk=self.charge.pk).update(amount_paid=Decimal('5.00'))  # drift
+        rebuild_ledger()
+        result = changes_since(self.user, cursor=cursor)
+        self.assertEqual(ids(result, 'rent_charges'), [self.charge.pk])
+
+    def test_stale_cursor_starts_over(self):
+        result = changes_since(self.user, updated_since=timezone.now() - timedelta(days=365))
+        self.assertTrue(result['reset'])
+        self.assertEqual(ids(result, 'houses'), [h.pk for h in self.houses])
+
+        Tombstone.objects.create(user=self.user, resource='houses', object_id=1, deleted_at=timezone.now() - timedelta(days=100))
+        self.assertEqual(prune_tombstones(), 1)
+
+    def test_deleting_the_account_leaves_no_tombstones(self):
+        self.user.delete()
+        self.assertFalse(Tombstone.objects.exists())
+
+    def test_endpoint(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse('sync'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['changes']['houses']), 3)
+
+        since = (timezone.now() + timedelta(minutes=1)).isoformat()
+        response = client.get(reverse('sync'), {'updated_since': since})
+        self.assertEqual(response.data['changes']['houses'], [])
+
+        self.assertEqual(client.get(reverse('sync'), {'cursor': 'nonsense'}).status_code, 400)
+        response = client.get(reverse('sync'), {'cursor': response.data['cursor'], 'updated_since': since})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,90 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from tennants.models import FlatBuilding, House, Tenant, RentCharge, Payment
+from tennants.serializers import TenantSerializer, values_representation
+
+
+class ValuesRepresentationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpass123')
+        building = FlatBuilding.objects.create(user=self.user, building_name="Sunrise", address="Street", number_of_houses=10)
+        for i in range(6):
+            house = House.objects.create(
+                user=self.user, flat_building=building, house_number=f"10{i}", house_size="2 bedroom",
+                house_rent_amount=Decimal('1250.5'), deposit_amount=i,
+            )
+            if i == 5:
+                continue  # a vacant house
+            tenant = Tenant.objects.create(
+                user=self.user, full_name=f"Tenant {i}", email=f"t{i}@example.com", phone=f"+25471234567{i}",
+                house=house, id_number=f"ID{i}", rent_due_date=date(2026, 3, 5), is_active=i != 4,
+                last_notification_sent=timezone.now() if i % 2 else None,
+            )
+            charge = RentCharge.objects.create(user=self.user, tenant=tenant, year=2026, month=i + 1, amount_due=Decimal('1000.00'))
+            Payment.objects.create(
+                user=self.user, tenant=tenant, rent_charge=charge, amount=Decimal('400.10') * (i % 3),
+                payment_method='cash' if i % 2 else 'mobile_money', payment_reference=None if i % 2 else f"REF{i}",
+            )
+        # a tenant without a house
+        Tenant.objects.create(user=self.user, full_name="Moved Out", email="m@example.com", phone="+254712345699", id_number="IDM")
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def both_paths(self, url, params=None):
+        """(values() path, serializer path) responses for the same request"""
+        cache.clear()
+        fast = self.client.get(url, params)
+        cache.clear()
+        with mock.patch('tennants.views.api.values_representation', return_value=None):
+            slow = self.client.get(url, params)
+        self.assertEqual(fast.status_code, 200)
+        return fast, slow
+
+    def test_parity_with_the_serializers(self):
+        cases = [
+            ('tenant-list', {}),
+            ('tenant-list', {'fields': 'id,full_name,balance,house,phone'}),
+            ('tenant-list', {'ordering': '-full_name', 'page_size': 2}),
+            ('house-list', {}),
+            ('house-list', {'ordering': 'house_rent_amount', 'page_size': 4}),
+            ('flat-list', {}),
+            ('payment-list', {}),
+            ('payment-list', {'fields': 'amount,payment_method,paid_at'}),
+            ('rent-charge-list', {}),
+        ]
+        for name, params in cases:
+            with self.subTest(name, **params):
+                fast, slow = self.both_paths(reverse(name), params)
+                self.assertEqual(fast.content, slow.content)
+                self.assertTrue(fast.data['results'])
+
+    def test_parity_across_cursor_pages(self):
+        url, pages = reverse('tenant-list'), 0
+        params = {'ordering': 'full_name', 'page_size': 2}
+        while url:
+            fast, slow = self.both_paths(url, params)
+            self.assertEqual(fast.content, slow.content)
+            url, params, pages = fast.data['next'], None, pages + 1
+        self.assertEqual(pages, 3)
+
+    def test_list_costs_one_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(reverse('payment-list'))
+
+    def test_expand_uses_the_serializers(self):
+        response = self.client.get(reverse('tenant-list'), {'expand': 'house'})
+        self.assertEqual(response.data['results'][0]['house']['house_number'], "100")
+
+    def test_compiled_once_per_field_set(self):
+        self.assertIs(values_representation(TenantSerializer, ()), values_representation(TenantSerializer, ()))
+        self.assertEqual(values_representation(TenantSerializer, ()).annotations, {'balance'})
+        trimmed = values_representation(TenantSerializer, ('id', 'email'))
+        self.assertEqual([name for name, _, _ in trimmed.fields], ['id', 'email'])
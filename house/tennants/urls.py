@@ -11,9 +11,12 @@ from tennants.views.web import (dashboard, BuildingListViewWeb, BuildingDetailVi
                     RentChargeCreateViewWeb, RentChargeUpdateViewWeb,
                     bulk_create_rent_charges,send_rent_reminders)
 
-from tennants.views.api import (TenantListView, TenantDetailView,
+from tennants.views.api import (DashboardView, TenantListView, TenantDetailView,
                     HouseListView, HouseDetailView,
-                    FlatBuildingListView, FlatBuildingDetailView,PaymentListView)
+                    FlatBuildingListView, FlatBuildingDetailView, BuildingStatsView, PaymentListView, PaymentDetailView,
+                    RentChargeListView, RentChargeDetailView, GenerateRentChargesView, CacheStatsView,
+                    FlatBuildingBulkView, HouseBulkView, TenantBulkView, PaymentBulkView, ExportView,
+                    PortfolioImportView, SyncView, TenantSearchView)
 from tennants.views.auth import AdminLogoutView, user_login, RegisterUserView, AdminLogoutView
 
 
@@ -77,5 +80,30 @@ urlpatterns = [
     # notifications
     path('send-rent-reminders/', send_rent_reminders, name='send_rent_reminders'),
 
+    # ========================================
+    # JSON API
+    # ========================================
+    path('dashboard/api/', DashboardView.as_view(), name='dashboard-api'),
+    path('flats/', FlatBuildingListView.as_view(), name='flat-list'),
+    path('flats/<int:pk>/', FlatBuildingDetailView.as_view(), name='flat-detail'),
+    path('flats/bulk/', FlatBuildingBulkView.as_view(), name='flat-bulk'),
+    path('buildings/stats/', BuildingStatsView.as_view(), name='building-stats'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('houses/api/', HouseListView.as_view(), name='house-list'),
+    path('houses/api/<int:pk>/', HouseDetailView.as_view(), name='house-detail'),
+    path('houses/api/bulk/', HouseBulkView.as_view(), name='house-bulk'),
+    path('tenants/api/', TenantListView.as_view(), name='tenant-list'),
+    path('tenants/api/search/', TenantSearchView.as_view(), name='tenant-search'),
+    path('tenants/api/<int:pk>/', TenantDetailView.as_view(), name='tenant-detail'),
+    path('tenants/api/bulk/', TenantBulkView.as_view(), name='tenant-bulk'),
+    path('payments/api/', PaymentListView.as_view(), name='payment-list'),
+    path('payments/api/<int:pk>/', PaymentDetailView.as_view(), name='payment-detail'),
+    path('payments/api/bulk/', PaymentBulkView.as_view(), name='payment-bulk'),
+    path('rent-charges/api/', RentChargeListView.as_view(), name='rent-charge-list'),
+    path('rent-charges/api/<int:pk>/', RentChargeDetailView.as_view(), name='rent-charge-detail'),
+    path('rent-charges/generate/', GenerateRentChargesView.as_view(), name='rent-charge-generate'),
+    path('export/<str:resource>/', ExportView.as_view(), name='export'),
+    path('import/portfolio/', PortfolioImportView.as_view(), name='portfolio-import'),
+    path('sync/', SyncView.as_view(), name='sync'),
 
 ]
\ No newline at end of file
@@ -6,33 +6,48 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import serializers, generics
 from rest_framework.filters import OrderingFilter
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
 from tennants.models import Tenant, House, Payment, FlatBuilding, RentCharge
-from tennants.serializers import (TenantSerializer, HouseSerializer, PaymentSerializer,
-                          FlatBuildingSerializer, RegisterAdminSerializer, AdminLoginSerializer, ForgotPasswordSerializer)
+from tennants.serializers import (TenantSerializer, HouseSerializer, PaymentSerializer, RentChargeSerializer,
+                          FlatBuildingSerializer, RegisterAdminSerializer, AdminLoginSerializer, ForgotPasswordSerializer,
+                          GenerateRentChargesSerializer, ExportSerializer, SyncSerializer, TenantSearchSerializer,
+                          bulk_row_serializer, requested_fields, values_representation)
+from tennants.services import bulk, export, search, sync
+from tennants.services.portfolio import import_portfolio
+from tennants.services.billing import generate_rent_charges
+from tennants.services.dashboard import dashboard_snapshot
+from tennants.services.occupancy import building_stats
 import logging
 import requests
 from django.conf import settings
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth import authenticate, login
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from django.core.cache import cache
+from tennants.pagination import KeysetPagination
+from tennants.renderers import CSVRenderer, NDJSONRenderer, ORJSONRenderer
+from tennants.cache import cache_stats, get_or_build, resource_version
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags
 from django.core.exceptions import ValidationError
 from rest_framework.decorators import permission_classes
 
 from django.contrib.auth.models import User
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
 from rest_framework import status, permissions
 from rest_framework.exceptions import PermissionDenied, NotFound
 from rest_framework_simplejwt.tokens import RefreshToken
+import csv
 import hashlib
 import json
 import logging
 from tennants.forms import RegistrationForm
 from django.shortcuts import render, redirect
-from django.db import transaction
+from django.db import IntegrityError, transaction
 
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -50,64 +65,160 @@ logger = logging.getLogger(__name__)
 
 CACHE_TTL = getattr(settings, 'CACHE_TTL', 60 * 15)
 
-def make_cache_key(request, prefix=""):
-    user_id = getattr(request.user, 'id', 'anonymous')
-    key = f"{prefix}:{user_id}:{request.get_full_path()}"
-    return hashlib.md5(key.encode('utf-8')).hexdigest()
+class ConditionalGetMixin:
+    """
+    GET responses carry a weak ETag derived from the user's generation of
+    cache_resources (see tennants.cache), so it changes with every write that
+    could change the payload. A matching If-None-Match gets a 304 before any
+    query or serialization runs.
+    """
+    cache_resources = ()
 
-def get_cached_response(request, prefix=""):
-    key = make_cache_key(request, prefix)
-    return cache.get(key)
+    def get_cache_resources(self):
+        return self.cache_resources
+
+    def get(self, request, *args, **kwargs):
+        # also versions the cached page, so both follow the same generation
+        request.resource_version = resource_version(request.user.id, self.get_cache_resources())
+        tag = f"{request.user.id}:{request.resource_version}:{request.get_full_path()}:{request.accepted_media_type}"
+        etag = f'W/"{hashlib.md5(tag.encode("utf-8")).hexdigest()}"'
+
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            # a stale page doesn't match the current version, don't let the client keep it under that tag
+            if not getattr(response, 'stale', False):
+                response['ETag'] = etag
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class CachedListMixin(ConditionalGetMixin):
+    """List pages are served from the versioned response cache, see tennants.cache.get_or_build"""
+
+    def list(self, request, *args, **kwargs):
+        build_list = super().list
+
+        def build():
+            return build_list(request, *args, **kwargs).data
+
+        data, stale = get_or_build(
+            request.user.id, self.get_cache_resources(), request.get_full_path(), build, version=request.resource_version
+        )
+        response = Response(data)
+        response.stale = stale
+        return response
+
+
+class SparseFieldsMixin:
+    """Reads honour ?fields= and ?expand=, see serializers.DynamicFieldsMixin"""
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return self.get_serializer_class().plan_queryset(queryset, self.request)
+
+    def get_cache_resources(self):
+        # an expanded page also goes stale when the objects inlined into it change
+        _, expand = requested_fields(self.request)
+        resources = [*super().get_cache_resources(), *self.get_serializer_class().expansion_resources(expand)]
+        return tuple(dict.fromkeys(resources))
 
-def set_cached_response(request, data, prefix=""):
-    key = make_cache_key(request, prefix)
-    cache.set(key, data, CACHE_TTL)
 
-def clear_cache_pattern(request, prefix=""):
-    cache.delete_pattern(f"*{prefix}*")
+class ValuesListMixin:
+    """
+    List pages without ?expand= are built from values() rows with the
+    serializer's compiled representation (serializers.values_representation)
+    instead of model instances; the output is the same.
+    """
+
+    def list(self, request, *args, **kwargs):
+        fields, expand = requested_fields(request)
+        representation = None if expand else values_representation(self.get_serializer_class(), tuple(fields or ()))
+        if representation is None:
+            return super().list(request, *args, **kwargs)
+        rows = representation.values(self.filter_queryset(self.get_queryset()))
+        if rows is None:  # the queryset lacks an annotation the serializer reads
+            return super().list(request, *args, **kwargs)
+
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(representation.represent(page))
+        return Response(representation.represent(rows))
+
+
+class IsSuperUser(permissions.BasePermission):
+    # every registered landlord is staff (RegisterAdminSerializer), so IsAdminUser isn't enough
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_superuser)
+
+
+class CacheStatsView(APIView):
+    """Response cache hit, miss and stale counters, across all landlords; superusers only"""
+    permission_classes = [IsSuperUser]
+
+    def get(self, request):
+        return Response(cache_stats())
+
+
+class DashboardView(APIView):
+    """The numbers behind the dashboard page, from the same cached snapshot"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return Response(dashboard_snapshot(request.user))
 
 
 # ============================================================================
 # TENANT VIEWS
 # ============================================================================
 
-class TenantListView(generics.ListCreateAPIView):
+class TenantListView(SparseFieldsMixin, CachedListMixin, ValuesListMixin, generics.ListCreateAPIView):
     serializer_class = TenantSerializer
     permission_classes = [IsAuthenticated]
+    cache_resources = ('tenants',)
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ['is_active', 'house', 'full_name']
     ordering_fields = ['full_name', 'created_at']
 
     def get_queryset(self):
         """Filter tenants to only show current user's tenants"""
-        return Tenant.objects.filter(user=self.request.user).order_by('id')
+        return Tenant.objects.filter(user=self.request.user).with_balances().order_by('id')
     
-    def get(self, request, *args, **kwargs):
-        cached = get_cached_response(request, prefix="tenants")
-        if cached:
-            logger.debug(f"Serving cached tenants for user={request.user}") 
-            return Response(cached)
-        
-        response = super().get(request, *args, **kwargs)
-        set_cached_response(request, response.data, prefix="tenants")
-        logger.debug(f"Caching tenants for user={request.user}")
-        return response
 
     def perform_create(self, serializer):
     #    return proper response on capacity validation error during tenant creation
         try:
             tenant = serializer.save(user=self.request.user)
-            clear_cache_pattern(self.request, "tenants")
         except ValidationError as e:
             raise serializers.ValidationError({"detail": str(e)})
 
-class TenantDetailView(generics.RetrieveUpdateDestroyAPIView):
+class TenantSearchView(SparseFieldsMixin, ValuesListMixin, generics.ListAPIView):
+    """
+    Landlord's tenants matching ?q= on name, email, phone or ID number, best
+    match first, at most ?limit= of them (services/search.py)
+    """
+    serializer_class = TenantSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = None
+
+    def get_queryset(self):
+        params = TenantSearchSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        queryset = Tenant.objects.filter(user=self.request.user).with_balances()
+        return search.search_tenants(queryset, self.request.user, params.validated_data['q'], params.validated_data['limit'])
+
+
+class TenantDetailView(SparseFieldsMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = TenantSerializer
     permission_classes = [IsAuthenticated]
+    cache_resources = ('tenants',)
 
     def get_queryset(self):
         """Filter to user's tenants, optionally by house_id"""
-        queryset = Tenant.objects.filter(user=self.request.user)
+        queryset = Tenant.objects.filter(user=self.request.user).with_balances()
         house_id = self.request.query_params.get('house_id')
         if house_id:
             queryset = queryset.filter(house_id=house_id)
@@ -119,17 +230,17 @@ class TenantDetailView(generics.RetrieveUpdateDestroyAPIView):
 # HOUSE VIEWS
 # ============================================================================
 
-class HouseListView(generics.ListCreateAPIView):
+class HouseListView(SparseFieldsMixin, CachedListMixin, ValuesListMixin, generics.ListCreateAPIView):
     serializer_class = HouseSerializer
     permission_classes = [IsAuthenticated]
+    cache_resources = ('houses',)
+    pagination_class = KeysetPagination
     ordering_fields = ['house_number', 'house_size', 'house_rent_amount']
 
     def get_queryset(self):
         """Filter houses to only show current user's houses"""
-        print("Fetching houses for user:", self.request.user)
         queryset = House.objects.filter(user=self.request.user)
-        print("Initial queryset count:", queryset.count())
-        
+
         # Optional filter by flat_building
         flat_building_id = self.request.query_params.get('flat_building_id')
         if flat_building_id:
@@ -138,15 +249,6 @@ class HouseListView(generics.ListCreateAPIView):
         
         return queryset.order_by('id')
 
-    def get(self, request, *args, **kwargs):
-        cached = get_cached_response(request, prefix="houses")
-        if cached:
-            logger.debug(f"Serving cached houses for user={request.user}")
-            return Response(cached)
-        response = super().get(request, *args, **kwargs)
-        set_cached_response(request, response.data, prefix="houses")
-        logger.debug(f"Caching houses for user={request.user}")
-        return response
     
 
 
@@ -154,13 +256,13 @@ class HouseListView(generics.ListCreateAPIView):
         """return proper response on capacity validation error during house creation"""
         try:
             house = serializer.save(user=self.request.user)
-            clear_cache_pattern(self.request, "houses")
         except ValidationError as e:
             raise serializers.ValidationError({"detail": str(e)})
 
-class HouseDetailView(generics.RetrieveUpdateDestroyAPIView):
+class HouseDetailView(SparseFieldsMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = HouseSerializer
     permission_classes = [IsAuthenticated]
+    cache_resources = ('houses',)
     lookup_field = 'pk'
     
     def get_queryset(self):
@@ -172,9 +274,10 @@ class HouseDetailView(generics.RetrieveUpdateDestroyAPIView):
 # FLAT BUILDING VIEWS
 # ============================================================================
 
-class FlatBuildingListView(generics.ListCreateAPIView):
+class FlatBuildingListView(SparseFieldsMixin, CachedListMixin, ValuesListMixin, generics.ListCreateAPIView):
     serializer_class = FlatBuildingSerializer
     permission_classes = [IsAuthenticated]
+    cache_resources = ('flats',)
 
     def get_queryset(self):
         """Filter flat buildings to current user, optionally by name"""
@@ -188,22 +291,28 @@ class FlatBuildingListView(generics.ListCreateAPIView):
         
         return queryset.order_by('id')
 
-    def get(self, request, *args, **kwargs):
-        cached = get_cached_response(request, prefix="flats")
-        if cached:
-            return Response(cached)
-        response = super().get(request, *args, **kwargs)
-        set_cached_response(request, response.data, prefix="flats")
-        return response
 
     def perform_create(self, serializer):
         flat_building = serializer.save(user=self.request.user)
-        clear_cache_pattern(self.request, "flats")
 
 
-class FlatBuildingDetailView(generics.RetrieveUpdateDestroyAPIView):
+class BuildingStatsView(APIView):
+    """Occupied, vacant, tenant count and rent roll for each of the user's buildings"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        stats = building_stats(FlatBuilding.objects.filter(user=request.user))
+        totals = {
+            stat: sum(building[stat] for building in stats)
+            for stat in ('number_of_houses', 'occupied', 'vacant', 'tenant_count', 'rent_roll')
+        }
+        return Response({'buildings': stats, 'totals': totals})
+
+
+class FlatBuildingDetailView(SparseFieldsMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = FlatBuildingSerializer
     permission_classes = [IsAuthenticated]
+    cache_resources = ('flats',)
     lookup_field = 'pk' 
     
     def get_queryset(self):
@@ -225,9 +334,11 @@ class FlatBuildingDetailView(generics.RetrieveUpdateDestroyAPIView):
 # RENT PAYMENT VIEWS
 # ============================================================================
 
-class PaymentListView(generics.ListCreateAPIView):
+class PaymentListView(SparseFieldsMixin, CachedListMixin, ValuesListMixin, generics.ListCreateAPIView):
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
+    cache_resources = ('payments',)
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Only show paid payments for current user"""
@@ -235,22 +346,15 @@ class PaymentListView(generics.ListCreateAPIView):
             user=self.request.user
         ).order_by('id')
 
-    def get(self, request, *args, **kwargs):
-        cached = get_cached_response(request, prefix="rent_payments")
-        if cached:
-            return Response(cached)
-        response = super().get(request, *args, **kwargs)
-        set_cached_response(request, response.data, prefix="rent_payments")
-        return response
 
     def perform_create(self, serializer):
         payment = serializer.save(user=self.request.user)
-        clear_cache_pattern(self.request, "rent_payments")
 
 
-class PaymentDetailView(generics.RetrieveUpdateDestroyAPIView):
+class PaymentDetailView(SparseFieldsMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated]
+    cache_resources = ('payments',)
 
     def get_queryset(self):
         """Filter to user's payments, optionally by tenant"""
@@ -263,35 +367,30 @@ class PaymentDetailView(generics.RetrieveUpdateDestroyAPIView):
         return queryset.order_by('id')
 
 
-class RentChargeListView(generics.ListCreateAPIView):
-    serializer_class = PaymentSerializer
+class RentChargeListView(SparseFieldsMixin, CachedListMixin, ValuesListMixin, generics.ListCreateAPIView):
+    serializer_class = RentChargeSerializer
     permission_classes = [IsAuthenticated]
+    cache_resources = ('rent_charges',)
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         """Only show rent charges for current user"""
         return RentCharge.objects.filter(
             user=self.request.user
-        ).order_by('id')
+        ).with_payment_totals().order_by('id')
 
-    def get(self, request, *args, **kwargs):
-        cached = get_cached_response(request, prefix="rent_charges")
-        if cached:
-            return Response(cached)
-        response = super().get(request, *args, **kwargs)
-        set_cached_response(request, response.data, prefix="rent_charges")
-        return response
 
     def perform_create(self, serializer):
         rent_charge = serializer.save(user=self.request.user)
-        clear_cache_pattern(self.request, "rent_charges")
 
-class RentChargeDetailView(generics.RetrieveUpdateDestroyAPIView):
-    serializer_class = PaymentSerializer
+class RentChargeDetailView(SparseFieldsMixin, ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
+    serializer_class = RentChargeSerializer
     permission_classes = [IsAuthenticated]
+    cache_resources = ('rent_charges',)
 
     def get_queryset(self):
         """Filter to user's rent charges, optionally by tenant"""
-        queryset = RentCharge.objects.filter(user=self.request.user)
+        queryset = RentCharge.objects.filter(user=self.request.user).with_payment_totals()
         
         tenant_id = self.request.query_params.get('tenant_id')
         if tenant_id:
@@ -299,6 +398,172 @@ class RentChargeDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         return queryset.order_by('id')
 
+class GenerateRentChargesView(APIView):
+    """Bill the landlord's active tenants for a month in one go"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = GenerateRentChargesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        counts = generate_rent_charges(request.user, **serializer.validated_data)
+        return Response(counts, status=status.HTTP_201_CREATED if counts['created'] else status.HTTP_200_OK)
+
+# ============================================================================
+# BULK VIEWS
+# ============================================================================
+
+class BulkCreateView(APIView):
+    """
+    POST a list of objects to create them in one transaction. Nothing is
+    created unless every row is valid; otherwise the response lists the
+    errors of each failing row by its index in the payload.
+    """
+    permission_classes = [IsAuthenticated]
+    resource = None
+    serializer_class = None
+
+    def post(self, request):
+        rows = request.data
+        if not isinstance(rows, list) or not rows:
+            return Response({"detail": "Expected a non-empty list of objects."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(rows) > bulk.MAX_ROWS:
+            return Response({"detail": f"At most {bulk.MAX_ROWS} rows per request."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # one serializer validates every row, as a ListSerializer would
+        row_serializer = bulk_row_serializer(self.serializer_class)(context={'request': request})
+        valid, errors = {}, {}
+        for index, row in enumerate(rows):
+            try:
+                valid[index] = row_serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                errors[index] = serializers.as_serializer_error(exc)
+
+        try:
+            objects, errors = bulk.bulk_insert(request.user, self.resource, valid, errors)
+        except IntegrityError:
+            # a concurrent write took a unique value between the checks and the insert
+            return Response(
+                {"detail": "Some rows conflict with data saved meanwhile, nothing was created."},
+                status=status.HTTP_409_CONFLICT
+            )
+        if errors:
+            return Response(
+                {"errors": [{"index": index, "errors": errors[index]} for index in sorted(errors)]},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({"created": len(objects), "ids": [obj.pk for obj in objects]}, status=status.HTTP_201_CREATED)
+
+
+class FlatBuildingBulkView(BulkCreateView):
+    resource = 'flats'
+    serializer_class = FlatBuildingSerializer
+
+
+class HouseBulkView(BulkCreateView):
+    resource = 'houses'
+    serializer_class = HouseSerializer
+
+
+class TenantBulkView(BulkCreateView):
+    resource = 'tenants'
+    serializer_class = TenantSerializer
+
+
+class PaymentBulkView(BulkCreateView):
+    resource = 'payments'
+    serializer_class = PaymentSerializer
+
+
+class PortfolioImportView(APIView):
+    """
+    Upload a portfolio CSV as `file` (see services/portfolio.py for the columns).
+    Optional flags: dry_run, skip_invalid, welcome.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"detail": "Attach the CSV as `file`."}, status=status.HTTP_400_BAD_REQUEST)
+        flags = {
+            flag: request.data.get(flag, '').lower() in ('1', 'true', 'yes', 'on')
+            for flag in ('dry_run', 'skip_invalid', 'welcome')
+        }
+        try:
+            report = import_portfolio(request.user, upload.file, **flags)
+        except (UnicodeDecodeError, csv.Error) as exc:
+            return Response({"detail": f"Could not read the CSV: {exc}"}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            return Response(
+                {"detail": "Some lines conflict with data saved meanwhile, nothing was imported."},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        report['errors'] = [{"line": line, "errors": errors} for line, errors in sorted(report['errors'].items())]
+        if report['errors'] and not flags['skip_invalid']:
+            return Response(report, status=status.HTTP_400_BAD_REQUEST)
+        created = report['houses'] and not flags['dry_run']
+        return Response(report, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
+# ============================================================================
+# EXPORT VIEWS
+# ============================================================================
+
+class ExportView(APIView):
+    """
+    Stream a landlord's tenants, payments or rent charges as CSV or NDJSON,
+    e.g. export/payments/?output=ndjson&start=2026-01-01&end=2026-03-31&building=3.
+    Without ?output= an Accept of text/csv or application/x-ndjson picks the format.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [CSVRenderer, NDJSONRenderer]
+
+    def get(self, request, resource):
+        if resource not in export.EXPORTS:
+            raise NotFound(f"Nothing to export as {resource}.")
+        params = request.query_params.copy()
+        if 'output' not in params and request.accepted_renderer.format in export.FORMATS:
+            params['output'] = request.accepted_renderer.format
+        serializer = ExportSerializer(data=params)
+        serializer.is_valid(raise_exception=True)
+        options = serializer.validated_data
+        output = options.pop('output')
+
+        response = StreamingHttpResponse(
+            export.stream_export(request.user, resource, output, **options),
+            content_type=export.FORMATS[output],
+        )
+        filename = f"{resource}-{timezone.now():%Y%m%d}.{output}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # errors are JSON, whichever download format was asked for
+        renderer = getattr(request, 'accepted_renderer', None)
+        if isinstance(response, Response) and renderer and renderer.format in export.FORMATS:
+            request.accepted_renderer, request.accepted_media_type = ORJSONRenderer(), ORJSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class SyncView(APIView):
+    """
+    What changed across all of a landlord's resources since the last call,
+    e.g. sync/?cursor=<cursor from the previous response>; ?updated_since=<ISO
+    time> to start from a point in time, neither for everything
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        serializer = SyncSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        try:
+            return Response(sync.changes_since(request.user, **serializer.validated_data))
+        except sync.InvalidCursor as exc:
+            raise serializers.ValidationError({'cursor': str(exc)})
+
+
 # ============================================================================
 # AUTHENTICATION VIEWS
 # ============================================================================
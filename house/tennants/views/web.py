@@ -33,6 +33,7 @@ import logging
 from tennants.forms import RegistrationForm
 from django.shortcuts import render, redirect
 from django.db import transaction
+from django.db.models import F
 
 from django.views.generic import ListView, CreateView, UpdateView, DeleteView, DetailView
 from django.contrib.auth.mixins import LoginRequiredMixin
@@ -42,7 +43,10 @@ from django.contrib import messages
 from django.shortcuts import render
 from django.core.exceptions import ValidationError
 from django.utils import timezone
-from tennants.services.sms import TwilioNotificationService
+from tennants.services.billing import billable_tenants, generate_rent_charges
+from tennants.services.dashboard import dashboard_snapshot
+from tennants.services.reminders import queue_reminders, reminder_candidates
+from tennants.services import search
 
 
 
@@ -75,30 +79,25 @@ class ForgotPasswordViewWeb(APIView):
 @login_required
 def dashboard(request):
     """Main dashboard showing summary stats"""
-    buildings = FlatBuilding.objects.filter(user=request.user)
-    total_houses = House.objects.filter(user=request.user).count()
-    occupied_houses = House.objects.filter(user=request.user, occupation=True).count()
-    active_tenants = Tenant.objects.filter(user=request.user, is_active=True).count()
-    
+    snapshot = dashboard_snapshot(request.user)
+    buildings = FlatBuilding.objects.filter(user=request.user).with_occupancy()
+
     # Recent payments (last 5)
     recent_payments = Payment.objects.filter(
         user=request.user
-    ).order_by('-paid_at')[:5]
-    
-    # Calculate percentage of occupied houses (avoid division by zero)
-    if total_houses:
-        percent_occupied = round((occupied_houses / total_houses) * 100, 2)
-    else:
-        percent_occupied = 0.0
-    
+    ).select_related('tenant', 'rent_charge').order_by('-paid_at')[:5]
+
+    # Oldest unpaid charges (last column of the dashboard)
+    unpaid_charges = RentCharge.objects.filter(
+        user=request.user, amount_due__gt=F('amount_paid')
+    ).select_related('tenant').order_by('year', 'month', 'id')[:5]
+
     context = {
+        **snapshot,
+        'snapshot': snapshot,
         'buildings': buildings,
-        'total_houses': total_houses,
-        'occupied_houses': occupied_houses,
-        'vacant_houses': total_houses - occupied_houses,
-        'active_tenants': active_tenants,
         'recent_payments': recent_payments,
-        'percent_occupied': percent_occupied,
+        'unpaid_charges': unpaid_charges,
     }
     return render(request, 'dashboard.html', context)
 
@@ -113,7 +112,7 @@ class BuildingListViewWeb(LoginRequiredMixin, ListView):
     context_object_name = 'buildings'
     
     def get_queryset(self):
-        return FlatBuilding.objects.filter(user=self.request.user)
+        return FlatBuilding.objects.filter(user=self.request.user).with_occupancy()
 
 
 class BuildingCreateViewWeb(LoginRequiredMixin, CreateView):
@@ -166,7 +165,7 @@ class BuildingDetailViewWeb(LoginRequiredMixin, DetailView):
     context_object_name = 'building'
     
     def get_queryset(self):
-        return FlatBuilding.objects.filter(user=self.request.user)
+        return FlatBuilding.objects.filter(user=self.request.user).with_occupancy()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -273,13 +272,18 @@ class TenantListViewWeb(LoginRequiredMixin, ListView):
     context_object_name = 'tenants'
     
     def get_queryset(self):
-        queryset = Tenant.objects.filter(user=self.request.user)
+        # balances come annotated so the template doesn't aggregate per row
+        queryset = Tenant.objects.filter(user=self.request.user).with_balances()
         # Optional filter by active status
         status = self.request.GET.get('status')
         if status == 'active':
             queryset = queryset.filter(is_active=True)
         elif status == 'inactive':
             queryset = queryset.filter(is_active=False)
+        # Optional search on name, email, phone or ID number
+        query = self.request.GET.get('q', '').strip()
+        if query:
+            queryset = search.search_tenants(queryset, self.request.user, query, limit=search.MAX_LIMIT)
         return queryset
 
 
@@ -462,7 +466,10 @@ class RentChargeListViewWeb(LoginRequiredMixin, ListView):
 
     # display only rent charges for current user
     def get_queryset(self):
-        return RentCharge.objects.filter(user=self.request.user).order_by('-year', '-month')
+        return (RentCharge.objects.filter(user=self.request.user)
+                .select_related('tenant__house')
+                .with_payment_totals()
+                .order_by('-year', '-month'))
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -494,12 +501,8 @@ def bulk_create_rent_charges(request):
     current_year = timezone.now().year
     current_month = timezone.now().month
 
-    # Filter by current user
-    active_tenants = Tenant.objects.filter(
-        user=request.user, 
-        is_active=True,
-        house__isnull=False  # Only tenants with houses
-    ).select_related("house")
+    # Filter by current user, only tenants with houses
+    active_tenants = billable_tenants(request.user).select_related("house")
 
     active_tenants_count = active_tenants.count()
 
@@ -528,45 +531,14 @@ def bulk_create_rent_charges(request):
             month = int(month)
             year = int(year)
             tenant_ids = [int(tid) for tid in tenant_ids]
-        except ValueError:
+            counts = generate_rent_charges(request.user, year, month, tenant_ids=tenant_ids)
+        except (ValueError, ValidationError):
             messages.error(request, "Invalid month, year, or tenant selection.")
             return redirect("rent_charge_bulk_create")  # ✅ Fixed: use URL name
 
-        # Create rent charges
-        created_count = 0
-        skipped_count = 0
-        error_count = 0
-
-        with transaction.atomic():
-            for tenant_id in tenant_ids:
-                try:
-                    tenant = Tenant.objects.get(id=tenant_id, user=request.user)
-                    
-                    # Check if already exists
-                    if RentCharge.objects.filter(
-                        tenant=tenant,
-                        year=year,
-                        month=month
-                    ).exists():
-                        skipped_count += 1
-                        continue
-                    
-                    # Create rent charge
-                    RentCharge.objects.create(
-                        user=request.user,
-                        tenant=tenant,
-                        year=year,
-                        month=month,
-                        amount_due=tenant.house.house_rent_amount
-                    )
-                    created_count += 1
-                    
-                except Tenant.DoesNotExist:
-                    error_count += 1
-                    logger.error(f"Tenant {tenant_id} not found for user {request.user.id}")
-                except Exception as e:
-                    error_count += 1
-                    logger.error(f"Error creating rent charge for tenant {tenant_id}: {str(e)}")
+        created_count = counts['created']
+        skipped_count = counts['skipped']
+        error_count = counts['not_found']
 
         # Success messages
         month_name = dict(RentCharge.MONTH_CHOICES).get(month, month)
@@ -606,75 +578,32 @@ def bulk_create_rent_charges(request):
 @login_required
 def send_rent_reminders(request):
     """Manual trigger for sending rent reminders"""
+    today = timezone.now().date()
+    candidates = reminder_candidates(today, user=request.user)
+
     if request.method == 'POST':
-        notification_service = TwilioNotificationService()
-        today = timezone.now().date()
-        sent_count = 0
-        failed_count = 0
-        
-        # Get all active tenants with SMS enabled
-        active_tenants = Tenant.objects.filter(
-            is_active=True, 
-            sms_notifications=True
+        # written to the outbox and sent after commit, the request never waits on the SMS provider
+        queued = queue_reminders([rent_charge for rent_charge, _ in candidates], today)
+        waiting = len(candidates) - queued
+        messages.success(
+            request,
+            f'✓ Queued {queued} reminders.' + (f' {waiting} were already waiting to be sent.' if waiting else '')
         )
-        
-        for tenant in active_tenants:
-            days_until_due = (tenant.rent_due_date - today).days
-            
-            # Check if reminder should be sent
-            if 0 <= days_until_due <= tenant.reminder_days_before:
-                try:
-                    rent_charge = RentCharge.objects.get(
-                        tenant=tenant,
-                        year=today.year,
-                        month=today.month
-                    )
-                    
-                    if not rent_charge.reminder_sent:
-                        success, result = notification_service.send_rent_due_reminder(rent_charge)
-                        if success:
-                            sent_count += 1
-                        else:
-                            failed_count += 1
-                            
-                except RentCharge.DoesNotExist:
-                    pass
-        
-        messages.success(request, f'✓ Sent {sent_count} reminders. Failed: {failed_count}')
         return redirect('send_rent_reminders')
     
     # GET request - show preview
-    today = timezone.now().date()
-    tenants_to_remind = []
-    
-    active_tenants = Tenant.objects.filter(
-        is_active=True, 
-        sms_notifications=True
-    )
-    
-    for tenant in active_tenants:
-        days_until_due = (tenant.rent_due_date - today).days
-        
-        if 0 <= days_until_due <= tenant.reminder_days_before:
-            try:
-                rent_charge = RentCharge.objects.get(
-                    tenant=tenant,
-                    year=today.year,
-                    month=today.month
-                )
-                
-                if not rent_charge.reminder_sent:
-                    tenants_to_remind.append({
-                        'tenant': tenant,
-                        'rent_charge': rent_charge,
-                        'days_until_due': days_until_due,
-                    })
-            except RentCharge.DoesNotExist:
-                pass
+    tenants_to_remind = [
+        {
+            'tenant': rent_charge.tenant,
+            'rent_charge': rent_charge,
+            'days_until_due': days_until_due,
+        }
+        for rent_charge, days_until_due in candidates
+    ]
     
     context = {
         'tenants_to_remind': tenants_to_remind,
         'today': today,
     }
 
-    return render(request, 'payments/send_sms.html', context)
\ No newline at end of file
+    return render(request, 'payments/send_sms.html', context)